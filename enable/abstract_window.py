@@ -1,15 +1,18 @@
 
+from __future__ import with_statement
+
 # Major library imports
 from numpy import dot
 
 # Enthought library imports
-from traits.api import Any, Bool, Event, HasTraits, Instance, \
+from kiva.constants import FILL
+from traits.api import Any, Bool, Event, HasTraits, Instance, Int, \
         Property, Trait, Tuple, List
 
 
 # Local relative imports
-from base import bounds_to_coordinates, does_disjoint_intersect_coordinates, \
-    union_bounds
+from base import bounds_to_coordinates, consolidate_bounds, \
+    does_disjoint_intersect_coordinates, union_bounds
 from component import Component
 from interactor import Interactor
 from container import Container
@@ -61,9 +64,15 @@ class AbstractWindow(HasTraits):
     # to the new size of the window, expressed as a tuple (dx, dy).
     resized = Event
 
-    # Whether to enable damaged region handling
+    # Whether to enable damaged region handling.  If True, only the regions
+    # passed to invalidate_draw() are redrawn and blitted on the next paint;
+    # otherwise the entire window is redrawn.
     use_damaged_region = Bool(False)
 
+    # The maximum number of separate rectangles drawn during a damaged-region
+    # paint.  If more remain after merging, their bounding box is used.
+    max_damaged_regions = Int(8)
+
     # The previous component that handled an event.  Used to generate
     # mouse_enter and mouse_leave events.  Right now this can only be
     # None, self.component, or self.overlay.
@@ -72,7 +81,8 @@ class AbstractWindow(HasTraits):
     # (dx, dy) integer size of the Window.
     _size = Trait(None, Tuple)
 
-    # The regions to update upon redraw
+    # The regions to update upon redraw, as a list of (x, y, w, h) bounds.
+    # None means that the whole window must be redrawn.
     _update_region = Any
 
 
@@ -133,9 +143,12 @@ class AbstractWindow(HasTraits):
         if self._update_region is None:
             gc.clear(self.bgcolor_)
         else:
-            # Fixme: should use clip_to_rects
-            update_union = reduce(union_bounds, self._update_region)
-            gc.clip_to_rect(*update_union)
+            self._update_region = consolidate_bounds(self._update_region,
+                                                     self.max_damaged_regions)
+            if len(self._update_region) == 0:
+                # Everything that was damaged had an empty area
+                self._update_region = None
+                gc.clear(self.bgcolor_)
         return
 
     def _window_paint(self, event):
@@ -232,10 +245,9 @@ class AbstractWindow(HasTraits):
 
     def invalidate_draw(self, damaged_regions=None, self_relative=False):
         if damaged_regions is not None and self._update_region is not None:
-            self._update_region += damaged_regions
+            self._update_region += [tuple(region) for region in damaged_regions]
         else:
             self._update_region = None
-#        print damaged_regions
 
     #---------------------------------------------------------------------------
     #  Generic keyboard event handler:
@@ -368,7 +380,12 @@ class AbstractWindow(HasTraits):
 
     def redraw(self):
         """ Requests that the window be redrawn. """
-        self._redraw()
+        if self.use_damaged_region and self._update_region:
+            # Only ask the toolkit to repaint the area that is actually damaged
+            update_union = reduce(union_bounds, self._update_region)
+            self._redraw(bounds_to_coordinates(update_union))
+        else:
+            self._redraw()
         return
 
     def cleanup(self):
@@ -400,28 +417,38 @@ class AbstractWindow(HasTraits):
             self._window_paint(event)
             return
 
-        # Create a new GC if necessary
+        # Create a new GC if necessary.  A new GC has no valid contents, so
+        # the whole window has to be redrawn.
         size = self._get_control_size()
         if (self._size != tuple(size)) or (self._gc is None):
             self._size = tuple(size)
             self._gc = self._create_gc(size)
+            self._update_region = None
 
-        # Always give the GC a chance to initialize
+        # Always give the GC a chance to initialize; this also merges the
+        # damaged regions into self._update_region.
         self._init_gc()
 
         # Layout components and draw
         if hasattr(self.component, "do_layout"):
             self.component.do_layout()
         gc = self._gc
-        self.component.draw(gc, view_bounds=(0, 0, size[0], size[1]))
-
-#        damaged_regions = draw_result['damaged_regions']
-        # FIXME: consolidate damaged regions if necessary
-        if not self.use_damaged_region:
-            self._update_region = None
+        if self._update_region is None:
+            self.component.draw(gc, view_bounds=(0, 0, size[0], size[1]))
+        else:
+            # Redraw each damaged region separately, clipped to its bounds, so
+            # that components outside of it are culled by their containers.
+            for region in self._update_region:
+                with gc:
+                    gc.clip_to_rect(*region)
+                    gc.set_antialias(False)
+                    gc.set_fill_color(self.bgcolor_)
+                    gc.draw_rect(region, FILL)
+                    self.component.draw(gc, view_bounds=region)
 
         # Perform a paint of the GC to the window (only necessary on backends
-        # that render to an off-screen buffer)
+        # that render to an off-screen buffer).  If self._update_region is not
+        # None, only the listed regions have changed.
         self._window_paint(event)
 
         self._update_region = []
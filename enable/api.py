@@ -35,6 +35,9 @@ from container import Container
 from coordinate_box import CoordinateBox
 from component_editor import ComponentEditor
 from overlay_container import OverlayContainer
+from draw_profiler import DrawProfiler
+from profiler_overlay import ProfilerOverlay
+from image_pyramid import ImagePyramid, PyramidImage
 
 # Breaks code that does not use numpy
 from label import Label
@@ -8,6 +8,7 @@ Enable package.
 #                     union_coordinates
 #                     intersect_bounds
 #                     union_bounds
+#                     consolidate_bounds
 #                     disjoint_intersect_coordinates
 #                     does_disjoint_intersect_coordinates
 #                     bounding_coordinates
@@ -171,6 +172,48 @@ def union_bounds ( bounds1, bounds2 ):
         return empty_rectangle
     return ( xl, yb, xr - xl, yt - yb )
 
+def consolidate_bounds ( bounds_list, max_regions = 8 ):
+    """ Merge a list of bounds rectangles into a small set of rectangles
+    covering the same area.
+
+    Overlapping rectangles, and pairs whose union is no larger than the sum
+    of their areas, are replaced by their union until no such pair remains.
+    If more than *max_regions* rectangles are left, they are collapsed into
+    their single bounding rectangle.  Empty rectangles are dropped.
+    """
+    regions = []
+    for bounds in bounds_list:
+        if bounds is empty_rectangle:
+            continue
+        x, y, dx, dy = bounds
+        if dx > 0 and dy > 0:
+            regions.append( ( x, y, x + dx, y + dy ) )
+
+    merged = True
+    while merged and len( regions ) > 1:
+        merged = False
+        for i in xrange( len( regions ) ):
+            xl1, yb1, xr1, yt1 = regions[i]
+            area1 = (xr1 - xl1) * (yt1 - yb1)
+            for j in xrange( i + 1, len( regions ) ):
+                xl2, yb2, xr2, yt2 = regions[j]
+                xl, yb = min( xl1, xl2 ), min( yb1, yb2 )
+                xr, yt = max( xr1, xr2 ), max( yt1, yt2 )
+                overlaps = ((min( xr1, xr2 ) >= max( xl1, xl2 )) and
+                            (min( yt1, yt2 ) >= max( yb1, yb2 )))
+                union_area = (xr - xl) * (yt - yb)
+                if overlaps or \
+                        union_area <= area1 + (xr2 - xl2) * (yt2 - yb2):
+                    regions[i] = ( xl, yb, xr, yt )
+                    del regions[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    if len( regions ) > max_regions:
+        regions = [ bounding_coordinates( regions ) ]
+    return [ coordinates_to_bounds( coordinates ) for coordinates in regions ]
 
 def does_disjoint_intersect_coordinates ( coordinates_list, coordinates ):
     "Return whether a rectangle intersects a disjoint set of rectangles anywhere"
@@ -0,0 +1,16 @@
+""" Benchmarks of Kiva and Enable.
+
+Run them with::
+
+    python -m enable.benchmarks run -o results.json
+
+and compare two runs with::
+
+    python -m enable.benchmarks compare baseline.json results.json
+
+which exits with a non-zero status if any benchmark got slower.  See
+``python -m enable.benchmarks --help`` for the options.
+"""
+
+from runner import Benchmark, Comparison, SkipBenchmark, benchmark, \
+     compare, get_benchmarks, load, register, run, save, time_benchmark
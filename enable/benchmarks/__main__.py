@@ -0,0 +1,69 @@
+""" The command line interface to the benchmarks.
+"""
+
+import os
+import sys
+
+# The benchmarks draw off-screen, so don't start a GUI toolkit.
+os.environ.setdefault('ETS_TOOLKIT', 'null')
+
+from argparse import ArgumentParser
+
+from enable.benchmarks import runner
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m enable.benchmarks",
+                            description="Benchmarks of Kiva and Enable.")
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("patterns", nargs="*", metavar="PATTERN",
+        help="shell-style patterns of the benchmarks to run, e.g. 'kiva.agg.*'")
+    run_parser.add_argument("-o", "--output",
+        help="the JSON file to write the results to")
+    run_parser.add_argument("-w", "--warmup", type=int,
+        default=runner.DEFAULT_WARMUP, help="untimed runs before timing")
+    run_parser.add_argument("-r", "--repeat", type=int,
+        default=runner.DEFAULT_REPEAT, help="timed repetitions")
+    run_parser.add_argument("-n", "--number", type=int,
+        help="calls per repetition (chosen automatically by default)")
+    run_parser.add_argument("--min-time", type=float,
+        default=runner.DEFAULT_MIN_TIME,
+        help="the minimum duration of a repetition, in seconds")
+    run_parser.add_argument("-l", "--list", action="store_true",
+        help="list the benchmarks instead of running them")
+
+    compare_parser = commands.add_parser("compare",
+        help="compare two runs, exiting with status 1 on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("-t", "--threshold", type=float,
+        default=runner.DEFAULT_THRESHOLD,
+        help="the relative slowdown reported as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        benchmarks = runner.get_benchmarks(args.patterns)
+        if args.list:
+            for bench in benchmarks:
+                print "%-40s %s" % (bench.name, bench.description)
+            return 0
+        results = runner.run(benchmarks, warmup=args.warmup,
+                             repeat=args.repeat, number=args.number,
+                             min_time=args.min_time, verbose=sys.stdout)
+        if args.output:
+            runner.save(results, args.output)
+        return 0
+
+    comparisons = runner.compare(runner.load(args.baseline),
+                                 runner.load(args.current),
+                                 threshold=args.threshold)
+    print runner.format_comparisons(comparisons)
+    slower = [c for c in comparisons if c.status == 'slower']
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
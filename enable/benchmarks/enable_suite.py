@@ -0,0 +1,118 @@
+""" Benchmarks of Enable drawing, event dispatch and layout, and of parsing
+and rendering SVG documents with enable.savage.  Everything is drawn into
+off-screen graphics contexts, so no GUI toolkit is needed.
+"""
+
+import xml.etree.cElementTree as etree
+from cStringIO import StringIO
+
+from numpy import random
+
+from kiva.image import GraphicsContext
+
+from enable.component import Component
+from enable.container import Container
+from enable.events import MouseEvent
+from enable.stacked_container import VStackedContainer
+
+from runner import SEED, register, benchmark
+
+
+@benchmark("enable.container_draw")
+def container_draw():
+    """ Draw a container of 400 components """
+    container = Container(bounds=[400, 400])
+    for i in range(20):
+        for j in range(20):
+            container.add(Component(position=[i * 20, j * 20],
+                                    bounds=[15, 15], bgcolor="lightblue"))
+    gc = GraphicsContext((400, 400))
+
+    def draw():
+        container.draw(gc)
+    return draw
+
+
+def _dispatch_setup(depth):
+    def setup():
+        root = container = Container(bounds=[100, 100])
+        for i in range(depth - 1):
+            child = Container(bounds=[100, 100])
+            container.add(child)
+            container = child
+        container.add(Component(bounds=[100, 100]))
+
+        def dispatch():
+            root.dispatch(MouseEvent(x=50, y=50), "mouse_move")
+        return dispatch
+    setup.__doc__ = "Dispatch a mouse event through %d containers" % depth
+    return setup
+
+for _depth in (1, 10, 50):
+    register("enable.dispatch_depth_%d" % _depth, _dispatch_setup(_depth))
+
+
+@benchmark("enable.layout")
+def layout():
+    """ Lay out a tree of 85 stacked containers after a leaf changes """
+    def create(level):
+        if level == 4:
+            return Component(bounds=[10, 10], resizable="")
+        container = VStackedContainer(fit_components="hv")
+        container.add(*[create(level + 1) for i in range(4)])
+        return container
+
+    root = create(0)
+    root.bounds = list(root.get_preferred_size())
+    root.do_layout()
+    leaf = root
+    while isinstance(leaf, Container):
+        leaf = leaf.components[0]
+    heights = [10, 20]
+
+    def do_layout():
+        heights.reverse()
+        leaf.bounds = [10, heights[0]]
+        root.bounds = list(root.get_preferred_size())
+        root.do_layout()
+    return do_layout
+
+
+def _svg_document(count=200, seed=SEED):
+    """ Returns an SVG document of *count* curved, filled and stroked paths.
+    """
+    values = random.RandomState(seed).uniform(0, 400, (count, 8))
+    paths = ['<path d="M %.1f %.1f C %.1f %.1f %.1f %.1f %.1f %.1f Z" '
+             'fill="#%06x" stroke="black" stroke-width="2"/>'
+             % (tuple(row) + (i * 0x10101 % 0xffffff,))
+             for i, row in enumerate(values)]
+    return ('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+            'width="400" height="400">\n<g transform="translate(5, 5)">\n'
+            + "\n".join(paths) + '\n</g>\n</svg>\n')
+
+
+@benchmark("savage.parse")
+def svg_parse():
+    """ Parse an SVG document of 200 paths """
+    from enable.savage.svg.document import SVGDocument
+    from enable.savage.svg.backends.kiva.renderer import Renderer
+    source = _svg_document()
+
+    def parse():
+        root = etree.parse(StringIO(source)).getroot()
+        SVGDocument(root, renderer=Renderer)
+    return parse
+
+
+@benchmark("savage.render")
+def svg_render():
+    """ Render an SVG document of 200 paths """
+    from enable.savage.svg.document import SVGDocument
+    from enable.savage.svg.backends.kiva.renderer import Renderer
+    root = etree.parse(StringIO(_svg_document())).getroot()
+    document = SVGDocument(root, renderer=Renderer)
+    gc = GraphicsContext((400, 400))
+
+    def render():
+        document.render(gc)
+    return render
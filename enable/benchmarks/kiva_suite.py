@@ -0,0 +1,249 @@
+""" Benchmarks of the drawing operations of each Kiva backend.
+
+Every benchmark is registered once per backend, as 'kiva.<backend>.<name>'.
+Backends which can not be imported here are skipped.
+"""
+
+from __future__ import with_statement
+
+from cStringIO import StringIO
+
+from numpy import arange, array, column_stack, cos, pi, random, sin, uint8
+
+from kiva.basecore2d import GraphicsContextBase
+from kiva.constants import FILL, SQUARE_MARKER
+from kiva.fonttools import Font
+
+from runner import SEED, SkipBenchmark, benchmark, register
+
+# The size of the graphics contexts drawn into.
+SIZE = (500, 500)
+
+
+def _agg_gc():
+    from kiva.image import GraphicsContext
+    # Use the format that draw_image() wraps RGBA arrays in, so that images
+    # are drawn without a pixel format conversion.
+    return GraphicsContext(SIZE, pix_format='rgba32')
+
+
+def _svg_gc():
+    from kiva.svg import GraphicsContext
+    return GraphicsContext(SIZE)
+
+
+def _ps_gc():
+    from kiva.ps import PSGC
+    return PSGC(SIZE)
+
+
+def _pdf_gc():
+    from reportlab.pdfgen.canvas import Canvas
+    from kiva.pdf import GraphicsContext
+    return GraphicsContext(Canvas(StringIO(), pagesize=SIZE))
+
+
+def _cairo_gc():
+    from kiva.cairo import GraphicsContext
+    return GraphicsContext(SIZE)
+
+
+# The name and graphics context factory of each backend.
+BACKENDS = [
+    ('agg', _agg_gc),
+    ('svg', _svg_gc),
+    ('ps', _ps_gc),
+    ('pdf', _pdf_gc),
+    ('cairo', _cairo_gc),
+]
+
+
+def create_gc(backend):
+    """ Returns a new graphics context of the named backend, or raises
+    SkipBenchmark if the backend is not available.
+    """
+    factory = dict(BACKENDS)[backend]
+    try:
+        return factory()
+    except ImportError, exc:
+        raise SkipBenchmark("%s backend is not available: %s" % (backend, exc))
+
+
+def random_points(count, seed=SEED):
+    """ Returns *count* random points inside the graphics context.
+    """
+    return random.RandomState(seed).uniform(0, SIZE[0], (count, 2))
+
+
+#------------------------------------------------------------------------------
+# Operations.  Each takes a graphics context and returns the callable to time.
+#------------------------------------------------------------------------------
+
+def lines(gc):
+    """ Stroke a 1000 point polyline """
+    x = arange(1000) * SIZE[0] / 1000.0
+    points = column_stack((x, SIZE[1] / 2.0 * (1 + sin(x * 2 * pi / 100))))
+
+    def draw():
+        gc.begin_path()
+        gc.lines(points)
+        gc.stroke_path()
+    return draw
+
+
+def rects(gc):
+    """ Fill 1000 rectangles, one at a time """
+    points = random_points(1000)
+    gc.set_fill_color((1.0, 0.0, 0.0, 0.5))
+
+    def draw():
+        for x, y in points:
+            gc.rect(x, y, 5, 5)
+            gc.fill_path()
+    return draw
+
+
+def compiled_path(gc):
+    """ Fill a star path at 1000 points, one at a time """
+    angles = arange(10) * pi / 5
+    radii = array([10.0, 4.0] * 5)
+    star = gc.get_empty_path()
+    star.lines(column_stack((radii * cos(angles), radii * sin(angles))))
+    star.close_path()
+    points = random_points(1000)
+
+    def draw():
+        for x, y in points:
+            with gc:
+                gc.translate_ctm(x, y)
+                gc.add_path(star)
+                gc.draw_path(FILL)
+    return draw
+
+
+def markers(gc):
+    """ Draw 1000 square markers in one call """
+    points = random_points(1000)
+
+    def draw():
+        gc.draw_marker_at_points(points, 5, SQUARE_MARKER)
+    return draw
+
+
+def text(gc):
+    """ Draw 100 strings """
+    gc.set_font(Font("Helvetica", 12))
+    points = random_points(100)
+    strings = ["label %d" % i for i in range(100)]
+
+    def draw():
+        for string, (x, y) in zip(strings, points):
+            gc.show_text_at_point(string, x, y)
+    return draw
+
+
+def text_extent(gc):
+    """ Measure 100 strings """
+    gc.set_font(Font("Helvetica", 12))
+    strings = ["label %d" % i for i in range(100)]
+
+    def draw():
+        for string in strings:
+            gc.get_full_text_extent(string)
+    return draw
+
+
+def image(gc):
+    """ Draw a 256x256 RGBA image """
+    if isinstance(gc, GraphicsContextBase) and \
+            type(gc).draw_image == GraphicsContextBase.draw_image and \
+            not hasattr(gc, 'device_draw_image'):
+        raise SkipBenchmark("images are not supported")
+    data = random.RandomState(SEED).randint(0, 256, (256, 256, 4))
+    data = data.astype(uint8)
+
+    def draw():
+        gc.draw_image(data, (10, 10, 256, 256))
+    return draw
+
+
+def gradient(gc):
+    """ Fill a rectangle with a linear gradient """
+    if not hasattr(gc, 'linear_gradient'):
+        raise SkipBenchmark("gradients are not supported")
+    stops = array([[0.0, 1.0, 1.0, 1.0, 1.0], [1.0, 0.0, 0.0, 0.0, 1.0]])
+
+    def draw():
+        gc.rect(0, 0, SIZE[0], SIZE[1])
+        gc.linear_gradient(0, 0, SIZE[0], SIZE[1], stops, "pad",
+                           "userSpaceOnUse")
+        gc.draw_path(FILL)
+    return draw
+
+
+def clipping(gc):
+    """ Fill 100 rectangles, each clipped to a different rectangle """
+    points = random_points(100)
+
+    def draw():
+        for x, y in points:
+            with gc:
+                gc.clip_to_rect(x, y, 10, 10)
+                gc.rect(x - 5, y - 5, 20, 20)
+                gc.fill_path()
+    return draw
+
+
+OPERATIONS = [lines, rects, compiled_path, markers, text, text_extent, image,
+              gradient, clipping]
+
+
+def _make_setup(backend, operation):
+    def setup():
+        return operation(create_gc(backend))
+    setup.__doc__ = operation.__doc__
+    return setup
+
+
+for _backend, _factory in BACKENDS:
+    for _operation in OPERATIONS:
+        register("kiva.%s.%s" % (_backend, _operation.__name__),
+                 _make_setup(_backend, _operation))
+
+
+def _encoding_gc():
+    """ Returns an Agg context in the default pixel format, filled with
+    random rectangles.
+    """
+    from kiva.image import GraphicsContext
+    gc = GraphicsContext(SIZE)
+    state = random.RandomState(SEED)
+    for x, y in random_points(100):
+        gc.set_fill_color(tuple(state.uniform(size=4)))
+        gc.rect(x, y, 50, 50)
+        gc.fill_path()
+    return gc
+
+
+@benchmark("kiva.agg.encode_png")
+def encode_png():
+    """ Encode a 500x500 Agg context as a PNG file with PIL """
+    from kiva.agg.image_encoding import PilImage
+    if PilImage is None:
+        raise SkipBenchmark("PIL is not available")
+    gc = _encoding_gc()
+
+    def encode():
+        gc.encode("png")
+    return encode
+
+
+@benchmark("kiva.agg.encode_png_builtin")
+def encode_png_builtin():
+    """ Encode a 500x500 Agg context as a PNG file without PIL """
+    from kiva.agg.image_encoding import encode_png
+    gc = _encoding_gc()
+
+    def encode():
+        encode_png(gc)
+    return encode
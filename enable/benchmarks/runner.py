@@ -0,0 +1,283 @@
+""" Runs benchmarks, saves their results as JSON and compares two runs.
+
+A benchmark is a name and a setup function.  The setup function builds the
+data the benchmark needs and returns the callable to time, or raises
+SkipBenchmark if the benchmark can not run here (for example, when the Kiva
+backend it uses is not importable).  Setup happens outside of the timed
+region, once for each repetition, so every repetition starts from the same
+state.
+"""
+
+from __future__ import division
+
+import fnmatch
+import json
+import platform
+import sys
+import time
+from collections import namedtuple
+from timeit import default_timer
+
+# The default number of untimed runs before the timed repetitions.
+DEFAULT_WARMUP = 1
+
+# The default number of timed repetitions.
+DEFAULT_REPEAT = 5
+
+# The default minimum duration of a repetition, in seconds.  The number of
+# calls in each repetition is chosen to take at least this long.
+DEFAULT_MIN_TIME = 0.05
+
+# The default relative slowdown that compare() reports as a regression.
+DEFAULT_THRESHOLD = 0.1
+
+# The seed of the random data the benchmarks draw, so that every run draws
+# the same thing.
+SEED = 1234
+
+# The version of the format of the JSON results.
+FORMAT_VERSION = 1
+
+
+class SkipBenchmark(Exception):
+    """ Raised by the setup function of a benchmark which can not run. """
+    pass
+
+
+class Benchmark(object):
+    """ A named operation to time. """
+
+    def __init__(self, name, setup, description=""):
+        # The dotted name of the benchmark, e.g. 'kiva.agg.lines'
+        self.name = name
+
+        # A callable taking no arguments which returns the callable to time
+        self.setup = setup
+
+        # A one line description of what is timed
+        self.description = description or (setup.__doc__ or "").strip()
+
+    def __repr__(self):
+        return "Benchmark(%r)" % self.name
+
+
+# All of the registered benchmarks, in the order they were registered.
+_registry = []
+
+
+def register(name, setup, description=""):
+    """ Adds a benchmark to the registry, and returns it.
+    """
+    if name in [bench.name for bench in _registry]:
+        raise ValueError("A benchmark named %r already exists" % name)
+    bench = Benchmark(name, setup, description)
+    _registry.append(bench)
+    return bench
+
+
+def benchmark(name):
+    """ A decorator which registers a setup function as a benchmark.
+    """
+    def decorator(setup):
+        register(name, setup)
+        return setup
+    return decorator
+
+
+def get_benchmarks(patterns=None):
+    """ Returns the registered benchmarks whose names match any of the
+    shell-style *patterns*, or all of them if no patterns are given.
+
+    The standard Kiva and Enable benchmarks are loaded first.
+    """
+    # Importing the suites registers their benchmarks.
+    import kiva_suite
+    import enable_suite
+
+    if not patterns:
+        return list(_registry)
+    return [bench for bench in _registry
+            if any(fnmatch.fnmatchcase(bench.name, pattern)
+                   for pattern in patterns)]
+
+
+def time_benchmark(bench, warmup=DEFAULT_WARMUP, repeat=DEFAULT_REPEAT,
+                   number=None, min_time=DEFAULT_MIN_TIME):
+    """ Times one benchmark.
+
+    Returns a dictionary with the number of calls in each repetition, the
+    time per call of each repetition, and their min, median, mean and
+    standard deviation in seconds.  If the benchmark is skipped, the
+    dictionary only holds the reason, under 'skipped'.
+
+    If *number* is None, it is doubled from 1 until a repetition takes at
+    least *min_time* seconds; those calibration runs count as warmup.
+    """
+    def run_once(number):
+        func = bench.setup()
+        start = default_timer()
+        for i in xrange(number):
+            func()
+        return default_timer() - start
+
+    try:
+        for i in range(warmup):
+            run_once(1)
+        if number is None:
+            number = 1
+            while run_once(number) < min_time and number < 2**20:
+                number *= 2
+        times = [run_once(number) / number for i in range(repeat)]
+    except SkipBenchmark, exc:
+        return {'skipped': str(exc)}
+
+    return dict(_statistics(times), number=number, times=times)
+
+
+def run(benchmarks, warmup=DEFAULT_WARMUP, repeat=DEFAULT_REPEAT,
+        number=None, min_time=DEFAULT_MIN_TIME, verbose=None):
+    """ Times each of the *benchmarks* and returns the results, a
+    dictionary which can be saved as JSON with save().
+
+    If *verbose* is a file, a line is written to it as each benchmark
+    finishes.
+    """
+    results = {}
+    for bench in benchmarks:
+        result = time_benchmark(bench, warmup=warmup, repeat=repeat,
+                                number=number, min_time=min_time)
+        results[bench.name] = result
+        if verbose is not None:
+            if 'skipped' in result:
+                summary = "skipped (%s)" % result['skipped']
+            else:
+                summary = "%s  (%d calls)" % (format_time(result['min']),
+                                              result['number'])
+            verbose.write("%-40s %s\n" % (bench.name, summary))
+            verbose.flush()
+
+    return {
+        'version': FORMAT_VERSION,
+        'metadata': _metadata(warmup, repeat),
+        'benchmarks': results,
+    }
+
+
+def save(results, filename):
+    """ Writes the results of run() to a JSON file.
+    """
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+
+
+def load(filename):
+    """ Reads results written by save().
+    """
+    with open(filename) as f:
+        results = json.load(f)
+    if results.get('version') != FORMAT_VERSION:
+        raise ValueError("%s does not hold benchmark results in format %d"
+                         % (filename, FORMAT_VERSION))
+    return results
+
+
+Comparison = namedtuple('Comparison', 'name baseline current ratio status')
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """ Compares the results of two runs, using the fastest repetition of
+    each benchmark.
+
+    Returns a list of Comparisons sorted by name.  The status of each is
+    'slower' if the current run is more than *threshold* (relative) slower
+    than the baseline, 'faster' if it is faster by the same margin, 'same'
+    otherwise, or 'added', 'removed' or 'skipped' if the benchmark did not
+    run in both.
+    """
+    old = baseline['benchmarks']
+    new = current['benchmarks']
+    comparisons = []
+    for name in sorted(set(old) | set(new)):
+        if name not in old:
+            comparisons.append(Comparison(name, None, new[name].get('min'),
+                                          None, 'added'))
+        elif name not in new:
+            comparisons.append(Comparison(name, old[name].get('min'), None,
+                                          None, 'removed'))
+        elif 'skipped' in old[name] or 'skipped' in new[name]:
+            comparisons.append(Comparison(name, old[name].get('min'),
+                                          new[name].get('min'), None,
+                                          'skipped'))
+        else:
+            before = old[name]['min']
+            after = new[name]['min']
+            ratio = after / before if before > 0 else float('inf')
+            if ratio > 1 + threshold:
+                status = 'slower'
+            elif ratio < 1 / (1 + threshold):
+                status = 'faster'
+            else:
+                status = 'same'
+            comparisons.append(Comparison(name, before, after, ratio, status))
+    return comparisons
+
+
+def format_comparisons(comparisons):
+    """ Returns a table of Comparisons as a string.
+    """
+    lines = ["%-40s %12s %12s %8s  %s" % ("benchmark", "baseline", "current",
+                                          "ratio", "")]
+    for comparison in comparisons:
+        lines.append("%-40s %12s %12s %8s  %s" % (
+            comparison.name,
+            format_time(comparison.baseline),
+            format_time(comparison.current),
+            "" if comparison.ratio is None else "%.2f" % comparison.ratio,
+            comparison.status if comparison.status != 'same' else ""))
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def format_time(seconds):
+    """ Formats a duration with a unit suited to its size.
+    """
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "%.3g %s" % (seconds / scale, unit)
+    return "%.3g ns" % (seconds / 1e-9)
+
+
+def _statistics(times):
+    """ Returns the min, median, mean and standard deviation of *times*.
+    """
+    ordered = sorted(times)
+    count = len(ordered)
+    middle = count // 2
+    if count % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+    mean = sum(ordered) / count
+    stdev = (sum((t - mean)**2 for t in ordered) / count) ** 0.5
+    return {'min': ordered[0], 'median': median, 'mean': mean,
+            'stdev': stdev}
+
+
+def _metadata(warmup, repeat):
+    """ Returns a description of the machine and the software the
+    benchmarks ran with.
+    """
+    import numpy
+    import enable
+
+    return {
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': numpy.__version__,
+        'enable': enable.__version__,
+        'warmup': warmup,
+        'repeat': repeat,
+    }
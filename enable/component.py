@@ -5,12 +5,13 @@ from __future__ import with_statement
 # Enthought library imports
 from traits.api \
     import Any, Bool, Delegate, Enum, Float, Instance, Int, List, \
-           Property, Str, Trait
+           Property, Str, Trait, on_trait_change
 from kiva.constants import FILL, STROKE
 
 # Local relative imports
 from colors import black_color_trait, white_color_trait
 from coordinate_box import CoordinateBox
+import draw_profiler
 from enable_traits import bounds_trait, coordinate_trait, LineStyle
 from interactor import Interactor
 
@@ -346,6 +347,14 @@ class Component(CoordinateBox, Interactor):
         """
         pass
 
+    def _layout_invalidated(self):
+        """ Called whenever the layout of the component becomes invalid.
+        Tells the container of the component.
+        """
+        if self.container is not None:
+            self.container._component_layout_invalidated(self)
+        return
+
     def _draw_component(self, gc, view_bounds=None, mode="normal"):
         """ Renders the component.
 
@@ -418,7 +427,12 @@ class Component(CoordinateBox, Interactor):
         if self.layout_needed:
             self.do_layout()
 
-        self._draw(gc, view_bounds, mode)
+        profiler = draw_profiler.active
+        if profiler is None:
+            self._draw(gc, view_bounds, mode)
+        else:
+            profiler.call(self, "draw", "draw", self._draw, gc, view_bounds,
+                          mode)
         return
 
     def draw_select_box(self, gc, position, bounds, width, dash,
@@ -636,14 +650,27 @@ class Component(CoordinateBox, Interactor):
         if self.layout_needed or force:
             if size is not None:
                 self.bounds = size
-            self._do_layout()
+            profiler = draw_profiler.active
+            if profiler is None:
+                self._do_layout()
+            else:
+                profiler.call(self, "layout", "layout", self._do_layout)
             self._layout_needed = False
-        for underlay in self.underlays:
-            if underlay.visible or underlay.invisible_layout:
-                underlay.do_layout()
-        for overlay in self.overlays:
-            if overlay.visible or overlay.invisible_layout:
-                overlay.do_layout()
+        self._layout_overlays()
+        return
+
+    def invalidate_layout(self):
+        """ Marks the component as needing layout.
+
+        The containers of the component are told that it needs layout, so
+        that a do_layout() on any of them reaches it without visiting the
+        components that do not need layout.
+        """
+        if self._layout_needed:
+            self._layout_invalidated()
+        else:
+            # The trait handler tells our containers
+            self._layout_needed = True
         return
 
     def get_preferred_size(self):
@@ -670,6 +697,18 @@ class Component(CoordinateBox, Interactor):
     # Protected methods
     #------------------------------------------------------------------------
 
+    def _layout_overlays(self):
+        """ Lays out the underlays and overlays.  They are always called,
+        because they may lay themselves out against this component.
+        """
+        for underlay in self.underlays:
+            if underlay.visible or underlay.invisible_layout:
+                underlay.do_layout()
+        for overlay in self.overlays:
+            if overlay.visible or overlay.invisible_layout:
+                overlay.do_layout()
+        return
+
     def _set_padding_traits(self, padding, padding_traits):
         """ Set the bulk padding trait and all of the others in the correct
         order.
@@ -730,39 +769,8 @@ class Component(CoordinateBox, Interactor):
                 width, height = self.bounds
 
             if not self.draw_valid:
-                # get a reference to the GraphicsContext class from the object
-                GraphicsContext = gc.__class__
-                if hasattr(GraphicsContext, 'create_from_gc'):
-                    # For some backends, such as the mac, a much more efficient
-                    # backbuffer can be created from the window gc.
-                    bb = GraphicsContext.create_from_gc(gc, (int(width), int(height)))
-                else:
-                    bb = GraphicsContext((int(width), int(height)))
-
-                # if not fill_padding, then we have to fill the backbuffer
-                # with the window color. This is the only way I've found that
-                # it works- perhaps if we had better blend support we could set
-                # the alpha to 0, but for now doing so causes the backbuffer's
-                # background to be white
-                if not self.fill_padding:
-                    with bb:
-                        bb.set_antialias(False)
-                        bb.set_fill_color(self.window.bgcolor_)
-                        bb.draw_rect((x, y, width, height), FILL)
-
-                # Fixme: should there be a +1 here?
-                bb.translate_ctm(-x+0.5, -y+0.5)
-                # There are a couple of strategies we could use here, but we
-                # have to do something about view_bounds.  This is because
-                # if we only partially render the object into the backbuffer,
-                # we will have problems if we then render with different view
-                # bounds.
-
-                for layer in self.draw_order:
-                    if layer != "overlay":
-                        self._dispatch_draw(layer, bb, view_bounds, mode)
-
-                self._backbuffer = bb
+                self._update_backbuffer(gc, (x, y, width, height),
+                                        view_bounds, mode)
                 self.draw_valid = True
 
             # Blit the backbuffer and then draw the overlay on top
@@ -774,6 +782,47 @@ class Component(CoordinateBox, Interactor):
 
         return
 
+    def _update_backbuffer(self, gc, rect, view_bounds, mode):
+        """ Renders all layers except the overlay into a new backbuffer
+        covering *rect*, an (x, y, width, height) region in the coordinate
+        system of this component's container.
+        """
+        x, y, width, height = rect
+        # get a reference to the GraphicsContext class from the object
+        GraphicsContext = gc.__class__
+        if hasattr(GraphicsContext, 'create_from_gc'):
+            # For some backends, such as the mac, a much more efficient
+            # backbuffer can be created from the window gc.
+            bb = GraphicsContext.create_from_gc(gc, (int(width), int(height)))
+        else:
+            bb = GraphicsContext((int(width), int(height)))
+
+        # if not fill_padding, then we have to fill the backbuffer
+        # with the window color. This is the only way I've found that
+        # it works- perhaps if we had better blend support we could set
+        # the alpha to 0, but for now doing so causes the backbuffer's
+        # background to be white
+        if not self.fill_padding:
+            with bb:
+                bb.set_antialias(False)
+                bb.set_fill_color(self.window.bgcolor_)
+                bb.draw_rect((x, y, width, height), FILL)
+
+        # Fixme: should there be a +1 here?
+        bb.translate_ctm(-x+0.5, -y+0.5)
+        # There are a couple of strategies we could use here, but we
+        # have to do something about view_bounds.  This is because
+        # if we only partially render the object into the backbuffer,
+        # we will have problems if we then render with different view
+        # bounds.
+
+        for layer in self.draw_order:
+            if layer != "overlay":
+                self._dispatch_draw(layer, bb, view_bounds, mode)
+
+        self._backbuffer = bb
+        return
+
     def _dispatch_draw(self, layer, gc, view_bounds, mode):
         """ Renders the named *layer* of this component.
 
@@ -790,7 +839,12 @@ class Component(CoordinateBox, Interactor):
 
         handler = getattr(self, "_draw_" + layer, None)
         if handler:
-            handler(gc, view_bounds, mode)
+            profiler = draw_profiler.active
+            if profiler is None:
+                handler(gc, view_bounds, mode)
+            else:
+                profiler.call(self, layer, "layer", handler, gc, view_bounds,
+                              mode)
         return
 
     def _draw_border(self, gc, view_bounds=None, mode="default",
@@ -910,9 +964,15 @@ class Component(CoordinateBox, Interactor):
         # This hasattr check is necessary to ensure compatibility with Chaco
         # components.
         if not getattr(self, "use_draw_order", True):
-            self._old_dispatch(event, suffix)
+            dispatch = self._old_dispatch
+        else:
+            dispatch = self._new_dispatch
+
+        profiler = draw_profiler.active
+        if profiler is None:
+            dispatch(event, suffix)
         else:
-            self._new_dispatch(event, suffix)
+            profiler.call(self, suffix, "dispatch", dispatch, event, suffix)
         return
 
 
@@ -1102,6 +1162,8 @@ class Component(CoordinateBox, Interactor):
         # caller who changed our .container should take care of that.
         if new is None:
             self.position = [0,0]
+        elif self.layout_needed:
+            new._component_layout_invalidated(self)
 
     def _position_changed(self, *args):
         if self.container is not None:
@@ -1114,6 +1176,18 @@ class Component(CoordinateBox, Interactor):
     def _visible_changed(self, old, new):
         if new:
             self._layout_needed = True
+        if self.container is not None:
+            self.container._component_layout_invalidated(self)
+
+    def __layout_needed_changed(self, new):
+        if new:
+            self._layout_invalidated()
+
+    @on_trait_change('fixed_preferred_size, resizable, padding_left, '
+                     'padding_right, padding_top, padding_bottom')
+    def _preferred_size_inputs_changed(self):
+        # Our container may size itself from our preferred size
+        self.invalidate_layout()
 
     def _get_window(self):
         if self._window is not None:
@@ -4,17 +4,22 @@ from __future__ import with_statement
 
 # Major library imports
 import warnings
+from numpy import array, float64
 
 # Enthought library imports
 from kiva import affine
-from traits.api import Any, Bool, Enum, HasTraits, Instance, List, \
-        Property, Tuple
+from kiva.constants import FILL
+from kiva.hit_test import PathHitTester
+from traits.api import Any, Bool, Enum, Float, HasTraits, Instance, List, \
+        Property, Tuple, on_trait_change
 
 # Local, relative imports
-from base import empty_rectangle, intersect_bounds
+from base import consolidate_bounds, empty_rectangle, intersect_bounds
 from component import Component
+import draw_profiler
 from events import BlobEvent, BlobFrameEvent, DragEvent, MouseEvent
 from abstract_layout_controller import AbstractLayoutController
+from spatial_index import GridSpatialIndex
 
 
 class AbstractResolver(HasTraits):
@@ -104,6 +109,26 @@ class Container(Component):
     # under the component layers of the same name.
     container_under_layers = Tuple("background", "image", "underlay", "mainlayer")
 
+    # Whether to keep a spatial index of the components, so that hit-testing
+    # (components_at()) and view culling while drawing only look at the
+    # components near the point or region of interest instead of all of them.
+    # This is worthwhile for containers with thousands of children.
+    #
+    # The index is kept up to date when components are added, removed, moved
+    # or resized.  Changes to a component's padding or border that do not go
+    # through its position or bounds are not tracked.
+    use_spatial_index = Bool(False)
+
+    # The size of the square cells of the spatial index, in the container's
+    # coordinate space.  This should be roughly the size of a typical
+    # component.
+    spatial_index_cell_size = Float(200.0)
+
+    # When **use_backbuffer** is True, should damage reported by children
+    # only repaint the damaged regions of the backbuffer?  If False, any
+    # change to a child re-renders the whole backbuffer.
+    incremental_backbuffer = Bool(True)
+
     #------------------------------------------------------------------------
     # DOM-related traits
     # (Note: These are unused as of 8/13/2007)
@@ -134,6 +159,40 @@ class Container(Component):
     # Used by the resolver to cache previous lookups
     _lookup_cache = Any
 
+    # The GridSpatialIndex of our components, if **use_spatial_index** is True
+    _spatial_index = Any
+
+    # Maps each component to its position in self._components, for sorting the
+    # results of spatial index queries.  Reset to None whenever the list of
+    # components changes.
+    _component_order = Any
+
+    # The regions of the backbuffer that need to be repainted, in the
+    # coordinate system of our container, or None if the whole backbuffer
+    # must be rebuilt.
+    _backbuffer_damage = Any
+
+    # The (x, y, width, height) area covered by the current backbuffer
+    _backbuffer_rect = Any
+
+    # The components whose layout has been invalidated since our last layout,
+    # directly or because one of the components inside them needs layout
+    _invalid_components = Instance(set, ())
+
+    # Is the container in the middle of laying itself out?
+    _laying_out = Bool(False)
+
+    # The size returned by get_preferred_size(), if the container computes it
+    # from the sizes of its components, and whether it is still valid
+    _cached_preferred_size = Any
+    _preferred_size_valid = Bool(False)
+
+    # Whether the positions and sizes that the container gives its components
+    # depend on the sizes of the components, so that the container has to be
+    # laid out again whenever one of them changes.  This is a class-level
+    # attribute.
+    _layout_follows_components = False
+
     # This container can render itself in a different mode than what it asks of
     # its contained components.  This attribute stores the rendering mode that
     # this container requests of its children when it does a _draw(). If the
@@ -177,6 +236,7 @@ class Container(Component):
             if component in self._components:
                 component.container = None
                 self._components.remove(component)
+                self._invalid_components.discard(component)
             else:
                 raise RuntimeError, "Unable to remove component from container."
 
@@ -198,6 +258,44 @@ class Container(Component):
 
         self.invalidate_draw()
 
+    def do_layout(self, size=None, force=False, component=None):
+        """ Lays out the container if it needs layout, and then each of its
+        components whose layout has been invalidated since the last layout.
+        The other components are not visited.
+
+        A container which is also an overlay is given the **component** it
+        overlays, which is passed on to _do_layout().
+
+        Overrides Component.
+        """
+        self._laying_out = True
+        try:
+            if self._layout_needed or force:
+                if size is not None:
+                    self.bounds = size
+                if component is None:
+                    layout = self._do_layout
+                else:
+                    layout = lambda: self._do_layout(component)
+                profiler = draw_profiler.active
+                if profiler is None:
+                    layout()
+                else:
+                    profiler.call(self, "layout", "layout", layout)
+                self._layout_needed = False
+            invalid = self._invalid_components
+            if invalid:
+                self._invalid_components = set()
+                for component in invalid:
+                    if component.container is self and \
+                            self._should_layout(component) and \
+                            component.layout_needed:
+                        component.do_layout()
+        finally:
+            self._laying_out = False
+        self._layout_overlays()
+        return
+
     def components_at(self, x, y):
         """
         Returns a list of the components underneath the given point (given in
@@ -207,11 +305,42 @@ class Container(Component):
         if self.is_in(x,y):
             xprime = x - self.position[0]
             yprime = y - self.position[1]
-            for component in self._components[::-1]:
+            if self._spatial_index is not None:
+                candidates = self._sorted_by_order(
+                    self._spatial_index.query_point(xprime, yprime))
+            else:
+                candidates = self._components
+            for component in candidates[::-1]:
                 if component.is_in(xprime, yprime):
                     result.append(component)
         return result
 
+    def components_in_polygon(self, polygon, use_winding=False):
+        """ Returns a list of the visible components whose centers fall inside
+        the polygon (an Nx2 sequence of points given in the parent coordinate
+        frame of this container), e.g. for lasso selection.
+
+        All the centers are tested against the polygon at once.
+        """
+        polygon = array(polygon, float64).reshape(-1, 2) - self.position
+        tester = PathHitTester(polygon, use_winding=use_winding)
+        if tester.bounds is None:
+            return []
+        if self._spatial_index is not None:
+            xmin, ymin, xmax, ymax = tester.bounds
+            candidates = self._sorted_by_order(self._spatial_index.query_bounds(
+                (xmin, ymin, xmax - xmin, ymax - ymin)))
+        else:
+            candidates = self._components
+        candidates = [c for c in candidates if c.visible]
+        if not candidates:
+            return []
+        centers = array([(c.outer_x + c.outer_width / 2.0,
+                          c.outer_y + c.outer_height / 2.0)
+                         for c in candidates])
+        inside = tester.contains(centers)
+        return [c for c, hit in zip(candidates, inside) if hit]
+
     def raise_component(self, component):
         """ Raises the indicated component to the top of the Z-order """
         c = self._components
@@ -231,6 +360,32 @@ class Container(Component):
         # TODO: cache requests
         return self.resolver.query(self._components, kw)
 
+    def invalidate_draw(self, damaged_regions=None, self_relative=False):
+        """ Invalidates the backbuffer and notifies our parents and viewports
+        of any damaged regions.
+
+        If **incremental_backbuffer** is True and specific regions are
+        damaged, only those regions of the backbuffer are repainted on the
+        next draw.
+        """
+        if self.use_backbuffer and self.incremental_backbuffer and \
+                damaged_regions is not None:
+            if self_relative:
+                regions = [[region[0] + self.x, region[1] + self.y,
+                            region[2], region[3]]
+                           for region in damaged_regions]
+            else:
+                regions = [list(region) for region in damaged_regions]
+            if self.draw_valid:
+                self._backbuffer_damage = regions
+            elif self._backbuffer_damage is not None:
+                self._backbuffer_damage.extend(regions)
+        else:
+            self._backbuffer_damage = None
+        super(Container, self).invalidate_draw(damaged_regions=damaged_regions,
+                                               self_relative=self_relative)
+        return
+
     def cleanup(self, window):
         """When a window viewing or containing a component is destroyed,
         cleanup is called on the component to give it the opportunity to
@@ -256,6 +411,8 @@ class Container(Component):
             for component in self._components:
                 component.set(position = [component.x-ll_x, component.y-ll_y],
                               trait_change_notify = False)
+            if (ll_x, ll_y) != (0, 0):
+                self._rebuild_spatial_index()
 
             # Change our position (in our parent's coordinate frame) and
             # update our bounds
@@ -297,6 +454,17 @@ class Container(Component):
     def _dispatch_draw(self, layer, gc, view_bounds, mode):
         """ Renders the named *layer* of this component.
         """
+        profiler = draw_profiler.active
+        if profiler is None:
+            self._dispatch_draw_children(layer, gc, view_bounds, mode)
+        else:
+            profiler.call(self, layer, "layer", self._dispatch_draw_children,
+                          layer, gc, view_bounds, mode)
+        return
+
+    def _dispatch_draw_children(self, layer, gc, view_bounds, mode):
+        """ Renders the named *layer* of this container and its components.
+        """
         new_bounds = self._transform_view_bounds(view_bounds)
         if new_bounds == empty_rectangle:
             return
@@ -325,6 +493,14 @@ class Container(Component):
                             component._draw(gc, new_bounds, mode)
                     else:
                         component._dispatch_draw(layer, gc, new_bounds, mode)
+                        if layer == "mainlayer":
+                            # Components drawn layer by layer never go
+                            # through _draw(), so record where they were
+                            # drawn for their next invalidate_draw().
+                            component.drawn_outer_position = \
+                                list(component.outer_position)
+                            component.drawn_outer_bounds = \
+                                list(component.outer_bounds)
 
         # The container's annotation and overlay layers draw over those of
         # its components.
@@ -338,6 +514,42 @@ class Container(Component):
 
         return
 
+    def _update_backbuffer(self, gc, rect, view_bounds, mode):
+        """ Repaints the damaged regions of the backbuffer, or renders a new
+        one if the whole container has been invalidated.
+        """
+        damage = self._backbuffer_damage
+        self._backbuffer_damage = None
+        if damage is None or self._backbuffer is None or \
+                list(rect) != self._backbuffer_rect:
+            super(Container, self)._update_backbuffer(gc, rect, view_bounds,
+                                                      mode)
+            self._backbuffer_rect = list(rect)
+            return
+
+        bb = self._backbuffer
+        if self.fill_padding:
+            # New backbuffers start out white
+            blank = (1.0, 1.0, 1.0, 1.0)
+        else:
+            blank = self.window.bgcolor_
+        for rx, ry, rw, rh in consolidate_bounds(damage):
+            # Grow each region by a pixel to pick up antialiased edges
+            region = intersect_bounds((rx - 1, ry - 1, rw + 2, rh + 2), rect)
+            if region == empty_rectangle:
+                continue
+            # The backbuffer keeps the translation it was created with
+            with bb:
+                bb.clip_to_rect(*region)
+                with bb:
+                    bb.set_antialias(False)
+                    bb.set_fill_color(blank)
+                    bb.draw_rect(region, FILL)
+                for layer in self.draw_order:
+                    if layer != "overlay":
+                        self._dispatch_draw(layer, bb, region, mode)
+        return
+
     def _draw_container(self, gc, mode="default"):
         "Draw the container background in a specified graphics context"
         pass
@@ -359,8 +571,14 @@ class Container(Component):
         if bounds is None:
             return [c for c in self.components if c.visible]
 
+        if self._spatial_index is not None:
+            candidates = self._sorted_by_order(
+                self._spatial_index.query_bounds(bounds))
+        else:
+            candidates = self.components
+
         visible_components = []
-        for component in self.components:
+        for component in candidates:
             if not component.visible:
                 continue
             tmp = intersect_bounds(component.outer_position +
@@ -418,16 +636,70 @@ class Container(Component):
 
     def _component_bounds_changed(self, component):
         "Called by contained objects when their bounds change"
+        self._update_spatial_index(component)
+        self._component_layout_invalidated(component)
         # For now, just punt and call compact()
         if self.auto_size:
             self.compact()
 
     def _component_position_changed(self, component):
         "Called by contained objects when their position changes"
+        self._update_spatial_index(component)
         # For now, just punt and call compact()
         if self.auto_size:
             self.compact()
 
+    def _component_layout_invalidated(self, component):
+        """ Called when a contained component needs layout, or has changed its
+        size or visibility.  Marks the component, this container and all of
+        its containers as needing layout.
+        """
+        if self._laying_out:
+            # We lay out the components we resize ourselves
+            return
+        self._invalid_components.add(component)
+        if self._layout_follows_components and not self._layout_needed:
+            self._layout_needed = True
+        else:
+            self._layout_invalidated()
+        return
+
+    def _layout_invalidated(self):
+        self._preferred_size_valid = False
+        super(Container, self)._layout_invalidated()
+        return
+
+    def _update_spatial_index(self, component):
+        """ Refreshes the location of a component in the spatial index. """
+        index = self._spatial_index
+        if index is not None and component in index:
+            index.update(component, component.outer_position +
+                                    component.outer_bounds)
+
+    def _rebuild_spatial_index(self):
+        """ Recreates the spatial index from scratch (or discards it, if
+        **use_spatial_index** is False).
+        """
+        self._component_order = None
+        if not self.use_spatial_index:
+            self._spatial_index = None
+            return
+        index = GridSpatialIndex(self.spatial_index_cell_size)
+        for component in self._components:
+            index.insert(component, component.outer_position +
+                                    component.outer_bounds)
+        self._spatial_index = index
+
+    def _sorted_by_order(self, components):
+        """ Returns a list of the given components, in the order in which
+        they appear in self._components (i.e. bottom to top).
+        """
+        order = self._component_order
+        if order is None:
+            order = dict((c, i) for i, c in enumerate(self._components))
+            self._component_order = order
+        return sorted(components, key=order.__getitem__)
+
     #------------------------------------------------------------------------
     # Deprecated interface
     #------------------------------------------------------------------------
@@ -449,22 +721,16 @@ class Container(Component):
 
     def _get_layout_needed(self):
         # Override the parent implementation to take into account whether any
-        # of our contained components need layout.
-        if self._layout_needed:
-            return True
-        else:
-            for c in self.components:
-                if c.layout_needed:
-                    return True
-            else:
-                return False
+        # of our contained components need layout.  They tell us when they do,
+        # so this does not have to look at all of them.
+        return self._layout_needed or len(self._invalid_components) > 0
 
     #------------------------------------------------------------------------
     # Interactor interface
     #------------------------------------------------------------------------
 
     def normal_mouse_leave(self, event):
-        event.push_transform(self.get_event_transform(event), caller=self)
+        self._push_event_transform(event)
         for component in self._prev_event_handlers:
             component.dispatch(event, "mouse_leave")
         self._prev_event_handlers = set()
@@ -483,6 +749,18 @@ class Container(Component):
     def get_event_transform(self, event=None, suffix=""):
         return affine.affine_from_translation(-self.x, -self.y)
 
+    def _push_event_transform(self, event, suffix=""):
+        """ Pushes get_event_transform() onto **event**.  The default
+        transform is a plain translation, so it is pushed without building a
+        matrix unless a subclass overrides get_event_transform().
+        """
+        if self.get_event_transform.im_func is _container_get_event_transform:
+            event.push_translation(-self.x, -self.y, caller=self)
+        else:
+            event.push_transform(self.get_event_transform(event, suffix),
+                                 caller=self)
+        return
+
     def _dispatch_stateful_event(self, event, suffix):
         """
         Dispatches a mouse event based on the current event_state.  Overrides
@@ -503,8 +781,7 @@ class Container(Component):
             components = self.components_at(event.x, event.y)
 
             # Translate the event's location to be relative to this container
-            event.push_transform(self.get_event_transform(event, suffix),
-                                 caller=self)
+            self._push_event_transform(event, suffix)
 
             try:
                 new_component_set = set(components)
@@ -621,17 +898,46 @@ class Container(Component):
         self._layout_needed = True
         self.invalidate_draw()
 
+    @on_trait_change('fit_components, default_size')
+    def _container_size_inputs_changed(self):
+        self.invalidate_layout()
+
     def _bgcolor_changed(self):
         self.invalidate_draw()
         self.request_redraw()
 
     def __components_items_changed(self, event):
         self._layout_needed = True
-
-    def __components_changed(self, event):
+        self._component_order = None
+        index = self._spatial_index
+        if index is not None:
+            for component in event.removed:
+                index.remove(component)
+            for component in event.added:
+                index.insert(component, component.outer_position +
+                                        component.outer_bounds)
+
+    def __components_changed(self, old, new):
         self._layout_needed = True
+        self._component_order = None
+        index = self._spatial_index
+        if index is not None:
+            old_set = set(old)
+            new_set = set(new)
+            for component in old_set - new_set:
+                index.remove(component)
+            for component in new_set - old_set:
+                index.insert(component, component.outer_position +
+                                        component.outer_bounds)
         self.invalidate_draw()
 
+    def _use_spatial_index_changed(self):
+        self._rebuild_spatial_index()
+
+    def _spatial_index_cell_size_changed(self):
+        if self.use_spatial_index:
+            self._rebuild_spatial_index()
+
     #-------------------------------------------------------------------------
     # Old / deprecated draw methods; here for backwards compatibility
     #-------------------------------------------------------------------------
@@ -658,10 +964,16 @@ class Container(Component):
         if new_bounds == empty_rectangle:
             return
 
+        if new_bounds and self._spatial_index is not None:
+            components = self._sorted_by_order(
+                self._spatial_index.query_bounds(new_bounds))
+        else:
+            components = self.components
+
         with gc:
             gc.set_antialias(False)
             gc.translate_ctm(*self.position)
-            for component in self.components:
+            for component in components:
                 if new_bounds:
                     tmp = intersect_bounds(component.outer_position +
                                            component.outer_bounds, new_bounds)
@@ -670,3 +982,8 @@ class Container(Component):
                 with gc:
                     component.draw(gc, new_bounds, mode)
         return
+
+
+# Container._push_event_transform() checks for this to see whether
+# get_event_transform() has been overridden.
+_container_get_event_transform = Container.get_event_transform.im_func
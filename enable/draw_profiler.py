@@ -0,0 +1,216 @@
+""" Defines the DrawProfiler class, which records where the time of drawing,
+layout and event dispatch goes, component by component.
+
+Profiling is opt-in.  While no profiler is started, the hooks in Component
+and Container only check the module's **active** attribute::
+
+    profiler = DrawProfiler()
+    profiler.start()
+    window.component.draw(gc)
+    profiler.stop()
+    print profiler.folded_stacks()
+
+Every time the outermost draw(), do_layout() or dispatch() returns, the tree
+of spans it recorded is kept as a frame.  Frames can be exported as JSON, or
+as folded stacks ("a;b;c 123" lines) for flame graph tools.
+"""
+
+import json
+from collections import deque
+from timeit import default_timer
+
+# The DrawProfiler that is recording, or None.
+active = None
+
+
+class ProfileSpan(object):
+    """ The time spent in one call to draw, lay out or dispatch an event to a
+    component, and the spans of the calls made from it.
+    """
+
+    __slots__ = ('label', 'name', 'category', 'start', 'duration', 'children')
+
+    def __init__(self, label, name, category, start):
+        # The label of the component, see DrawProfiler.label_for()
+        self.label = label
+
+        # The name of the layer drawn or of the event dispatched, or "draw"
+        # or "layout"
+        self.name = name
+
+        # One of "draw", "layer", "layout" or "dispatch"
+        self.category = category
+
+        # The clock time the span started at, and its duration, in seconds
+        self.start = start
+        self.duration = 0.0
+
+        self.children = []
+
+    @property
+    def self_time(self):
+        """ The time spent in this span but not in any of its children. """
+        return self.duration - sum(child.duration for child in self.children)
+
+    def walk(self, stack=()):
+        """ Yields (stack, span) for this span and each of its descendants,
+        where stack is the tuple of spans from the root to the span.
+        """
+        stack = stack + (self,)
+        yield stack, self
+        for child in self.children:
+            for item in child.walk(stack):
+                yield item
+
+    def to_dict(self):
+        """ Returns the tree of spans as nested dictionaries.
+        """
+        return {
+            'component': self.label,
+            'name': self.name,
+            'category': self.category,
+            'start': self.start,
+            'duration': self.duration,
+            'self_time': self.self_time,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class DrawProfiler(object):
+    """ Records the time spent drawing, laying out and dispatching events to
+    each component, for the last **max_frames** frames.
+    """
+
+    def __init__(self, max_frames=100, clock=default_timer):
+        # The completed frames, oldest first.  Each is a root ProfileSpan.
+        self.frames = deque(maxlen=max_frames)
+
+        # The function which returns the current time in seconds
+        self.clock = clock
+
+        # The spans which have started but not yet ended, outermost first
+        self._stack = []
+
+    #------------------------------------------------------------------------
+    # Recording
+    #------------------------------------------------------------------------
+
+    def start(self):
+        """ Makes this the active profiler, replacing any other.
+        """
+        global active
+        active = self
+
+    def stop(self):
+        """ Stops recording, if this is the active profiler.
+        """
+        global active
+        if active is self:
+            active = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def clear(self):
+        """ Discards the recorded frames.
+        """
+        self.frames.clear()
+
+    def begin(self, component, name, category):
+        """ Starts a span for *component*.  Every begin() must be matched by
+        an end().
+        """
+        span = ProfileSpan(self.label_for(component), name, category,
+                           self.clock())
+        if self._stack:
+            self._stack[-1].children.append(span)
+        self._stack.append(span)
+
+    def end(self):
+        """ Ends the innermost span.  If it was the outermost one, its tree is
+        kept as a frame.
+        """
+        span = self._stack.pop()
+        span.duration = self.clock() - span.start
+        if not self._stack:
+            self.frames.append(span)
+
+    def call(self, component, name, category, func, *args):
+        """ Calls func(*args) within a span for *component*, and returns its
+        result.
+        """
+        self.begin(component, name, category)
+        try:
+            return func(*args)
+        finally:
+            self.end()
+
+    def label_for(self, component):
+        """ Returns the label that identifies *component* in the spans: its
+        class name, and its **id** if it has one, otherwise its address.
+        """
+        component_id = getattr(component, 'id', '')
+        if component_id:
+            return "%s#%s" % (type(component).__name__, component_id)
+        return "%s@%x" % (type(component).__name__, id(component))
+
+    #------------------------------------------------------------------------
+    # Reporting
+    #------------------------------------------------------------------------
+
+    def last_frame(self, category="draw"):
+        """ Returns the most recent frame of the given category, or None.
+        """
+        for frame in reversed(self.frames):
+            if frame.category == category:
+                return frame
+        return None
+
+    def slowest(self, count=10, frame=None):
+        """ Returns the *count* components which took the most time in
+        *frame* (by default, the last draw frame), as a list of
+        (label, seconds) pairs, slowest first.
+
+        The time of a component is the self time of all of its spans, so the
+        time of a container does not include that of its components.
+        """
+        if frame is None:
+            frame = self.last_frame()
+        if frame is None:
+            return []
+        totals = {}
+        for stack, span in frame.walk():
+            totals[span.label] = totals.get(span.label, 0.0) + span.self_time
+        ranked = sorted(totals.items(), key=lambda item: -item[1])
+        return ranked[:count]
+
+    def to_json(self, frames=None, **kw):
+        """ Returns the frames (by default, all of those recorded) as a JSON
+        list of trees.  Keyword arguments are passed to json.dumps().
+        """
+        if frames is None:
+            frames = self.frames
+        return json.dumps([frame.to_dict() for frame in frames], **kw)
+
+    def folded_stacks(self, frames=None):
+        """ Returns the frames (by default, all of those recorded) in the
+        folded stack format read by flame graph tools: one line per distinct
+        stack, with the total self time of the stack in microseconds.
+        """
+        if frames is None:
+            frames = self.frames
+        totals = {}
+        order = []
+        for frame in frames:
+            for stack, span in frame.walk():
+                key = ";".join("%s:%s" % (s.label, s.name) for s in stack)
+                if key not in totals:
+                    totals[key] = 0.0
+                    order.append(key)
+                totals[key] += span.self_time
+        return "\n".join("%s %d" % (key, round(totals[key] * 1e6))
+                         for key in order)
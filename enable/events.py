@@ -9,8 +9,28 @@ from numpy import array, dot
 
 # Enthought imports
 from kiva import affine
-from traits.api import (Any, Bool, Float, HasTraits, Int,
-    Event, List, ReadOnly)
+from traits.api import (Any, Bool, Float, HasTraits, Instance, Int,
+    Event, ReadOnly)
+
+
+def _affine_params(transform):
+    """ Returns the (a, b, c, d, tx, ty) values of a kiva affine transform as
+    a tuple of Python floats.
+    """
+    if hasattr(transform, "tolist"):
+        transform = transform.tolist()
+    (a, b, _), (c, d, _), (tx, ty, _) = transform
+    return (a, b, c, d, tx, ty)
+
+def _concat(m1, m2):
+    """ Returns the affine params of dot(m1, m2) for two (a, b, c, d, tx, ty)
+    tuples.
+    """
+    a1, b1, c1, d1, tx1, ty1 = m1
+    a2, b2, c2, d2, tx2, ty2 = m2
+    return (a1*a2 + b1*c2, a1*b2 + b1*d2,
+            c1*a2 + d1*c2, c1*b2 + d1*d2,
+            tx1*a2 + ty1*c2 + tx2, tx1*b2 + ty1*d2 + ty2)
 
 
 class BasicEvent(HasTraits):
@@ -25,29 +45,40 @@ class BasicEvent(HasTraits):
     # Can be None.
     window = Any
 
-    # (x,y) position stack; initialized to an empty list
-    _pos_stack = List( () )
-
-    # Affine transform stack; initialized to an empty list
-    _transform_stack = List( () )
+    # Stack of (x, y, params) tuples, one per pushed transform, where (x, y)
+    # is the position before the transform and params is the transform's
+    # (a, b, c, d, tx, ty).  This is pushed and popped by every container an
+    # event passes through, so it is a plain list of tuples rather than a
+    # List of matrices.
+    _transform_stack = Instance(list, ())
 
     # This is a list of objects that have transformed the event's
     # coordinates.  This can be used to recreate the dispatch path
     # that the event took.
-    dispatch_history = List()
+    dispatch_history = Instance(list, ())
 
     def push_transform(self, transform, caller=None):
         """
         Saves the current transform in a stack and sets the given transform
         to be the active one.
         """
-        x, y = dot(array((self.x, self.y, 1)), transform)[:2]
-        self._pos_stack.append((self.x, self.y))
-        self._transform_stack.append(transform)
-        self.x = x
-        self.y = y
-        if caller is not None:
-            self.dispatch_history.append(caller)
+        self._push_params(_affine_params(transform), caller)
+        return
+
+    def push_translation(self, dx, dy, caller=None):
+        """
+        Equivalent to push_transform(affine.affine_from_translation(dx, dy)),
+        but without building a matrix.
+        """
+        self._push_params((1.0, 0.0, 0.0, 1.0, dx, dy), caller)
+        return
+
+    def push_scale(self, sx, sy, caller=None):
+        """
+        Equivalent to push_transform(affine.affine_from_scale(sx, sy)), but
+        without building a matrix.
+        """
+        self._push_params((sx, 0.0, 0.0, sy, 0.0, 0.0), caller)
         return
 
     def pop(self, count=1, caller=None):
@@ -55,11 +86,10 @@ class BasicEvent(HasTraits):
         Restores a previous position of the event.  If **count** is provided,
         then pops **count** elements off of the event stack.
         """
+        stack = self._transform_stack
         for i in range(count-1):
-            self._pos_stack.pop()
-            self._transform_stack.pop()
-        self.x, self.y = self._pos_stack.pop()
-        self._transform_stack.pop()
+            stack.pop()
+        self.x, self.y, params = stack.pop()
         if caller is not None:
             if caller == self.dispatch_history[-1]:
                 self.dispatch_history.pop()
@@ -73,9 +103,7 @@ class BasicEvent(HasTraits):
         Basically, a component calls event.offset_xy(\*self.position) to shift
         the event into its own coordinate frame.
         """
-        self.push_transform(affine.affine_from_translation(-origin_x, -origin_y))
-        if caller is not None:
-            self.dispatch_history.append(caller)
+        self.push_translation(-origin_x, -origin_y, caller)
         return
 
     def scale_xy(self, scale_x, scale_y, caller=None):
@@ -89,9 +117,7 @@ class BasicEvent(HasTraits):
         # Note that the meaning of scale_x and scale_y for Enable
         # is the inverted from the meaning for Kiva.affine.
         # TODO: Fix this discrepancy.
-        self.push_transform(affine.affine_from_scale(1/scale_x, 1/scale_y))
-        if caller is not None:
-            self.dispatch_history.append(caller)
+        self.push_scale(1.0/scale_x, 1.0/scale_y, caller)
         return
 
     def net_transform(self):
@@ -100,10 +126,29 @@ class BasicEvent(HasTraits):
         the total amount of change from the original coordinates to the current
         offset coordinates stored in self.x and self.y.
         """
-        if len(self._transform_stack) == 0:
+        stack = self._transform_stack
+        if len(stack) == 0:
             return affine.affine_identity()
         else:
-            return reduce(dot, self._transform_stack[::-1])
+            # Same order as reduce(dot, transforms[::-1])
+            net = stack[-1][2]
+            for x, y, params in stack[-2::-1]:
+                net = _concat(net, params)
+            return affine.affine_from_values(*net)
+
+    def _push_params(self, params, caller):
+        """ Pushes a transform given as (a, b, c, d, tx, ty) and applies it to
+        the event's position.
+        """
+        a, b, c, d, tx, ty = params
+        x = self.x
+        y = self.y
+        self._transform_stack.append((x, y, params))
+        self.x = a*x + c*y + tx
+        self.y = b*x + d*y + ty
+        if caller is not None:
+            self.dispatch_history.append(caller)
+        return
 
     def current_pointer_position(self):
         """
@@ -190,22 +235,18 @@ class BlobEvent(BasicEvent):
     x0 = Float(0.0)
     y0 = Float(0.0)
 
-    def push_transform(self, transform, caller=None):
-        """ Saves the current transform in a stack and sets the given transform
-        to be the active one.
+    def _push_params(self, params, caller):
+        """ Pushes a transform given as (a, b, c, d, tx, ty) and applies it to
+        the event's position.
 
         This will also adjust x0 and y0.
         """
-        x, y = dot(array((self.x, self.y, 1)), transform)[:2]
-        self._pos_stack.append((self.x, self.y))
-        self._transform_stack.append(transform)
-        self.x = x
-        self.y = y
-        x0, y0 = dot(array((self.x0, self.y0, 1)), transform)[:2]
-        self.x0 = x0
-        self.y0 = y0
-        if caller is not None:
-            self.dispatch_history.append(caller)
+        super(BlobEvent, self)._push_params(params, caller)
+        a, b, c, d, tx, ty = params
+        x0 = self.x0
+        y0 = self.y0
+        self.x0 = a*x0 + c*y0 + tx
+        self.y0 = b*x0 + d*y0 + ty
 
     def __repr__(self):
         s = '%s(bid=%r, x=%r, y=%r, x0=%r, y0=%r, handled=%r)' % (self.__class__.__name__,
@@ -0,0 +1,338 @@
+""" Defines the ImagePyramid and PyramidImage classes, which draw very large
+images at any zoom level by drawing a tile at a time from a pyramid of
+downsampled copies.
+
+Level 0 of the pyramid is the image itself, and each level above it is half
+the width and height of the one below, down to a single tile.  A PyramidImage
+draws from the coarsest level which still has at least one pixel per device
+pixel, so a zoomed out Viewport does not resample the full resolution image,
+and it only draws the tiles which intersect its **view_bounds**::
+
+    pyramid = ImagePyramid(open_image("mosaic.tif"), cache_dir="mosaic.tiles")
+    viewport = Viewport(component=PyramidImage(pyramid=pyramid),
+                        enable_zoom=True)
+
+Tiles are built when they are first drawn: each one is averaged from the
+four tiles below it.  They are kept in an LRU cache, and if **cache_dir** is
+given, written to it as .npy files, which are memory mapped when they are
+needed again.  build() computes the whole pyramid up front.
+"""
+
+from __future__ import with_statement
+
+import json
+import math
+import os
+from collections import OrderedDict
+
+import numpy
+from numpy import empty, uint8, uint16
+
+# Enthought library imports
+from traits.api import Any, Enum
+
+# Local, relative imports
+from base import empty_rectangle, intersect_bounds
+from component import Component
+
+
+class ImagePyramid(object):
+    """ The tiles of an image, and of successively halved copies of it.
+    """
+
+    def __init__(self, source, tile_size=256, max_tiles=256, cache_dir=None):
+        from kiva.agg.image_source import ArraySource
+
+        # The kiva.agg.image_source.ImageSource of the full resolution
+        # pixels.  An array of pixels is wrapped in an ArraySource.
+        if isinstance(source, numpy.ndarray):
+            source = ArraySource(source)
+        self.source = source
+
+        # The width and height of the tiles, in pixels
+        self.tile_size = tile_size
+
+        # The number of tiles kept in memory
+        self.max_tiles = max_tiles
+
+        # The directory the tiles are saved in, or None to keep them only in
+        # memory.  It must only be used for this image.
+        self.cache_dir = cache_dir
+
+        # The (width, height) of each level, largest first
+        width, height = source.size
+        self.level_sizes = [(width, height)]
+        while width > tile_size or height > tile_size:
+            width, height = (width + 1) // 2, (height + 1) // 2
+            self.level_sizes.append((width, height))
+
+        self._tiles = OrderedDict()
+        if cache_dir is not None:
+            self._check_cache_dir()
+
+    @property
+    def levels(self):
+        """ The number of levels of the pyramid. """
+        return len(self.level_sizes)
+
+    @property
+    def pix_format(self):
+        """ The kiva.agg pixel format of the tiles. """
+        return self.source.pix_format
+
+    def level_for_scale(self, scale):
+        """ Returns the coarsest level which has at least one pixel per
+        device pixel, when the full resolution image is drawn at *scale*
+        device pixels per image pixel.
+        """
+        if scale <= 0:
+            return self.levels - 1
+        level = int(math.floor(math.log(1.0 / scale, 2)))
+        return max(0, min(self.levels - 1, level))
+
+    def visible_tiles(self, level, rect):
+        """ Returns the (column, row) of each tile of *level* which
+        intersects *rect*, a (x, y, width, height) rectangle in the pixels
+        of the level, with rows counted from the top.
+        """
+        width, height = self.level_sizes[level]
+        x, y, rect_width, rect_height = rect
+        x1, y1 = max(0, int(x)), max(0, int(y))
+        x2 = min(width, int(math.ceil(x + rect_width)))
+        y2 = min(height, int(math.ceil(y + rect_height)))
+        if x1 >= x2 or y1 >= y2:
+            return []
+        size = self.tile_size
+        return [(column, row)
+                for row in range((y1 // size), (y2 - 1) // size + 1)
+                for column in range((x1 // size), (x2 - 1) // size + 1)]
+
+    def tile(self, level, column, row):
+        """ Returns the pixels of a tile as a (height, width, depth) array,
+        building it if it is not cached.
+        """
+        key = (level, column, row)
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tile = self._load_tile(level, column, row)
+            if tile is None:
+                tile = self._build_tile(level, column, row)
+                self._save_tile(level, column, row, tile)
+            while len(self._tiles) >= self.max_tiles:
+                self._tiles.popitem(last=False)
+        self._tiles[key] = tile
+        return tile
+
+    def build(self):
+        """ Builds every tile of every level, so that later draws only load
+        them.  This is only useful with a **cache_dir**.
+        """
+        for level, (width, height) in enumerate(self.level_sizes):
+            for column, row in self.visible_tiles(level,
+                                                  (0, 0, width, height)):
+                self.tile(level, column, row)
+
+    def clear_cache(self):
+        """ Discards the tiles kept in memory.
+        """
+        self._tiles.clear()
+
+    #------------------------------------------------------------------------
+    # Private methods
+    #------------------------------------------------------------------------
+
+    def _build_tile(self, level, column, row):
+        """ Returns the pixels of a tile, read from the source for level 0,
+        and otherwise averaged from the (up to) four tiles below it.
+        """
+        size = self.tile_size
+        width, height = self.level_sizes[level]
+        x, y = column * size, row * size
+        tile_width, tile_height = min(size, width - x), min(size, height - y)
+        if level == 0:
+            return numpy.ascontiguousarray(
+                self.source.read(x, y, tile_width, tile_height))
+
+        # Assemble the region of the level below, padding odd edges by
+        # repeating the last row or column
+        below_width, below_height = self.level_sizes[level - 1]
+        region = None
+        for dy in (0, 1):
+            for dx in (0, 1):
+                child_column, child_row = 2 * column + dx, 2 * row + dy
+                if child_column * size >= below_width or \
+                        child_row * size >= below_height:
+                    continue
+                child = self.tile(level - 1, child_column, child_row)
+                if region is None:
+                    depth = child.shape[-1]
+                    region = empty((2 * tile_height, 2 * tile_width, depth),
+                                   uint8)
+                region[dy * size:dy * size + child.shape[0],
+                       dx * size:dx * size + child.shape[1]] = child
+        used_width = below_width - 2 * x
+        used_height = below_height - 2 * y
+        if used_width < 2 * tile_width:
+            region[:, used_width:] = region[:, used_width - 1:used_width]
+        if used_height < 2 * tile_height:
+            region[used_height:] = region[used_height - 1:used_height]
+
+        total = region.reshape(tile_height, 2, tile_width, 2, depth).astype(
+            uint16).sum(axis=3).sum(axis=1)
+        return ((total + 2) // 4).astype(uint8)
+
+    def _tile_path(self, level, column, row):
+        return os.path.join(self.cache_dir, str(level),
+                            "%d_%d.npy" % (column, row))
+
+    def _load_tile(self, level, column, row):
+        """ Returns a memory map of a tile saved in the cache directory, or
+        None.
+        """
+        if self.cache_dir is None:
+            return None
+        path = self._tile_path(level, column, row)
+        if not os.path.exists(path):
+            return None
+        return numpy.load(path, mmap_mode="c")
+
+    def _save_tile(self, level, column, row, tile):
+        """ Writes a tile to the cache directory, if there is one.
+        """
+        if self.cache_dir is None:
+            return
+        path = self._tile_path(level, column, row)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # Write to a temporary file first, so that a reader never sees a
+        # partial tile
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as fp:
+            numpy.save(fp, tile)
+        os.rename(temp_path, path)
+
+    def _check_cache_dir(self):
+        """ Creates the cache directory, or checks that the pyramid it holds
+        is of an image of the same size and format.
+        """
+        description = {"size": list(self.source.size),
+                       "pix_format": self.pix_format,
+                       "tile_size": self.tile_size}
+        path = os.path.join(self.cache_dir, "pyramid.json")
+        if os.path.exists(path):
+            with open(path) as fp:
+                cached = json.load(fp)
+            if cached != description:
+                raise ValueError("The tile cache %r holds a different image: "
+                                 "%r" % (self.cache_dir, cached))
+            return
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        with open(path, "w") as fp:
+            json.dump(description, fp)
+
+
+class PyramidImage(Component):
+    """ A component which draws the image of an ImagePyramid stretched over
+    its bounds, from the level which matches the scale of the graphics
+    context, and only the tiles which intersect the view bounds.
+
+    By default the bounds of the component are the size of the image.
+    """
+
+    # The ImagePyramid of the image
+    pyramid = Any
+
+    # The filter used when the tiles are drawn
+    interpolation = Enum("nearest", "bilinear", "bicubic",
+                         "spline16", "spline36", "sinc64", "sinc144",
+                         "sinc256", "blackman64", "blackman100",
+                         "blackman256")
+
+    def __init__(self, **traits):
+        super(PyramidImage, self).__init__(**traits)
+        if self.pyramid is not None and "bounds" not in traits:
+            self.bounds = list(self.pyramid.source.size)
+
+    def visible_tiles(self, scale, view_bounds=None):
+        """ Returns the level drawn at *scale* device pixels per unit, and
+        the (column, row, rect) of each tile of that level which intersects
+        *view_bounds*, where rect is the rectangle it is drawn in.
+        """
+        pyramid = self.pyramid
+        width, height = pyramid.source.size
+        if width == 0 or height == 0 or self.width <= 0 or self.height <= 0:
+            return 0, []
+        image_scale = max(scale * self.width / width,
+                          scale * self.height / height)
+        level = pyramid.level_for_scale(image_scale)
+
+        bounds = tuple(self.position) + tuple(self.bounds)
+        if view_bounds is not None:
+            bounds = intersect_bounds(bounds, view_bounds)
+            if bounds == empty_rectangle:
+                return level, []
+
+        # The size of a pixel of the level, in the units of the component,
+        # and the top of the image
+        top = self.y + self.height
+        level_width, level_height = pyramid.level_sizes[level]
+        pixel_width = float(self.width) / level_width
+        pixel_height = float(self.height) / level_height
+        rect = ((bounds[0] - self.x) / pixel_width,
+                (top - (bounds[1] + bounds[3])) / pixel_height,
+                bounds[2] / pixel_width, bounds[3] / pixel_height)
+
+        tiles = []
+        size = pyramid.tile_size
+        for column, row in pyramid.visible_tiles(level, rect):
+            tile_width = min(size, level_width - column * size)
+            tile_height = min(size, level_height - row * size)
+            tiles.append((column, row, (
+                self.x + column * size * pixel_width,
+                top - (row * size + tile_height) * pixel_height,
+                tile_width * pixel_width, tile_height * pixel_height)))
+        return level, tiles
+
+    def _draw_mainlayer(self, gc, view_bounds=None, mode="normal"):
+        if self.pyramid is None:
+            return
+        level, tiles = self.visible_tiles(_ctm_scale(gc), view_bounds)
+        with gc:
+            if hasattr(gc, "set_image_interpolation"):
+                gc.set_image_interpolation(self.interpolation)
+            for column, row, rect in tiles:
+                gc.draw_image(self._tile_image(level, column, row), rect)
+        return
+
+    def _tile_image(self, level, column, row):
+        """ Returns a tile as a GraphicsContextArray in the pixel format of
+        the pyramid, so that its channels are not guessed from its depth.
+        """
+        from kiva.agg import GraphicsContextArray
+
+        tile = self.pyramid.tile(level, column, row)
+        pix_format = self.pyramid.pix_format
+        if pix_format == "gray8":
+            # Agg has no gray8 graphics contexts
+            tile = tile.repeat(3, axis=-1)
+            pix_format = "rgb24"
+        return GraphicsContextArray(tile, pix_format, self.interpolation)
+
+    def _pyramid_changed(self, old, new):
+        self.invalidate_draw()
+        self.request_redraw()
+
+
+def _ctm_scale(gc):
+    """ Returns the number of device pixels per unit of the current
+    transform of *gc*.
+    """
+    ctm = gc.get_ctm()
+    if len(ctm) == 6:
+        a, b, c, d = ctm[:4]
+    else:
+        from kiva.affine import affine_params
+        a, b, c, d = affine_params(ctm)[:4]
+    return max(math.hypot(a, b), math.hypot(c, d))
@@ -2,6 +2,8 @@
 Defines markers classes, used by a variety of renderers.
 """
 
+from __future__ import with_statement
+
 # Major library imports
 from numpy import array, pi
 
@@ -59,6 +61,31 @@ class AbstractMarker(HasTraits):
         """
         raise NotImplementedError
 
+    def draw_at_points(self, gc, points, size):
+        """ Draws this marker centered on each of *points* with a single call
+        into *gc*.
+
+        Parameters
+        ----------
+        gc : GraphicsContext
+            The target for drawing the markers.
+        points : array
+            Nx2 array of (x, y) marker positions.
+        size : number
+            Size of the marker, in pixels
+        """
+        with gc:
+            if not self.antialias:
+                gc.set_antialias(False)
+            if self.kiva_marker != NO_MARKER and \
+                    hasattr(gc, "draw_marker_at_points") and \
+                    gc.draw_marker_at_points(points, size,
+                                             self.kiva_marker) != 0:
+                return
+            path = gc.get_empty_path()
+            self.add_to_path(path, size)
+            gc.draw_path_at_points(points, path, self.draw_mode)
+
     def _add_to_path(self, path, size):
         # subclasses must implement this method
         raise NotImplementedError
@@ -271,6 +298,16 @@ class CustomMarker(AbstractMarker):
         else:
             return self.path
 
+    def draw_at_points(self, gc, points, size):
+        """ Draws the custom path centered on each of *points* with a single
+        call into *gc*.
+        """
+        with gc:
+            if not self.antialias:
+                gc.set_antialias(False)
+            gc.draw_path_at_points(points, self.get_compiled_path(size),
+                                   self.draw_mode)
+
 # String names for marker types.
 marker_names = ("square", "circle", "triangle", "inverted_triangle", "plus",
                 "cross", "diamond", "dot", "pixel")
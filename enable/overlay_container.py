@@ -9,12 +9,22 @@ class OverlayContainer(Container):
     All of its components must therefore be resizable.
     """
 
+    # Overrides Container.
+    _layout_follows_components = True
+
     def get_preferred_size(self, components=None):
         """ Returns the size (width,height) that is preferred for this component.
 
         Overrides PlotComponent
         """
-        return simple_container_get_preferred_size(self, components=components)
+        if components is not None:
+            return simple_container_get_preferred_size(self,
+                                                       components=components)
+        if not self._preferred_size_valid:
+            self._cached_preferred_size = \
+                simple_container_get_preferred_size(self)
+            self._preferred_size_valid = True
+        return self._cached_preferred_size
 
     def _do_layout(self):
         """ Actually performs a layout (called by do_layout()).
@@ -1,14 +1,11 @@
 """A filled polygon component"""
 
 
-# Major package imports.
-from numpy import array
-
 # Enthought library imports.
 from kiva.constants import EOF_FILL_STROKE, FILL, FILL_STROKE
-from kiva.agg import points_in_polygon
+from kiva.hit_test import PathHitTester
 from traits.api import Any, Event, Float, HasTraits, Instance, List, \
-                             Property, Trait, Tuple
+                             Property, Trait, Tuple, on_trait_change
 from traitsui.api import Group, View
 
 # Local imports.
@@ -65,6 +62,10 @@ class Polygon(Component):
     # The size of each vertex.
     vertex_size = Float(3.0)
 
+    # The PathHitTester for the current points and inside rule, created when
+    # it is first needed
+    _hit_tester = Any
+
     traits_view = View(Group('<component>', id = 'component'),
                        Group('<links>', id = 'links'),
                        Group('background_color', '_',
@@ -92,6 +93,15 @@ class Polygon(Component):
         self.event_state = 'normal'
         return
 
+    def points_inside(self, points):
+        """ Returns a boolean array telling which of the Nx2 *points* fall
+        within this polygonal region.
+        """
+        if self._hit_tester is None:
+            self._hit_tester = PathHitTester(self.model.points,
+                                    use_winding=self.inside_rule == 'winding')
+        return self._hit_tester.contains(points)
+
     #--------------------------------------------------------------------------
     # 'Component' interface
     #--------------------------------------------------------------------------
@@ -115,11 +125,11 @@ class Polygon(Component):
 
         http://softsurfer.com/Archive/algorithm_0103/algorithm_0103.htm
         """
-        point_array = array((point,))
-        vertices = array(self.model.points)
-        winding = self.inside_rule == 'winding'
-        result = points_in_polygon(point_array, vertices, winding)
-        return result[0]
+        return self.points_inside(point)[0]
+
+    @on_trait_change('model, model.points, model.points_items, inside_rule')
+    def _reset_hit_tester(self):
+        self._hit_tester = None
 
     #--------------------------------------------------------------------------
     # Private interface
@@ -0,0 +1,107 @@
+""" Defines the ProfilerOverlay class.
+"""
+
+from __future__ import with_statement
+
+# Enthought library imports
+from kiva.trait_defs.kiva_font_trait import KivaFont
+from traits.api import Any, Enum, Instance, Int
+
+# Local, relative imports
+from abstract_overlay import AbstractOverlay
+from base_tool import KeySpec
+from colors import black_color_trait, ColorTrait
+from draw_profiler import DrawProfiler
+
+
+class ProfilerOverlay(AbstractOverlay):
+    """ Lists the components which took the longest to draw in the previous
+    frame, in a corner of the component it overlays.
+
+    The overlay profiles drawing while it is visible.  The **toggle_key**
+    shows and hides it.
+    """
+
+    # The profiler which records the frames.  It is started when the overlay
+    # is shown and stopped when it is hidden.
+    profiler = Instance(DrawProfiler, ())
+
+    # The number of components listed.
+    count = Int(5)
+
+    # The corner of the overlaid component the list is drawn in.
+    align = Enum("ul", "ur", "ll", "lr")
+
+    # The key which shows and hides the overlay.
+    toggle_key = Any(KeySpec("p", "control"))
+
+    # The font, color and background color of the list.
+    font = KivaFont("modern 10")
+    color = black_color_trait
+    bgcolor = ColorTrait((1.0, 1.0, 0.8, 0.85))
+
+    # The number of pixels between the list and the edges of its background.
+    margin = Int(4)
+
+    def __init__(self, component=None, **traits):
+        super(ProfilerOverlay, self).__init__(component, **traits)
+        if self.visible:
+            self.profiler.start()
+
+    def get_lines(self):
+        """ Returns the lines of text drawn by the overlay.
+        """
+        frame = self.profiler.last_frame()
+        if frame is None:
+            return ["no frames recorded"]
+        lines = ["frame: %.1f ms" % (frame.duration * 1000)]
+        for label, seconds in self.profiler.slowest(self.count, frame):
+            lines.append("%7.2f ms  %s" % (seconds * 1000, label))
+        return lines
+
+    def overlay(self, other_component, gc, view_bounds=None, mode="normal"):
+        """ Draws the list of the slowest components.
+
+        Overrides AbstractOverlay.
+        """
+        lines = self.get_lines()
+        with gc:
+            gc.set_font(self.font)
+            extents = [gc.get_full_text_extent(line) for line in lines]
+            line_height = max(extent[1] for extent in extents)
+            width = max(extent[0] for extent in extents) + 2 * self.margin
+            height = line_height * len(lines) + 2 * self.margin
+
+            if self.align[1] == "l":
+                x = other_component.x
+            else:
+                x = other_component.x2 - width
+            if self.align[0] == "u":
+                y = other_component.y2 - height
+            else:
+                y = other_component.y
+
+            gc.set_fill_color(self.bgcolor_)
+            gc.rect(x, y, width, height)
+            gc.fill_path()
+
+            gc.set_fill_color(self.color_)
+            for i, (line, extent) in enumerate(zip(lines, extents)):
+                gc.show_text_at_point(line, x + self.margin,
+                    y + height - self.margin - line_height * (i + 1) -
+                    extent[2])
+        return
+
+    def normal_key_pressed(self, event):
+        if self.toggle_key.match(event):
+            self.visible = not self.visible
+            self.request_redraw()
+            event.handled = True
+        return
+
+    def _visible_changed(self, old, new):
+        super(ProfilerOverlay, self)._visible_changed(old, new)
+        if new:
+            self.profiler.start()
+        else:
+            self.profiler.stop()
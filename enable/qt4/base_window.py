@@ -409,7 +409,10 @@ class _Window(AbstractWindow):
             if coordinates is None:
                 self.control.update()
             else:
-                self.control.update(*coordinates)
+                xl, yb, xr, yt = coordinates
+                rect = QtCore.QRect(int(xl), self._flip_y(yt - 1),
+                                    int(xr - xl) + 1, int(yt - yb) + 1)
+                self.control.update(rect)
 
     def _get_control_size(self):
         if self.control:
@@ -35,9 +35,14 @@ class Window(BaseWindow):
         h = self._gc.height()
         data = self._gc.pixel_map.convert_to_argb32string()
         image = QtGui.QImage(data, w, h, QtGui.QImage.Format_RGB32)
-        rect = QtCore.QRect(0,0,w,h)
         painter = QtGui.QPainter(self.control)
-        painter.drawImage(rect, image)
+        if self._update_region is None:
+            rect = QtCore.QRect(0,0,w,h)
+        else:
+            # Only the exposed part of the widget needs to be blitted; the
+            # rest of the image is unchanged since the last paint.
+            rect = event.rect()
+        painter.drawImage(rect, image, rect)
 
 def font_metrics_provider():
     from kiva.fonttools import Font
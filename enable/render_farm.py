@@ -0,0 +1,402 @@
+""" Renders Enable components into images on a pool of worker processes.
+
+A RenderFarm starts its workers once, and each worker imports Kiva and
+Enable and loads its fonts before it takes its first job.  Jobs describe a
+component either as a pickled component or as a factory which builds it in
+the worker::
+
+    farm = RenderFarm(processes=4, timeout=30)
+    jobs = (RenderJob(factory=make_report, args=(row,)) for row in rows)
+    for result in farm.render(jobs):
+        if result.error is None:
+            open("%s.png" % result.job_id, "wb").write(result.data)
+    farm.close()
+
+render() streams the results back in the order they finish, and only takes
+another job from the iterable once fewer than **max_pending** jobs are in
+flight, so a long or endless stream of jobs does not pile up in memory.  A
+job whose worker process dies, for example in a crash of the drawing
+backend, comes back as an error result and the pool starts a new worker.
+"""
+
+from __future__ import with_statement
+
+import cPickle
+import os
+import signal
+import sys
+import traceback
+from multiprocessing import Pool, active_children, cpu_count
+from multiprocessing.queues import SimpleQueue
+from Queue import Queue, Empty
+from timeit import default_timer
+
+# The image formats that RenderJob.format can name, besides "raw".
+IMAGE_FORMATS = ("png", "bmp", "jpg", "tiff")
+
+# The extra seconds the farm waits for a worker to report that a job timed
+# out, before giving up on the job.
+TIMEOUT_GRACE = 5.0
+
+# The most seconds the farm waits for a result before it checks that the
+# workers running its jobs are still alive.
+POLL_INTERVAL = 0.5
+
+
+class RenderTimeout(Exception):
+    """ Raised in a worker when a job runs past its timeout. """
+    pass
+
+
+class RenderWorkerLost(Exception):
+    """ Reported for a job whose worker process exited before it finished.
+    """
+    pass
+
+
+class RenderJob(object):
+    """ A component to render, and how to render it.
+
+    Exactly one of **component** and **factory** is given.  **factory** is a
+    picklable callable, or a "package.module:name" string naming one, which
+    is called with **args** and **kwargs** in the worker and returns the
+    component.
+    """
+
+    def __init__(self, component=None, factory=None, args=(), kwargs=None,
+                 size=None, format="png", bgcolor=(1.0, 1.0, 1.0, 1.0),
+                 timeout=None, job_id=None):
+        if (component is None) == (factory is None):
+            raise ValueError("A RenderJob needs either a component or a "
+                             "factory")
+        if format != "raw" and format not in IMAGE_FORMATS:
+            raise ValueError("Unknown image format %r" % format)
+
+        self.component = component
+        self.factory = factory
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+
+        # The (width, height) of the image, or None for the outer bounds of
+        # the component
+        self.size = size
+
+        # One of IMAGE_FORMATS, or "raw" for the pixels of the graphics
+        # context as bytes
+        self.format = format
+
+        # The RGBA color the image is cleared to before drawing
+        self.bgcolor = bgcolor
+
+        # The seconds the job may take in the worker, or None to use the
+        # timeout of the farm
+        self.timeout = timeout
+
+        # Identifies the job in its RenderResult.  The farm numbers the jobs
+        # it is given without one.
+        self.job_id = job_id
+
+
+class RenderResult(object):
+    """ The image rendered for a RenderJob, or the error it failed with. """
+
+    def __init__(self, job_id, data=None, format=None, size=None,
+                 pix_format=None, error=None, elapsed=0.0):
+        self.job_id = job_id
+
+        # The encoded image, or the raw pixels, as a string
+        self.data = data
+        self.format = format
+
+        # The (width, height) of the image, and for raw results the pixel
+        # format of the data (e.g. 'bgra32')
+        self.size = size
+        self.pix_format = pix_format
+
+        # None, or the formatted exception that the job failed with
+        self.error = error
+
+        # The seconds the worker spent on the job
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        if self.error is not None:
+            return "RenderResult(%r, error=%r)" % (self.job_id,
+                self.error.strip().splitlines()[-1])
+        return "RenderResult(%r, %s, %d bytes)" % (self.job_id, self.format,
+                                                   len(self.data))
+
+
+def render_component(component, size=None, bgcolor=(1.0, 1.0, 1.0, 1.0)):
+    """ Draws *component* into a new Agg graphics context and returns it.
+
+    The lower left corner of the outer bounds of the component is drawn at
+    the origin.  *size* defaults to the outer bounds of the component.
+    """
+    from kiva.image import GraphicsContext
+
+    if component.layout_needed:
+        component.do_layout()
+    if size is None:
+        size = component.outer_bounds
+    gc = GraphicsContext((int(size[0]), int(size[1])))
+    gc.clear(bgcolor)
+    with gc:
+        gc.translate_ctm(-component.outer_x, -component.outer_y)
+        component.draw(gc)
+    return gc
+
+
+def run_job(job):
+    """ Renders a RenderJob in this process and returns its RenderResult.
+    Exceptions are caught and reported in the result.
+    """
+    start = default_timer()
+    try:
+        component = job.component
+        if component is None:
+            factory = job.factory
+            if isinstance(factory, basestring):
+                factory = _import_name(factory)
+            component = factory(*job.args, **job.kwargs)
+        gc = render_component(component, job.size, job.bgcolor)
+        size = (gc.width(), gc.height())
+        if job.format == "raw":
+            return RenderResult(job.job_id, gc.bmp_array.tostring(), "raw",
+                                size, gc.format(),
+                                elapsed=default_timer() - start)
+        return RenderResult(job.job_id, gc.encode(job.format), job.format, size,
+                            elapsed=default_timer() - start)
+    except Exception:
+        return RenderResult(job.job_id, error=traceback.format_exc(),
+                            elapsed=default_timer() - start)
+
+
+def preload_fonts(fonts=()):
+    """ Loads the font list and resolves and opens each of *fonts* (Kiva
+    Fonts or font specification strings like "modern 12"), so that the
+    first job of a worker does not pay for it.
+    """
+    from kiva.image import GraphicsContext
+    from kiva.text_extent_cache import text_extent_cache
+    from kiva.trait_defs.kiva_font_trait import TraitKivaFont
+
+    gc = GraphicsContext((1, 1))
+    for font in fonts:
+        font = TraitKivaFont().validate(None, "font", font)
+        text_extent_cache.font_file(font)
+        gc.set_font(font)
+        gc.get_full_text_extent("0")
+
+
+class RenderFarm(object):
+    """ A pool of worker processes which render RenderJobs.
+    """
+
+    def __init__(self, processes=None, max_pending=None, timeout=None,
+                 fonts=("modern 10", "modern 12", "swiss 10", "swiss 12")):
+        # The number of worker processes
+        self.processes = processes or cpu_count()
+
+        # The most jobs sent to the workers and not yet finished
+        self.max_pending = max_pending or 2 * self.processes
+
+        # The default seconds a job may take, or None for no limit
+        self.timeout = timeout
+
+        # The workers report the id of each job they start, and their pid
+        self._started = SimpleQueue()
+        self._running = {}
+
+        # The AsyncResults of the jobs sent to the workers, and whether a
+        # worker has died during a job
+        self._results = {}
+        self._lost_workers = False
+
+        self._pool = Pool(self.processes, _init_worker,
+                          (tuple(fonts), self._started))
+        self._next_id = 0
+
+    def render(self, jobs):
+        """ Renders the RenderJobs in the iterable *jobs*, yielding their
+        RenderResults as they finish.
+
+        A job which runs past its timeout yields a result whose error
+        mentions RenderTimeout.  Where signals are available, the worker
+        interrupts the job; otherwise the farm stops waiting for it.  A job
+        whose worker exits yields a result whose error mentions
+        RenderWorkerLost.
+        """
+        jobs = iter(jobs)
+        finished = Queue()
+        pending = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < self.max_pending:
+                try:
+                    job = jobs.next()
+                except StopIteration:
+                    exhausted = True
+                    break
+                result = self._submit(job, finished, pending)
+                if result is not None:
+                    yield result
+            if not pending:
+                return
+
+            deadlines = [deadline for deadline in pending.itervalues()
+                         if deadline is not None]
+            wait = POLL_INTERVAL
+            if deadlines:
+                wait = min(wait, max(0.0, min(deadlines) - default_timer()))
+            try:
+                result = finished.get(timeout=wait)
+            except Empty:
+                for job_id in self._lost_jobs(pending):
+                    del pending[job_id]
+                    yield RenderResult(job_id, error="RenderWorkerLost: the "
+                        "worker process exited during the job\n")
+                for job_id, deadline in pending.items():
+                    if deadline is not None and deadline <= default_timer():
+                        del pending[job_id]
+                        self._results.pop(job_id, None)
+                        yield RenderResult(job_id, error="RenderTimeout: the "
+                            "job did not finish in time\n")
+                continue
+            self._running.pop(result.job_id, None)
+            self._results.pop(result.job_id, None)
+            if result.job_id in pending:
+                del pending[result.job_id]
+                yield result
+
+    def render_one(self, job):
+        """ Renders a single RenderJob and returns its RenderResult.
+        """
+        for result in self.render([job]):
+            return result
+
+    def close(self):
+        """ Lets the workers finish their jobs, and waits for them to exit.
+        """
+        self._pool.close()
+        if self._lost_workers:
+            # The pool would wait forever for the jobs whose worker died, so
+            # wait for the others and then stop the workers
+            for result in self._results.values():
+                result.wait()
+            self._pool.terminate()
+        self._pool.join()
+
+    def terminate(self):
+        """ Stops the workers at once.
+        """
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def _submit(self, job, finished, pending):
+        """ Sends a job to the workers, and records when it is due.
+
+        The job is pickled here, because the pool never reports a job that
+        it fails to send.  Returns the error RenderResult of a job which
+        can't be pickled, and otherwise None.
+        """
+        if job.job_id is None:
+            job.job_id = self._next_id
+            self._next_id += 1
+        if job.job_id in pending:
+            raise ValueError("Job %r is already being rendered" % job.job_id)
+        try:
+            data = cPickle.dumps(job, -1)
+        except (cPickle.PicklingError, TypeError):
+            return RenderResult(job.job_id, error=traceback.format_exc())
+        timeout = job.timeout if job.timeout is not None else self.timeout
+        deadline = None
+        if timeout is not None:
+            deadline = default_timer() + timeout + TIMEOUT_GRACE
+        pending[job.job_id] = deadline
+        self._results[job.job_id] = self._pool.apply_async(
+            _run_job_with_timeout, (job.job_id, data, timeout),
+            callback=finished.put)
+        return None
+
+    def _lost_jobs(self, pending):
+        """ Returns the ids of the pending jobs which a worker started, and
+        which will never finish because that worker is no longer alive.
+        """
+        started = self._started
+        while not started.empty():
+            job_id, pid = started.get()
+            self._running[job_id] = pid
+        alive = set(process.pid for process in active_children())
+        lost = [job_id for job_id, pid in self._running.items()
+                if pid not in alive]
+        for job_id in lost:
+            del self._running[job_id]
+            self._results.pop(job_id, None)
+            self._lost_workers = True
+        return [job_id for job_id in lost if job_id in pending]
+
+
+#------------------------------------------------------------------------------
+# Worker process functions
+#------------------------------------------------------------------------------
+
+# The queue a worker reports the jobs it starts to
+_started = None
+
+def _init_worker(fonts, started):
+    """ Prepares a worker process: no GUI toolkit, the Enable and Kiva
+    modules imported, and the fonts loaded.
+    """
+    global _started
+    _started = started
+    os.environ.setdefault("ETS_TOOLKIT", "null")
+    # Let the parent process handle Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import enable.api
+    preload_fonts(fonts)
+
+
+def _raise_timeout(signum, frame):
+    raise RenderTimeout("the job did not finish in time")
+
+
+def _run_job_with_timeout(job_id, data, timeout):
+    """ Runs the pickled job *data* in a worker, interrupting it with
+    SIGALRM if it runs past *timeout* seconds.  Any exception is reported in
+    the result, since the pool would not report it to the farm.
+    """
+    # SimpleQueue writes at once, so the farm learns which job this worker
+    # is running even if it crashes during the job
+    _started.put((job_id, os.getpid()))
+    try:
+        job = cPickle.loads(data)
+        if timeout is None or not hasattr(signal, "setitimer"):
+            return run_job(job)
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            return run_job(job)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    except Exception:
+        return RenderResult(job_id, error=traceback.format_exc())
+
+
+def _import_name(name):
+    """ Returns the object named by a "package.module:name" string.
+    """
+    module_name, _, attribute = name.partition(":")
+    __import__(module_name)
+    return getattr(sys.modules[module_name], attribute)
@@ -107,6 +107,61 @@ class CompiledPath(KivaCompiledPath):
         )
         self.close_path()
 
+    if hasattr(KivaCompiledPath, '_vertices'):
+        # kiva.agg paths are SWIG objects, so pickle their vertices instead
+        def __reduce__(self):
+            return _compiled_path_from_vertices, (self.__class__,
+                                                  self._vertices())
+
+
+# Vertex commands and flags from agg_basics.h
+agg24_path_cmd_stop = 0
+agg24_path_cmd_move_to = 1
+agg24_path_cmd_line_to = 2
+agg24_path_cmd_curve3 = 3
+agg24_path_cmd_curve4 = 4
+agg24_path_cmd_end_poly = 0x0F
+agg24_path_flags_close = 0x40
+
+
+def _compiled_path_from_vertices(cls, vertices):
+    """ Rebuild a kiva.agg path from the Nx4 array of (x, y, command, flags)
+    returned by its _vertices() method.
+    """
+    path = cls()
+    i = 0
+    n = len(vertices)
+    while i < n:
+        x, y, cmd, flags = vertices[i]
+        cmd, flags = int(cmd), int(flags)
+        if cmd == agg24_path_cmd_move_to:
+            # Collect the following line_tos into a single call
+            j = i + 1
+            while j < n and vertices[j][2] == agg24_path_cmd_line_to:
+                j += 1
+            if j > i + 1:
+                path.lines(vertices[i:j, :2].copy())
+            else:
+                path.move_to(x, y)
+            i = j
+            continue
+        elif cmd == agg24_path_cmd_line_to:
+            path.line_to(x, y)
+        elif cmd == agg24_path_cmd_curve3:
+            x2, y2 = vertices[i+1][:2]
+            path.quad_curve_to(x, y, x2, y2)
+            i += 1
+        elif cmd == agg24_path_cmd_curve4:
+            (x2, y2), (x3, y3) = vertices[i+1][:2], vertices[i+2][:2]
+            path.curve_to(x, y, x2, y2, x3, y3)
+            i += 2
+        elif cmd == agg24_path_cmd_end_poly:
+            if flags & agg24_path_flags_close:
+                path.close_path()
+        elif cmd == agg24_path_cmd_stop:
+            break
+        i += 1
+    return path
 
 
 class Pen(object):
@@ -330,6 +385,10 @@ class Renderer(NullRenderer):
 
     fill_rules = {'nonzero':constants.FILL, 'evenodd': constants.EOF_FILL}
 
+    # Maps a fill mode to the mode that fills and then strokes
+    fill_stroke_modes = {constants.FILL: constants.FILL_STROKE,
+                         constants.EOF_FILL: constants.EOF_FILL_STROKE}
+
     def __init__(self):
         pass
 
@@ -355,7 +414,8 @@ class Renderer(NullRenderer):
 
     @classmethod
     def createPen(cls, color_tuple):
-        return Pen(color_tuple)
+        # The color may be a pyparsing result, which can't be pickled
+        return Pen(tuple(color_tuple))
 
     @classmethod
     def createLinearGradientBrush(cls, x1,y1,x2,y2, stops, spreadMethod='pad',
@@ -482,6 +542,27 @@ class Renderer(NullRenderer):
         gc.add_path(path)
         return gc.draw_path(mode)
 
+    @classmethod
+    def drawPath(cls, gc, path, brush, fill_mode, pen, matrix=None):
+        """ Fill and/or stroke a path in one go, in its own graphics state.
+
+        This does the work of pushState, concatTransform, setBrush, fillPath,
+        setPen, strokePath and popState for compiled documents.
+        """
+        gc.save_state()
+        if matrix is not None:
+            gc.concat_ctm(matrix)
+        mode = None
+        if brush is not None:
+            brush.set_on_gc(gc)
+            mode = fill_mode
+        if pen is not None:
+            pen.set_on_gc(gc)
+            mode = cls.fill_stroke_modes.get(mode, constants.STROKE)
+        gc.add_path(path)
+        gc.draw_path(mode)
+        gc.restore_state()
+
     @classmethod
     def gradientPath(cls, gc, path, brush):
         gc.save_state()
@@ -0,0 +1,219 @@
+"""
+    CompiledDocument
+
+    An SVGDocument reduced to a short program of renderer calls.
+"""
+from kiva import affine
+
+
+# Renderer operations whose effect on the current transform can be computed
+# up front and merged into a single matrix.
+TRANSFORM_OPS = ('translate', 'scale', 'rotate', 'concatTransform')
+
+# Every renderer operation that SVGDocument emits.
+RENDERER_OPS = TRANSFORM_OPS + (
+    'pushState', 'popState', 'setBrush', 'fillPath', 'gradientPath',
+    'setPen', 'strokePath', 'clipPath', 'setFont', 'DrawText', 'DrawImage',
+)
+
+
+def _fold_transform(matrix, name, args):
+    """ Apply the renderer transform operation *name* to a kiva affine
+    matrix the way the renderer would apply it to the graphics context.
+    """
+    if name == 'translate':
+        return affine.translate(matrix, *args)
+    elif name == 'scale':
+        return affine.scale(matrix, *args)
+    elif name == 'rotate':
+        return affine.rotate(matrix, *args)
+    else:
+        return affine.concat(matrix, affine.affine_from_values(*args[0]))
+
+
+def _matrix_values(matrix):
+    """ Return the (a, b, c, d, tx, ty) values of a renderer matrix, or None
+    if the renderer's matrices are opaque.
+    """
+    try:
+        values = tuple([float(v) for v in matrix])
+    except (TypeError, ValueError):
+        return None
+    if len(values) != 6:
+        return None
+    return values
+
+
+def _name_ops(ops, renderer):
+    """ Replace the bound renderer callables in an op list by their names.
+
+    Callables which do not belong to the renderer are kept as they are.
+    """
+    names = {}
+    for name in RENDERER_OPS:
+        op = getattr(renderer, name, None)
+        if op is not None:
+            names[op] = name
+
+    named = []
+    for op, args in ops:
+        name = names.get(op, op)
+        if (name == 'concatTransform' and
+                _matrix_values(args[0]) is None):
+            # Can't look inside the matrix, so leave it alone
+            name = op
+        named.append((name, args))
+    return named
+
+
+def _fold_transforms(program):
+    """ Merge every run of transform operations into a single 'transform'
+    instruction carrying the (a, b, c, d, tx, ty) of the combined matrix.
+    """
+    folded = []
+    matrix = None
+    for name, args in program:
+        if name in TRANSFORM_OPS:
+            if matrix is None:
+                matrix = affine.affine_identity()
+            if name == 'concatTransform':
+                args = (_matrix_values(args[0]),)
+            matrix = _fold_transform(matrix, name, args)
+            continue
+        if matrix is not None:
+            if not affine.is_identity(matrix):
+                folded.append(('transform', affine.affine_params(matrix)))
+            matrix = None
+        folded.append((name, args))
+    if matrix is not None and not affine.is_identity(matrix):
+        folded.append(('transform', affine.affine_params(matrix)))
+    return folded
+
+
+def _match_path_block(program, i):
+    """ Try to match the instructions that SVGDocument generates for a
+    single filled and/or stroked path, starting at index *i*:
+
+        pushState, [transform], [setBrush, fillPath], [setPen, strokePath],
+        popState
+
+    Returns a (drawPath args, end index) tuple, or None if the instructions
+    do not match.
+    """
+    n = len(program)
+    if program[i][0] != 'pushState':
+        return None
+    i += 1
+    matrix = None
+    if i < n and program[i][0] == 'transform':
+        matrix = program[i][1]
+        i += 1
+    path = brush = fill_mode = pen = None
+    if (i + 1 < n and program[i][0] == 'setBrush' and
+            program[i+1][0] == 'fillPath'):
+        brush, = program[i][1]
+        path, fill_mode = program[i+1][1]
+        i += 2
+    if (i + 1 < n and program[i][0] == 'setPen' and
+            program[i+1][0] == 'strokePath'):
+        pen, = program[i][1]
+        stroke_path, = program[i+1][1]
+        if path is not None and stroke_path is not path:
+            return None
+        path = stroke_path
+        i += 2
+    if path is None or i >= n or program[i][0] != 'popState':
+        return None
+    return (path, brush, fill_mode, pen, matrix), i + 1
+
+
+def _merge_path_blocks(program):
+    """ Replace each matched path block by a single 'drawPath' instruction.
+    """
+    merged = []
+    i = 0
+    n = len(program)
+    while i < n:
+        match = _match_path_block(program, i)
+        if match is None:
+            merged.append(program[i])
+            i += 1
+        else:
+            args, i = match
+            merged.append(('drawPath', args))
+    return merged
+
+
+def compile_ops(ops, renderer):
+    """ Compile the (callable, args) op list of an SVGDocument into a
+    program of (renderer operation name, args) instructions.
+
+    Consecutive transforms are folded into one matrix, and if the renderer
+    has a drawPath() operation, the state save, transform, fill, stroke and
+    state restore of each path are merged into a single drawPath call.
+    """
+    program = _fold_transforms(_name_ops(ops, renderer))
+    if hasattr(renderer, 'drawPath'):
+        program = _merge_path_blocks(program)
+    return program
+
+
+class CompiledDocument(object):
+    """ A compiled SVGDocument.
+
+    Rendering a compiled document makes one renderer call per path instead
+    of one per op.  The program only refers to renderer operations by name,
+    so a compiled document can be pickled if its paths, brushes and pens
+    can be.
+    """
+
+    def __init__(self, program, size, renderer):
+        # The list of (renderer operation name, args) instructions. Instead
+        # of a name, an instruction may hold any callable taking the graphics
+        # context as its first argument.
+        self.program = program
+        # The (width, height) of the document.
+        self.size = size
+        self.renderer = renderer
+        self.ops = self._bind(program, renderer)
+
+    def __getstate__(self):
+        return {'program': self.program, 'size': self.size}
+
+    def __setstate__(self, state):
+        self.program = state['program']
+        self.size = state['size']
+        self.renderer = None
+        self.ops = []
+
+    def bind(self, renderer):
+        """ Bind an unpickled document to a renderer.
+        """
+        self.renderer = renderer
+        self.ops = self._bind(self.program, renderer)
+
+    def getSize(self):
+        return self.size
+
+    def render(self, context):
+        for op, args in self.ops:
+            op(context, *args)
+
+    @staticmethod
+    def _bind(program, renderer):
+        """ Turn a program into a list of (callable, args) ops.
+        """
+        ops = []
+        for name, args in program:
+            if name == 'transform':
+                op = renderer.concatTransform
+                args = (renderer.createAffineMatrix(*args),)
+            elif isinstance(name, basestring):
+                op = getattr(renderer, name)
+                if name == 'drawPath' and args[-1] is not None:
+                    matrix = renderer.createAffineMatrix(*args[-1])
+                    args = args[:-1] + (matrix,)
+            else:
+                op = name
+            ops.append((op, args))
+        return ops
@@ -17,6 +17,7 @@ from css.colour import colourValue
 from css import values
 from attributes import paintValue
 from svg_regex import svg_parser
+from compiled_document import CompiledDocument, compile_ops
 
 from enable.savage.svg.backends.null.null_renderer import NullRenderer, AbstractGradientBrush
 
@@ -268,6 +269,12 @@ class SVGDocument(object):
         resources = ResourceGetter(os.path.dirname(filename))
         return cls(root, resources, renderer)
 
+    def compile(self):
+        """ Return a CompiledDocument which draws the same thing as this
+        document with one renderer call per path.
+        """
+        return CompiledDocument(compile_ops(self.ops, self.renderer),
+                                self.getSize(), self.renderer)
 
     def getSize(self):
         width = -1
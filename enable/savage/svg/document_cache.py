@@ -0,0 +1,149 @@
+"""
+    DocumentCache
+
+    A cache of compiled SVG documents, keyed on the content of the SVG file.
+"""
+from cStringIO import StringIO
+import cPickle as pickle
+import hashlib
+import os
+import sys
+import tempfile
+from xml.etree import cElementTree as ET
+
+from traits.etsconfig.api import ETSConfig
+
+from document import ResourceGetter, SVGDocument
+
+
+class DocumentCache(object):
+    """ Compiles each SVG file once and keeps the result in memory and,
+    optionally, on disk.
+
+    Documents are looked up by a hash of the file's content, its directory
+    (which relative references are resolved against) and the renderer, so
+    editing a file invalidates its entry.  Files referenced from the
+    document, such as images or other SVG files, are not part of the key.
+
+    Documents that can't be pickled, e.g. because they use gradients, are
+    only cached in memory.
+    """
+
+    # Increase this whenever the format of the compiled documents changes.
+    version = 1
+
+    def __init__(self, directory=None):
+        # The directory the compiled documents are stored in, or None to
+        # only cache them in memory.
+        self.directory = directory
+        # Maps a cache key to a CompiledDocument.
+        self._documents = {}
+
+    def load(self, filename, renderer):
+        """ Return the CompiledDocument for an SVG file.
+        """
+        if not os.path.exists(filename):
+            raise IOError('No such file: ' + filename)
+        fh = open(filename, 'rb')
+        try:
+            data = fh.read()
+        finally:
+            fh.close()
+
+        dirname = os.path.abspath(os.path.dirname(filename))
+        key = self.key(data, dirname, renderer)
+        document = self._documents.get(key)
+        if document is None:
+            document = self._load_from_disk(key, renderer)
+            if document is None:
+                root = ET.parse(StringIO(data)).getroot()
+                resources = ResourceGetter(dirname)
+                document = SVGDocument(root, resources, renderer).compile()
+                self._save_to_disk(key, document)
+            self._documents[key] = document
+        return document
+
+    def clear(self):
+        """ Forget the documents held in memory.
+        """
+        self._documents.clear()
+
+    def key(self, data, dirname, renderer):
+        """ Return the cache key for the SVG file content *data*.
+        """
+        renderer_name = '%s.%s' % (getattr(renderer, '__module__', ''),
+                                   getattr(renderer, '__name__',
+                                           renderer.__class__.__name__))
+        md5 = hashlib.md5()
+        for part in (str(self.version), renderer_name, dirname, data):
+            md5.update(part)
+            md5.update('\0')
+        return md5.hexdigest()
+
+    #### Private interface ####################################################
+
+    def _cache_file(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _load_from_disk(self, key, renderer):
+        if self.directory is None:
+            return None
+        filename = self._cache_file(key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            fh = open(filename, 'rb')
+            try:
+                document = pickle.load(fh)
+            finally:
+                fh.close()
+            document.bind(renderer)
+        except Exception:
+            # A corrupt or outdated entry. Compile the document again.
+            return None
+        return document
+
+    def _save_to_disk(self, key, document):
+        if self.directory is None:
+            return
+        try:
+            data = pickle.dumps(document, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Some of the document's paths, brushes or ops can't be pickled.
+            return
+        filename = self._cache_file(key)
+        try:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            fd, tmpname = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            fh = os.fdopen(fd, 'wb')
+            try:
+                fh.write(data)
+            finally:
+                fh.close()
+            if sys.platform == 'win32' and os.path.exists(filename):
+                os.remove(filename)
+            os.rename(tmpname, filename)
+        except (IOError, OSError):
+            pass
+
+
+# The cache shared by the whole process.
+_document_cache = None
+
+def get_document_cache():
+    """ Return the process wide DocumentCache, which stores compiled documents
+    in the application data directory.
+    """
+    global _document_cache
+    if _document_cache is None:
+        directory = os.path.join(ETSConfig.application_data, 'enable',
+                                 'svg_cache')
+        _document_cache = DocumentCache(directory)
+    return _document_cache
+
+def load_document(filename, renderer):
+    """ Return a CompiledDocument for an SVG file from the process wide
+    cache, parsing and compiling the file only if it is not cached yet.
+    """
+    return get_document_cache().load(filename, renderer)
@@ -0,0 +1,114 @@
+import cPickle as pickle
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.cElementTree as etree
+from cStringIO import StringIO
+
+from kiva.image import GraphicsContext
+
+import enable.savage.svg.document as document
+from enable.savage.svg.document_cache import DocumentCache
+from enable.savage.svg.backends.kiva.renderer import Renderer as KivaRenderer
+
+shapesSVG = r"""<?xml version="1.0" standalone="no"?>
+<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="40" height="30">
+  <g transform="translate(2,3) scale(1.5)">
+    <rect x="1" y="1" width="10" height="8" fill="red" stroke="blue"
+          stroke-width="2" transform="rotate(10, 5, 5)"/>
+    <circle cx="18" cy="10" r="5" fill="green" fill-rule="evenodd"/>
+    <path d="M 2 15 Q 8 5 14 15 C 16 18 20 18 22 15 Z" stroke="black"
+          fill="none"/>
+  </g>
+</svg>"""
+
+
+def render(doc):
+    gc = GraphicsContext((40, 30))
+    gc.clear((1.0, 1.0, 1.0, 1.0))
+    gc.translate_ctm(0, 30)
+    gc.scale_ctm(1.0, -1.0)
+    doc.render(gc)
+    return gc.bmp_array
+
+
+class TestCompiledDocument(unittest.TestCase):
+
+    def setUp(self):
+        root = etree.parse(StringIO(shapesSVG)).getroot()
+        self.document = document.SVGDocument(root, renderer=KivaRenderer)
+
+    def testOneOpPerPath(self):
+        compiled = self.document.compile()
+        names = [name for name, args in compiled.program]
+        self.assertEqual(names.count('drawPath'), 3)
+        # The <svg> and <g> elements add two pushStates, a transform and two
+        # popStates
+        self.assertEqual(len(compiled.ops), 8)
+        self.assertEqual(compiled.getSize(), (40, 30))
+
+    def testRendersLikeDocument(self):
+        compiled = self.document.compile()
+        self.assert_((render(compiled) == render(self.document)).all())
+
+    def testPickle(self):
+        compiled = pickle.loads(pickle.dumps(self.document.compile(),
+                                             pickle.HIGHEST_PROTOCOL))
+        compiled.bind(KivaRenderer)
+        self.assert_((render(compiled) == render(self.document)).all())
+
+
+class TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'shapes.svg')
+        self.write(shapesSVG)
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, text):
+        fh = open(self.filename, 'w')
+        try:
+            fh.write(text)
+        finally:
+            fh.close()
+
+    def testMemoryCache(self):
+        cache = DocumentCache()
+        doc = cache.load(self.filename, KivaRenderer)
+        self.assert_(cache.load(self.filename, KivaRenderer) is doc)
+
+        self.write(shapesSVG.replace('red', 'yellow'))
+        self.assert_(cache.load(self.filename, KivaRenderer) is not doc)
+
+    def testDiskCache(self):
+        cache = DocumentCache(self.cache_dir)
+        doc = cache.load(self.filename, KivaRenderer)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        cache = DocumentCache(self.cache_dir)
+        cached = cache.load(self.filename, KivaRenderer)
+        self.assert_(cached is not doc)
+        self.assert_(cached.renderer is KivaRenderer)
+        self.assert_((render(cached) == render(doc)).all())
+
+    def testCorruptDiskCache(self):
+        cache = DocumentCache(self.cache_dir)
+        doc = cache.load(self.filename, KivaRenderer)
+        cache_file = os.path.join(self.cache_dir,
+                                  os.listdir(self.cache_dir)[0])
+        fh = open(cache_file, 'wb')
+        fh.write('garbage')
+        fh.close()
+
+        cache = DocumentCache(self.cache_dir)
+        cached = cache.load(self.filename, KivaRenderer)
+        self.assert_((render(cached) == render(doc)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,14 +18,14 @@
 # Standard library imports
 import copy
 import sys
-import xml.etree.cElementTree as etree
 import os.path
 
 # System library imports
 import wx
 
 # ETS imports
-from enable.savage.svg.document import SVGDocument
+from enable.savage.svg.compiled_document import CompiledDocument
+from enable.savage.svg.document_cache import load_document
 from enable.savage.svg.backends.wx.renderer import Renderer
 from traits.api import Instance
 from traitsui.wx.constants import WindowColor
@@ -202,8 +202,8 @@ class SVGButtonEditor ( Editor ):
     """ Traits UI 'display only' image editor.
     """
 
-    document = Instance(SVGDocument)
-    toggle_document = Instance(SVGDocument)
+    document = Instance(CompiledDocument)
+    toggle_document = Instance(CompiledDocument)
 
     #---------------------------------------------------------------------------
     # Editor API
@@ -214,15 +214,16 @@ class SVGButtonEditor ( Editor ):
             widget.
         """
 
-        self.document = SVGDocument.createFromFile(self.factory.filename, renderer=Renderer)
+        # Documents are compiled once per process and shared between editors
+        self.document = load_document(self.factory.filename, renderer=Renderer)
 
         # load the button toggle document which will be displayed when the
         # button is toggled.
         if self.factory.toggle_filename:
-            self.toggle_document = SVGDocument.createFromFile(self.factory.toggle_filename, renderer=Renderer)
+            self.toggle_document = load_document(self.factory.toggle_filename, renderer=Renderer)
         else:
-            tree = etree.parse(os.path.join(os.path.dirname(__file__), 'data', 'button_toggle.svg'))
-            self.toggle_document = SVGDocument(tree.getroot(), renderer=Renderer)
+            filename = os.path.join(os.path.dirname(__file__), 'data', 'button_toggle.svg')
+            self.toggle_document = load_document(filename, renderer=Renderer)
 
         padding = (self.factory.width_padding, self.factory.height_padding)
         self.control = ButtonRenderPanel( parent, self, padding=padding )
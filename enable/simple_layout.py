@@ -52,8 +52,7 @@ def simple_container_get_preferred_size(container, components=None):
         max_height = container.default_size[1]
 
     # Add in our padding and border
-    container._cached_preferred_size = (max_width + container.hpadding, max_height + container.vpadding)
-    return container._cached_preferred_size
+    return (max_width + container.hpadding, max_height + container.vpadding)
 
 def simple_container_do_layout(container, components=None):
     """ Actually performs a layout (called by do_layout()).
@@ -0,0 +1,138 @@
+""" Defines the GridSpatialIndex class, used by containers to quickly find the
+children that are under a point or that intersect a region.
+"""
+
+from math import floor
+
+
+class GridSpatialIndex(object):
+    """ A uniform grid of square cells, each of which holds the set of items
+    whose bounds overlap it.
+
+    Items are arbitrary hashable objects (usually Components) stored with a
+    bounds rectangle (x, y, width, height).  Queries return a superset of the
+    items that actually intersect the query; callers are expected to do an
+    exact test on the (small) set of candidates.
+
+    Items that would cover more than **max_cells_per_item** cells are not
+    entered into the grid at all; they are kept in a separate set that is
+    returned by every query.
+    """
+
+    def __init__(self, cell_size=200.0, max_cells_per_item=256):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive, got %r" % cell_size)
+        self.cell_size = float(cell_size)
+        self.max_cells_per_item = max_cells_per_item
+        self.clear()
+
+    def clear(self):
+        """ Removes all items from the index. """
+        # Maps (i, j) cell indices to the set of items overlapping that cell
+        self._cells = {}
+        # Maps each item to its (i0, j0, i1, j1) cell range, or None if the
+        # item is oversized
+        self._extents = {}
+        # Items too big to be stored in the grid
+        self._oversized = set()
+
+    def insert(self, item, bounds):
+        """ Adds *item* to the index with the given (x, y, w, h) bounds.  If the
+        item is already in the index, it is moved.
+        """
+        if item in self._extents:
+            self.remove(item)
+
+        extent = self._cell_range(bounds)
+        i0, j0, i1, j1 = extent
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > self.max_cells_per_item:
+            self._extents[item] = None
+            self._oversized.add(item)
+            return
+
+        self._extents[item] = extent
+        cells = self._cells
+        for i in xrange(i0, i1 + 1):
+            for j in xrange(j0, j1 + 1):
+                cell = cells.get((i, j))
+                if cell is None:
+                    cells[(i, j)] = set([item])
+                else:
+                    cell.add(item)
+        return
+
+    def remove(self, item):
+        """ Removes *item* from the index.  Unknown items are ignored. """
+        extent = self._extents.pop(item, -1)
+        if extent == -1:
+            return
+        if extent is None:
+            self._oversized.discard(item)
+            return
+
+        i0, j0, i1, j1 = extent
+        cells = self._cells
+        for i in xrange(i0, i1 + 1):
+            for j in xrange(j0, j1 + 1):
+                cell = cells.get((i, j))
+                if cell is not None:
+                    cell.discard(item)
+                    if not cell:
+                        del cells[(i, j)]
+        return
+
+    def update(self, item, bounds):
+        """ Moves *item* to new bounds.  This is cheap if the item still
+        covers the same cells.
+        """
+        extent = self._extents.get(item, -1)
+        if extent is not None and extent != -1 and \
+                extent == self._cell_range(bounds):
+            return
+        self.insert(item, bounds)
+
+    def query_point(self, x, y):
+        """ Returns the set of items whose cells contain the point (x, y). """
+        size = self.cell_size
+        result = set(self._oversized)
+        cell = self._cells.get((int(floor(x / size)), int(floor(y / size))))
+        if cell is not None:
+            result.update(cell)
+        return result
+
+    def query_bounds(self, bounds):
+        """ Returns the set of items whose cells overlap the (x, y, w, h)
+        bounds rectangle.
+        """
+        i0, j0, i1, j1 = self._cell_range(bounds)
+        result = set(self._oversized)
+        cells = self._cells
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            # The query covers more cells than are occupied, so it is cheaper
+            # to walk the occupied cells.
+            for (i, j), cell in cells.iteritems():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    result.update(cell)
+        else:
+            for i in xrange(i0, i1 + 1):
+                for j in xrange(j0, j1 + 1):
+                    cell = cells.get((i, j))
+                    if cell is not None:
+                        result.update(cell)
+        return result
+
+    def __contains__(self, item):
+        return item in self._extents
+
+    def __len__(self):
+        return len(self._extents)
+
+    def _cell_range(self, bounds):
+        """ Returns the inclusive (i0, j0, i1, j1) range of cells covered by
+        the (x, y, w, h) bounds rectangle.
+        """
+        x, y, w, h = bounds
+        size = self.cell_size
+        return (int(floor(x / size)), int(floor(y / size)),
+                int(floor((x + max(w, 0)) / size)),
+                int(floor((y + max(h, 0)) / size)))
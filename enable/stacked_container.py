@@ -2,7 +2,7 @@
 
 """
 
-from traits.api import Enum, Float
+from traits.api import Enum, Float, on_trait_change
 
 from container import Container
 from stacked_layout import stacked_preferred_size, stack_layout
@@ -26,8 +26,20 @@ class StackedContainer(Container):
     # The amount of space to put between components.
     spacing = Float(0.0)
 
+    # Overrides Container.
+    _layout_follows_components = True
+
     def get_preferred_size(self, components=None):
-        return stacked_preferred_size(self, components)
+        if components is not None:
+            return stacked_preferred_size(self, components)
+        if not self._preferred_size_valid:
+            self._cached_preferred_size = stacked_preferred_size(self)
+            self._preferred_size_valid = True
+        return self._cached_preferred_size
+
+    @on_trait_change('spacing, stack_order, halign')
+    def _stacking_changed(self):
+        self.invalidate_layout()
 
 
 class HStackedContainer(StackedContainer):
@@ -9,11 +9,9 @@ def stacked_preferred_size(container, components=None):
     Overrides Component.
     """
     if container.fixed_preferred_size is not None:
-        container._cached_preferred_size = container.fixed_preferred_size
         return container.fixed_preferred_size
 
     #if container.resizable == "":
-    #    container._cached_preferred_size = container.outer_bounds[:]
     #    return container.outer_bounds
 
     if components is None:
@@ -53,13 +51,11 @@ def stacked_preferred_size(container, components=None):
         max_other_size = container.default_size[other_ndx]
 
     if ndx == 0:
-        container._cached_preferred_size = (total_size + container.hpadding,
-                                       max_other_size + container.vpadding)
+        return (total_size + container.hpadding,
+                max_other_size + container.vpadding)
     else:
-        container._cached_preferred_size = (max_other_size + container.hpadding,
-                                       total_size + container.vpadding)
-
-    return container._cached_preferred_size
+        return (max_other_size + container.hpadding,
+                total_size + container.vpadding)
 
 
 def stack_layout(container, components, align):
@@ -68,11 +64,11 @@ def stack_layout(container, components, align):
 
     size = list(container.bounds)
     if container.fit_components != "":
-        container.get_preferred_size()
+        preferred_size = container.get_preferred_size()
         if "h" in container.fit_components:
-            size[0] = container._cached_preferred_size[0] - container.hpadding
+            size[0] = preferred_size[0] - container.hpadding
         if "v" in container.fit_components:
-            size[1] = container._cached_preferred_size[1] - container.vpadding
+            size[1] = preferred_size[1] - container.vpadding
 
     ndx = container.stack_index
     other_ndx = 1 - ndx
@@ -0,0 +1,36 @@
+import unittest
+
+from enable.base import consolidate_bounds
+
+
+class ConsolidateBoundsTestCase(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(consolidate_bounds([]), [])
+        self.assertEqual(consolidate_bounds([(0, 0, 0, 10), (5, 5, 10, -1)]),
+                         [])
+
+    def test_disjoint_regions_kept(self):
+        regions = consolidate_bounds([(0, 0, 10, 10), (100, 100, 10, 10)])
+        self.assertEqual(sorted(regions),
+                         [(0, 0, 10, 10), (100, 100, 10, 10)])
+
+    def test_overlapping_regions_merged(self):
+        regions = consolidate_bounds([(0, 0, 10, 10), (5, 5, 10, 10),
+                                      (14, 14, 6, 6)])
+        self.assertEqual(regions, [(0, 0, 20, 20)])
+
+    def test_duplicate_regions_merged(self):
+        regions = consolidate_bounds([[10, 20, 30, 40]] * 5)
+        self.assertEqual(regions, [(10, 20, 30, 40)])
+
+    def test_max_regions(self):
+        bounds = [(i * 20, 0, 10, 10) for i in range(10)]
+        self.assertEqual(len(consolidate_bounds(bounds, max_regions=20)), 10)
+        self.assertEqual(consolidate_bounds(bounds, max_regions=4),
+                         [(0, 0, 190, 10)])
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from enable.benchmarks import runner
+from enable.benchmarks.runner import Benchmark, SkipBenchmark
+
+
+def result(seconds):
+    return {'min': seconds, 'median': seconds, 'mean': seconds,
+            'stdev': 0.0, 'number': 1, 'times': [seconds]}
+
+
+class BenchmarkRunnerTestCase(unittest.TestCase):
+
+    def test_time_benchmark(self):
+        calls = {'setup': 0, 'run': 0}
+
+        def setup():
+            calls['setup'] += 1
+            def run():
+                calls['run'] += 1
+            return run
+
+        bench = Benchmark("test.count", setup)
+        result = runner.time_benchmark(bench, warmup=2, repeat=3, number=4)
+        # One setup for each warmup run and each repetition
+        self.assertEqual(calls, {'setup': 5, 'run': 2 + 3 * 4})
+        self.assertEqual(result['number'], 4)
+        self.assertEqual(len(result['times']), 3)
+        self.assertEqual(result['min'], min(result['times']))
+
+    def test_skip(self):
+        def setup():
+            raise SkipBenchmark("not here")
+
+        result = runner.time_benchmark(Benchmark("test.skip", setup))
+        self.assertEqual(result, {'skipped': 'not here'})
+        # Without warmup, the first setup is one of the timed repetitions
+        result = runner.time_benchmark(Benchmark("test.skip", setup),
+                                       warmup=0, number=1)
+        self.assertEqual(result, {'skipped': 'not here'})
+
+    def test_save_and_compare(self):
+        baseline = {'version': runner.FORMAT_VERSION, 'metadata': {},
+                    'benchmarks': {'a': result(1.0), 'b': result(1.0),
+                                   'c': result(1.0), 'd': result(1.0),
+                                   'e': {'skipped': 'no'}}}
+        current = {'version': runner.FORMAT_VERSION, 'metadata': {},
+                   'benchmarks': {'a': result(1.05), 'b': result(1.5),
+                                  'c': result(0.5), 'e': result(1.0),
+                                  'f': result(1.0)}}
+        tempdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tempdir, "baseline.json")
+            runner.save(baseline, filename)
+            baseline = runner.load(filename)
+        finally:
+            shutil.rmtree(tempdir)
+
+        comparisons = runner.compare(baseline, current, threshold=0.1)
+        self.assertEqual([(c.name, c.status) for c in comparisons],
+                         [('a', 'same'), ('b', 'slower'), ('c', 'faster'),
+                          ('d', 'removed'), ('e', 'skipped'), ('f', 'added')])
+        self.assertEqual(comparisons[1].ratio, 1.5)
+
+    def test_suites_register(self):
+        names = [bench.name for bench in runner.get_benchmarks(["*.lines"])]
+        self.assert_("kiva.agg.lines" in names)
+        self.assert_("kiva.pdf.lines" in names)
+        self.assertEqual(
+            [bench.name for bench in runner.get_benchmarks(["enable.layout"])],
+            ["enable.layout"])
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
+
+# EOF
@@ -1,5 +1,9 @@
+from __future__ import with_statement
+
 import unittest
 
+from kiva.image import GraphicsContext
+
 from enable.api import Component, Container
 
 
@@ -84,6 +88,129 @@ class ContainerTestCase(EnableUnitTest):
         return
 
 
+class SpatialIndexTestCase(unittest.TestCase):
+
+    def create_grid(self, n=20, use_spatial_index=True):
+        "Returns a container with an n x n grid of 10x10 components."
+        container = Container(bounds=[n*20.0, n*20.0],
+                              use_spatial_index=use_spatial_index,
+                              spatial_index_cell_size=50.0)
+        for i in range(n):
+            for j in range(n):
+                container.add(Component(position=[i*20.0, j*20.0],
+                                        bounds=[10.0, 10.0]))
+        return container
+
+    def test_components_at(self):
+        indexed = self.create_grid()
+        plain = self.create_grid(use_spatial_index=False)
+        for x, y in [(0, 0), (5, 5), (15, 15), (105, 47), (399, 399)]:
+            self.assertEqual([c.position for c in indexed.components_at(x, y)],
+                             [c.position for c in plain.components_at(x, y)])
+        self.assertEqual(indexed.components_at(45, 45)[0].position,
+                         [40.0, 40.0])
+
+    def test_z_order(self):
+        container = Container(bounds=[100.0, 100.0], use_spatial_index=True)
+        c1 = Component(position=[10.0, 10.0], bounds=[50.0, 50.0])
+        c2 = Component(position=[20.0, 20.0], bounds=[50.0, 50.0])
+        container.add(c1, c2)
+        self.assertEqual(container.components_at(30, 30), [c2, c1])
+        container.raise_component(c1)
+        self.assertEqual(container.components_at(30, 30), [c1, c2])
+
+    def test_move_and_remove(self):
+        container = self.create_grid(n=5)
+        container.bounds = [400.0, 400.0]
+        comp = container.components_at(45, 45)[0]
+        comp.position = [300.0, 300.0]
+        self.assertEqual(container.components_at(45, 45), [])
+        self.assertEqual(container.components_at(305, 305), [comp])
+        comp.bounds = [100.0, 100.0]
+        self.assertEqual(container.components_at(395, 395), [comp])
+        container.remove(comp)
+        self.assertEqual(container.components_at(305, 305), [])
+
+    def test_visible_components(self):
+        indexed = self.create_grid()
+        plain = self.create_grid(use_spatial_index=False)
+        for bounds in [(0, 0, 400, 400), (35, 35, 30, 30), (390, 0, 5, 5)]:
+            self.assertEqual(
+                [c.position for c in indexed._get_visible_components(bounds)],
+                [c.position for c in plain._get_visible_components(bounds)])
+
+    def test_components_in_polygon(self):
+        lasso = [(30, 30), (75, 30), (75, 75)]
+        for use_spatial_index in (True, False):
+            container = self.create_grid(n=5,
+                                         use_spatial_index=use_spatial_index)
+            container.position = [0.0, 10.0]
+            self.assertEqual(
+                [c.position for c in container.components_in_polygon(lasso)],
+                [[40.0, 20.0], [60.0, 20.0], [60.0, 40.0]])
+
+    def test_toggle_index(self):
+        container = self.create_grid(n=3, use_spatial_index=False)
+        self.assert_(container._spatial_index is None)
+        container.use_spatial_index = True
+        self.assertEqual(len(container._spatial_index), 9)
+        container.use_spatial_index = False
+        self.assert_(container._spatial_index is None)
+
+
+class CountingBox(Component):
+    """ Draws a red box and counts how many times it has been drawn. """
+
+    draw_count = 0
+
+    def _draw_mainlayer(self, gc, view_bounds=None, mode="default"):
+        self.draw_count += 1
+        with gc:
+            gc.set_fill_color((1.0, 0.0, 0.0, 1.0))
+            gc.rect(self.x, self.y, self.width, self.height)
+            gc.fill_path()
+
+
+class IncrementalBackbufferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.box1 = CountingBox(position=[10, 10], bounds=[20, 20])
+        self.box2 = CountingBox(position=[100, 100], bounds=[20, 20])
+        self.container = Container(self.box1, self.box2, bounds=[200, 200],
+                                   use_backbuffer=True, fill_padding=True)
+        self.gc = GraphicsContext((200, 200))
+        self.container.draw(self.gc)
+
+    def test_only_damaged_children_redrawn(self):
+        self.box1.invalidate_draw()
+        self.container.draw(self.gc)
+        self.assertEqual(self.box1.draw_count, 2)
+        self.assertEqual(self.box2.draw_count, 1)
+
+    def test_full_invalidate_redraws_everything(self):
+        self.container.invalidate_draw()
+        self.container.draw(self.gc)
+        self.assertEqual(self.box1.draw_count, 2)
+        self.assertEqual(self.box2.draw_count, 2)
+
+    def test_matches_full_render(self):
+        self.box1.position = [60, 40]
+        self.box1.invalidate_draw()
+        self.container.draw(self.gc)
+        partial = self.container._backbuffer.bmp_array.copy()
+
+        self.container.invalidate_draw()
+        self.container.draw(self.gc)
+        full = self.container._backbuffer.bmp_array
+        self.assert_((partial == full).all())
+
+    def test_disabled(self):
+        self.container.incremental_backbuffer = False
+        self.box1.invalidate_draw()
+        self.container.draw(self.gc)
+        self.assertEqual(self.box2.draw_count, 2)
+
+
 if __name__ == "__main__":
     import nose
     nose.main()
@@ -0,0 +1,95 @@
+import json
+import unittest
+
+from kiva.image import GraphicsContext
+
+from enable.api import Component, Container
+from enable.events import KeyEvent, MouseEvent
+from enable import draw_profiler
+from enable.draw_profiler import DrawProfiler
+from enable.profiler_overlay import ProfilerOverlay
+
+
+class TickingClock(object):
+    """ A clock which advances by a second every time it is read. """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 1.0
+        return self.time
+
+
+class DrawProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.container = Container(bounds=[100, 100], id="root")
+        self.box = Component(position=[10, 10], bounds=[20, 20], id="box")
+        self.container.add(self.box)
+        self.container.do_layout()
+        self.gc = GraphicsContext((100, 100))
+        self.profiler = DrawProfiler(clock=TickingClock())
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_draw_tree(self):
+        with self.profiler:
+            self.container.draw(self.gc)
+        self.assert_(draw_profiler.active is None)
+        self.assertEqual(len(self.profiler.frames), 1)
+
+        frame = self.profiler.frames[0]
+        self.assertEqual((frame.label, frame.name, frame.category),
+                         ("Container#root", "draw", "draw"))
+        layers = [child.name for child in frame.children]
+        self.assertEqual(layers, list(self.container.draw_order))
+        background = frame.children[layers.index("background")]
+        self.assertEqual([(span.label, span.name, span.category)
+                          for span in background.children],
+                         [("Component#box", "background", "layer")])
+
+        stacks = self.profiler.folded_stacks().splitlines()
+        self.assert_("Container#root:draw;Container#root:background;"
+                     "Component#box:background 1000000" in stacks)
+        tree = json.loads(self.profiler.to_json())
+        self.assertEqual(tree[0]['duration'], frame.duration)
+        self.assertEqual(self.profiler.slowest(1)[0][0], "Container#root")
+
+    def test_layout_and_dispatch(self):
+        with self.profiler:
+            self.container.invalidate_layout()
+            self.container.do_layout()
+            self.container.dispatch(MouseEvent(x=15, y=15), "left_down")
+        self.assertEqual([(frame.label, frame.name, frame.category)
+                          for frame in self.profiler.frames],
+                         [("Container#root", "layout", "layout"),
+                          ("Container#root", "left_down", "dispatch")])
+
+    def test_inactive(self):
+        self.container.draw(self.gc)
+        self.assertEqual(len(self.profiler.frames), 0)
+
+    def test_overlay_toggle(self):
+        overlay = ProfilerOverlay(self.container, profiler=self.profiler)
+        self.container.overlays.append(overlay)
+        self.assert_(draw_profiler.active is self.profiler)
+        self.container.draw(self.gc)
+        self.container.draw(self.gc)
+        lines = overlay.get_lines()
+        self.assertEqual(len(lines), 3)
+        self.assert_(lines[1].endswith("Container#root"))
+
+        event = KeyEvent(character="p", control_down=True, alt_down=False,
+                         shift_down=False)
+        self.container.dispatch(event, "key_pressed")
+        self.assertFalse(overlay.visible)
+        self.assert_(draw_profiler.active is None)
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
+
+# EOF
@@ -3,12 +3,16 @@
 import copy
 import unittest
 
+# Major library imports
+from numpy import allclose, array, dot
+
 # Enthought library imports
+from kiva import affine
 from traits.api import Any, Tuple
 
 # Enable imports
-from enable.api import BasicEvent, Canvas, Component, Container, \
-        Viewport, AbstractWindow
+from enable.api import BasicEvent, BlobEvent, Canvas, Component, \
+        Container, Viewport, AbstractWindow
 
 
 class EnableUnitTest(unittest.TestCase):
@@ -188,6 +192,40 @@ class EventTransformTestCase(EnableUnitTest):
 
         return
 
+    def test_net_transform(self):
+        """ Tests that the net transform matches the product of the pushed
+        matrices, and that popping restores the position.
+        """
+        transforms = [affine.affine_from_translation(-10, -20),
+                      affine.affine_from_scale(2.0, 0.5),
+                      affine.affine_from_rotation(0.3),
+                      affine.affine_from_translation(5, 7)]
+        event = BasicEvent(x=3, y=4)
+        for transform in transforms:
+            event.push_transform(transform)
+        expected = reduce(dot, transforms[::-1])
+        self.assert_(allclose(event.net_transform(), expected))
+
+        x, y = dot(array((3.0, 4.0, 1.0)), reduce(dot, transforms))[:2]
+        self.assertAlmostEqual(event.x, x)
+        self.assertAlmostEqual(event.y, y)
+
+        event.pop(count=len(transforms))
+        self.assertEqual((event.x, event.y), (3, 4))
+        self.assert_(allclose(event.net_transform(), affine.affine_identity()))
+
+    def test_offset_and_scale(self):
+        event = BlobEvent(x=10, y=20, x0=8, y0=16)
+        event.offset_xy(4, 6, caller="a")
+        event.scale_xy(2.0, 2.0, caller="b")
+        self.assertEqual((event.x, event.y), (3, 7))
+        self.assertEqual((event.x0, event.y0), (2, 5))
+        self.assertEqual(event.dispatch_history, ["a", "b"])
+
+        event.pop(caller="b")
+        self.assertEqual((event.x, event.y), (6, 14))
+        self.assertEqual(event.dispatch_history, ["a"])
+
 
 if __name__ == "__main__":
     import nose
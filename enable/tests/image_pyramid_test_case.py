@@ -0,0 +1,154 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from numpy import random, uint8
+
+from kiva.image import GraphicsContext
+
+from enable.api import ImagePyramid, PyramidImage, Viewport
+
+
+class RecordingGraphicsContext(GraphicsContext):
+    """ Records the images drawn into it instead of drawing them. """
+
+    def __init__(self, *args, **kw):
+        super(RecordingGraphicsContext, self).__init__(*args, **kw)
+        self.images = []
+
+    def draw_image(self, img, rect=None):
+        self.images.append((img, rect))
+
+
+class ImagePyramidTestCase(unittest.TestCase):
+
+    def setUp(self):
+        state = random.RandomState(0)
+        self.pixels = state.randint(0, 256, (100, 70, 4)).astype(uint8)
+        self.pyramid = ImagePyramid(self.pixels, tile_size=16)
+
+    def test_levels(self):
+        self.assertEqual(self.pyramid.level_sizes,
+                         [(70, 100), (35, 50), (18, 25), (9, 13)])
+        self.assertEqual(self.pyramid.level_for_scale(1.0), 0)
+        self.assertEqual(self.pyramid.level_for_scale(0.3), 1)
+        self.assertEqual(self.pyramid.level_for_scale(0.01), 3)
+        self.assertEqual(self.pyramid.level_for_scale(4.0), 0)
+
+    def test_level_0_tiles(self):
+        tile = self.pyramid.tile(0, 4, 6)
+        self.assertEqual(tile.shape, (4, 6, 4))
+        self.assertTrue((tile == self.pixels[96:, 64:]).all())
+
+    def test_downsampled_tiles(self):
+        tile = self.pyramid.tile(1, 0, 0)
+        expected = self.pixels[:32, :32].reshape(16, 2, 16, 2, 4).astype(
+            float).mean(axis=3).mean(axis=1)
+        self.assertTrue(abs(tile - expected).max() <= 0.5)
+
+        # The odd last column of level 1 is padded by repeating it
+        tile = self.pyramid.tile(2, 1, 0)
+        self.assertEqual(tile.shape, (16, 2, 4))
+        below = self.pyramid.tile(1, 2, 0)
+        self.assertEqual(below.shape, (16, 3, 4))
+        self.assertTrue((abs(tile[:8, 1].astype(int) -
+            below[:, 2].reshape(8, 2, 4).mean(axis=1)) <= 0.5).all())
+
+    def test_visible_tiles(self):
+        self.assertEqual(self.pyramid.visible_tiles(0, (10, 20, 10, 5)),
+                         [(0, 1), (1, 1)])
+        self.assertEqual(self.pyramid.visible_tiles(0, (100, 0, 10, 5)), [])
+
+    def test_cache(self):
+        self.pyramid.max_tiles = 3
+        self.pyramid.tile(3, 0, 0)
+        self.assertEqual(len(self.pyramid._tiles), 3)
+        self.assertEqual(self.pyramid._tiles.keys()[-1], (3, 0, 0))
+
+    def test_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            pyramid = ImagePyramid(self.pixels, tile_size=16,
+                                   cache_dir=cache_dir)
+            pyramid.build()
+            expected = pyramid.tile(2, 1, 1)
+
+            pyramid = ImagePyramid(self.pixels, tile_size=16,
+                                   cache_dir=cache_dir)
+            tile = pyramid.tile(2, 1, 1)
+            self.assertTrue(isinstance(tile, numpy.memmap))
+            self.assertTrue((tile == expected).all())
+
+            self.assertRaises(ValueError, ImagePyramid, self.pixels[:50],
+                              tile_size=16, cache_dir=cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+
+
+class PyramidImageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        state = random.RandomState(0)
+        pixels = state.randint(0, 256, (100, 70, 4)).astype(uint8)
+        self.pyramid = ImagePyramid(pixels, tile_size=16)
+        self.image = PyramidImage(pyramid=self.pyramid)
+
+    def test_bounds(self):
+        self.assertEqual(self.image.bounds, [70, 100])
+
+    def test_visible_tiles(self):
+        level, tiles = self.image.visible_tiles(1.0, (0, 0, 20, 20))
+        self.assertEqual(level, 0)
+        # The bottom 20 units are rows 80 to 100 of the image
+        self.assertEqual([tile[:2] for tile in tiles],
+                         [(0, 5), (1, 5), (0, 6), (1, 6)])
+        self.assertEqual(tiles[-1][2], (16, 0, 16, 4))
+
+        level, tiles = self.image.visible_tiles(0.2)
+        self.assertEqual(level, 2)
+        self.assertEqual(len(tiles), 4)
+
+    def test_draw_zoomed_out(self):
+        # Build level 2, and forget the tiles it was built from
+        self.pyramid.build()
+        for key in self.pyramid._tiles.keys():
+            if key[0] != 2:
+                del self.pyramid._tiles[key]
+
+        viewport = Viewport(component=self.image, bounds=[50, 50],
+                            enable_zoom=True, zoom=0.25)
+        gc = RecordingGraphicsContext((50, 50))
+        viewport.draw(gc, view_bounds=(0, 0, 50, 50))
+        self.assertEqual(len(gc.images), 4)
+        self.assertEqual(set(key[0] for key in self.pyramid._tiles), set([2]))
+
+    def test_gray_tiles(self):
+        pixels = numpy.arange(20 * 30, dtype=uint8).reshape(30, 20)
+        image = PyramidImage(pyramid=ImagePyramid(pixels, tile_size=16))
+        gc = RecordingGraphicsContext((20, 30))
+        image.draw(gc)
+        self.assertEqual(len(gc.images), 4)
+        img, rect = gc.images[0]
+        self.assertEqual(img.format(), "rgb24")
+        self.assertEqual(img.bmp_array[0, 0].tolist(), [pixels[0, 0]] * 3)
+
+    def test_bgra_tiles(self):
+        from kiva.agg.image_source import ArraySource
+        # Blue, in BGRA order
+        pixels = numpy.zeros((30, 20, 4), uint8)
+        pixels[..., 0] = pixels[..., 3] = 255
+        pyramid = ImagePyramid(ArraySource(pixels, "bgra32"), tile_size=16)
+        image = PyramidImage(pyramid=pyramid)
+        gc = RecordingGraphicsContext((20, 30))
+        image.draw(gc)
+        self.assertEqual(set(img.format() for img, rect in gc.images),
+                         set(["bgra32"]))
+
+        gc = GraphicsContext((20, 30), pix_format="bgra32")
+        image.draw(gc)
+        self.assertEqual(gc.bmp_array[5, 5].tolist(), [255, 0, 0, 255])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+
+from kiva.image import GraphicsContext
+
+from enable.api import AbstractOverlay, Component, Container
+from enable.stacked_container import HStackedContainer, VStackedContainer
+
+
+class CountingContainer(VStackedContainer):
+    """ A stacked container which counts its layouts and preferred size
+    computations.
+    """
+
+    def __init__(self, counts, **traits):
+        super(CountingContainer, self).__init__(**traits)
+        self.counts = counts
+
+    def _do_layout(self):
+        self.counts['layout'] += 1
+        return super(CountingContainer, self)._do_layout()
+
+    def get_preferred_size(self, components=None):
+        if not self._preferred_size_valid:
+            self.counts['preferred_size'] += 1
+        return super(CountingContainer, self).get_preferred_size(components)
+
+
+class IncrementalLayoutTestCase(unittest.TestCase):
+
+    def create_tree(self, depth, fanout):
+        """ Returns the root of a tree of stacked containers, and the first
+        leaf component.
+        """
+        def create(level):
+            if level == depth:
+                return Component(bounds=[10, 10], resizable="")
+            container = CountingContainer(self.counts, fit_components="hv")
+            container.add(*[create(level + 1) for i in range(fanout)])
+            return container
+
+        self.counts = {'layout': 0, 'preferred_size': 0}
+        root = create(0)
+        root.bounds = list(root.get_preferred_size())
+        root.do_layout()
+        leaf = root
+        while isinstance(leaf, Container):
+            leaf = leaf.components[0]
+        return root, leaf
+
+    def test_leaf_change_lays_out_its_ancestors(self):
+        root, leaf = self.create_tree(depth=4, fanout=4)
+        self.assertFalse(root.layout_needed)
+
+        self.counts.update(layout=0, preferred_size=0)
+        leaf.bounds = [10, 30]
+        self.assert_(root.layout_needed)
+        root.bounds = list(root.get_preferred_size())
+        root.do_layout()
+        # Only the four containers above the leaf are laid out, and only
+        # their preferred sizes are computed again
+        self.assertEqual(self.counts, {'layout': 4, 'preferred_size': 4})
+        self.assertFalse(root.layout_needed)
+
+        parent = leaf.container
+        self.assertEqual(parent.bounds, [10, 60])
+        self.assertEqual([c.y for c in parent.components], [0, 30, 40, 50])
+        self.assertEqual(root.bounds, [10, 256 * 10 + 20])
+
+    def test_hidden_component_is_unstacked(self):
+        root, leaf = self.create_tree(depth=1, fanout=3)
+        root.components[0].visible = False
+        root.do_layout()
+        self.assertEqual([c.y for c in root.components[1:]], [0, 10])
+
+    def test_plain_container_lays_out_invalid_components(self):
+        counts = {'layout': 0, 'preferred_size': 0}
+        stacked = CountingContainer(counts)
+        container = Container(bounds=[100, 100])
+        container.add(Component(), stacked)
+        container.do_layout()
+        self.assertEqual(counts['layout'], 1)
+
+        stacked.spacing = 5.0
+        self.assert_(container.layout_needed)
+        container.do_layout()
+        self.assertEqual(counts['layout'], 2)
+        self.assertFalse(container.layout_needed)
+
+    def test_child_preferred_size_change(self):
+        child = Component(fixed_preferred_size=(50, 20))
+        container = HStackedContainer(fit_components="hv")
+        container.add(child)
+        self.assertEqual(tuple(container.get_preferred_size()), (50, 20))
+        child.fixed_preferred_size = (80, 30)
+        self.assertEqual(tuple(container.get_preferred_size()), (80, 30))
+
+    def test_preferred_size_of_some_components(self):
+        a = Component(fixed_preferred_size=(50, 20))
+        b = Component(fixed_preferred_size=(30, 40))
+        container = HStackedContainer(fit_components="hv")
+        container.add(a, b)
+        self.assertEqual(tuple(container.get_preferred_size()), (80, 40))
+        self.assertEqual(tuple(container.get_preferred_size([a])), (50, 20))
+        self.assertEqual(tuple(container.get_preferred_size()), (80, 40))
+
+
+class CountingOverlay(AbstractOverlay):
+    """ An overlay which counts its layouts. """
+
+    layouts = 0
+
+    def do_layout(self, *args, **kw):
+        self.layouts += 1
+        super(CountingOverlay, self).do_layout(*args, **kw)
+
+
+class OverlayLayoutTestCase(unittest.TestCase):
+
+    def test_overlays_laid_out_with_component(self):
+        component = Component(bounds=[10, 10])
+        overlay = CountingOverlay(component)
+        component.overlays.append(overlay)
+        component.do_layout()
+        self.assertFalse(overlay.layout_needed)
+        component.bounds = [20, 20]
+        component.do_layout()
+        self.assertEqual(overlay.layouts, 2)
+
+    def test_viewport_toolbar(self):
+        from enable.tools.toolbars.viewport_toolbar import ViewportToolbar
+        component = Component(bounds=[100, 100])
+        toolbar = ViewportToolbar(component)
+        component.overlays.append(toolbar)
+        gc = GraphicsContext((100, 100))
+        component.draw(gc)
+        self.assertEqual(toolbar.width, 100)
+        self.assertEqual(toolbar.y, 71)
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
+
+# EOF
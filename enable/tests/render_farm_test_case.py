@@ -0,0 +1,101 @@
+import time
+import unittest
+
+from numpy import fromstring, uint8
+
+from enable.api import Component, Container
+from enable.render_farm import RenderFarm, RenderJob, render_component, \
+     run_job
+
+
+def make_container(size):
+    container = Container(bounds=[40, 30], bgcolor="transparent")
+    container.add(Component(position=[10, 10], bounds=[size, size],
+                            bgcolor="red"))
+    return container
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+class RenderJobTestCase(unittest.TestCase):
+
+    def test_render_component(self):
+        container = make_container(5)
+        container.position = [100, 100]
+        gc = render_component(container)
+        self.assertEqual((gc.width(), gc.height()), (40, 30))
+        # The red box is drawn relative to the container
+        pixels = gc.bmp_array
+        self.assertEqual(pixels[30 - 12, 12].tolist(), [0, 0, 255, 255])
+        self.assertEqual(pixels[30 - 5, 5].tolist(), [255, 255, 255, 255])
+
+    def test_run_job(self):
+        result = run_job(RenderJob(factory=make_container, args=(5,),
+                                   format="raw", job_id="a"))
+        self.assertEqual(result.error, None)
+        self.assertEqual((result.job_id, result.size, result.pix_format),
+                         ("a", (40, 30), "bgra32"))
+        pixels = fromstring(result.data, uint8).reshape(30, 40, 4)
+        self.assertEqual(pixels[30 - 12, 12].tolist(), [0, 0, 255, 255])
+
+    def test_errors_are_reported(self):
+        result = run_job(RenderJob(factory="enable.api:NoSuchFactory"))
+        self.assert_(result.data is None)
+        self.assert_("AttributeError" in result.error)
+        self.assertRaises(ValueError, RenderJob)
+        self.assertRaises(ValueError, RenderJob, factory=make_container,
+                          format="gif")
+
+
+class RenderFarmTestCase(unittest.TestCase):
+
+    def test_render(self):
+        jobs = [RenderJob(factory=make_container, args=(i,), format="raw")
+                for i in range(1, 6)]
+        jobs.append(RenderJob(component=make_container(3), format="raw",
+                              job_id="pickled"))
+        with RenderFarm(processes=2, max_pending=2) as farm:
+            results = list(farm.render(iter(jobs)))
+        self.assertEqual(sorted(result.job_id for result in results),
+                         [0, 1, 2, 3, 4, "pickled"])
+        for result in results:
+            self.assertEqual(result.error, None)
+            self.assertEqual(len(result.data), 40 * 30 * 4)
+
+    def test_timeout(self):
+        with RenderFarm(processes=1, timeout=0.2) as farm:
+            start = time.time()
+            result = farm.render_one(RenderJob(factory=sleep, args=(5,)))
+            self.assert_(time.time() - start < 2.0)
+            self.assert_("RenderTimeout" in result.error)
+            # The worker is free for the next job
+            result = farm.render_one(RenderJob(factory=make_container,
+                                               args=(1,), format="raw"))
+            self.assertEqual(result.error, None)
+
+    def test_unpicklable_job(self):
+        with RenderFarm(processes=1) as farm:
+            job = RenderJob(factory=lambda: Component(bounds=[10, 10]))
+            result = farm.render_one(job)
+            self.assertEqual(result.job_id, job.job_id)
+            self.assert_("PicklingError" in result.error)
+
+    def test_lost_worker(self):
+        with RenderFarm(processes=1) as farm:
+            start = time.time()
+            result = farm.render_one(RenderJob(factory="os:_exit", args=(1,)))
+            self.assert_(time.time() - start < 5.0)
+            self.assert_("RenderWorkerLost" in result.error)
+            # The pool replaces the worker
+            result = farm.render_one(RenderJob(factory=make_container,
+                                               args=(1,), format="raw"))
+            self.assertEqual(result.error, None)
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
+
+# EOF
@@ -0,0 +1,89 @@
+import unittest
+
+from numpy import array
+
+from kiva.image import GraphicsContext
+
+from enable.text_grid import TextGrid, TextGridSource
+
+
+class CountingSource(TextGridSource):
+    """ A lazy grid whose cells show their own row and column.
+    """
+
+    def __init__(self, shape, **traits):
+        super(CountingSource, self).__init__(**traits)
+        self.shape = shape
+        self.requests = []
+
+    def get_shape(self):
+        return self.shape
+
+    def get_strings(self, rows, columns):
+        self.requests.append((rows, columns))
+        return [['%d,%d' % (j, i) for i in range(*columns.indices(self.shape[1]))]
+                for j in range(*rows.indices(self.shape[0]))]
+
+
+class TextGridTestCase(unittest.TestCase):
+
+    def create_grid(self, **traits):
+        grid = TextGrid(cell_size=(20, 10), cell_padding=0,
+                        cell_border_width=0, **traits)
+        self.drawn = []
+        grid._show_text_at_points = lambda gc, strings, points: \
+            self.drawn.append(zip(strings, points.tolist()))
+        return grid
+
+    def test_visible_cells(self):
+        strings = array([['a', 'b', 'c'], ['d', 'e', 'f'], ['g', 'h', 'i']])
+        grid = self.create_grid(string_array=strings)
+        self.assertEqual(grid.bounds, [60, 30])
+        self.assertEqual(grid._get_visible_cells(None), (0, 3, 0, 3))
+        # The bottom right cell
+        self.assertEqual(grid._get_visible_cells((45, 5, 10, 3)),
+                         (2, 3, 2, 3))
+        # Rows are numbered from the top
+        self.assertEqual(grid._get_visible_cells((10, 15, 20, 20)),
+                         (0, 2, 0, 2))
+        self.assertEqual(grid._get_visible_cells((100, 0, 10, 10))[2:],
+                         (3, 3))
+
+    def test_draws_visible_cells(self):
+        source = CountingSource((10000, 10))
+        grid = self.create_grid(data_source=source)
+        self.assertEqual(grid.bounds, [200, 100000])
+        grid.selected_cells = [(1, 9998), (5, 5)]
+
+        # Leave out the descent of the font from the text positions
+        grid._text_offset = array([0.0, 0.0])
+        del source.requests[:]
+        gc = GraphicsContext((50, 20))
+        grid._draw_mainlayer(gc, view_bounds=(5, 10, 30, 15))
+        self.assertEqual(source.requests,
+                         [(slice(9997, 9999), slice(0, 2))])
+        self.assertEqual(self.drawn, [
+            [('9997,0', [0.0, 20.0]), ('9997,1', [20.0, 20.0]),
+             ('9998,0', [0.0, 10.0])],
+            [('9998,1', [20.0, 10.0])]])
+
+    def test_data_changed(self):
+        source = CountingSource((2, 2))
+        grid = self.create_grid(data_source=source)
+        del source.requests[:]
+        source.shape = (4, 2)
+        source.data_changed = True
+        self.assertEqual(grid.bounds, [40, 40])
+        # The cells have a fixed size, so the strings are not measured
+        self.assertEqual(source.requests, [])
+
+        grid.cell_size = "auto"
+        self.assertNotEqual(source.requests, [])
+        self.assertNotEqual(grid.bounds, [40, 40])
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
+
+# EOF
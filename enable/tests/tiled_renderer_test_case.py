@@ -0,0 +1,51 @@
+from __future__ import with_statement
+
+import unittest
+
+from kiva.image import GraphicsContext
+
+from enable.api import Component, Container
+from enable.tiled_renderer import TiledRenderer
+
+
+class Box(Component):
+
+    def _draw_mainlayer(self, gc, view_bounds=None, mode="default"):
+        with gc:
+            gc.set_fill_color((1.0, 0.0, 0.0, 1.0))
+            gc.rect(self.x, self.y, self.width, self.height)
+            gc.fill_path()
+
+
+class TiledRendererTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.container = Container(bounds=[50, 60], bgcolor="lightgray",
+                                   fill_padding=True)
+        for i in range(10):
+            self.container.add(Box(position=[i * 5, i * 6], bounds=[8, 9]))
+
+    def test_matches_single_pass(self):
+        reference = GraphicsContext((50, 60))
+        self.container.draw(reference)
+
+        gc = GraphicsContext((50, 60))
+        renderer = TiledRenderer(component=self.container, tile_height=7,
+                                 num_threads=3)
+        renderer.render(gc)
+        self.assert_((gc.bmp_array == reference.bmp_array).all())
+
+    def test_tiles_cover_target(self):
+        gc = GraphicsContext((50, 60))
+        renderer = TiledRenderer(component=self.container, tile_height=25)
+        tiles = renderer._create_tiles(gc)
+        self.assertEqual([(y, h) for tile_gc, y, h in tiles],
+                         [(0, 25), (25, 25), (50, 10)])
+        for tile_gc, y, h in tiles:
+            self.assertEqual(tile_gc.width(), 50)
+            self.assertEqual(tile_gc.height(), h)
+
+
+if __name__ == "__main__":
+    import nose
+    nose.main()
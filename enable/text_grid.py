@@ -5,11 +5,11 @@ TextGrid is a text grid widget that is meant to be used with Numpy.
 from __future__ import with_statement
 
 # Major library imports
-from numpy import arange, array, dstack, repeat, newaxis
+from numpy import arange, array, asarray, empty, newaxis, searchsorted, zeros
 
 # Enthought library imports
-from traits.api import Any, Array, Bool, Int, List, Property, \
-    Trait, Tuple, on_trait_change
+from traits.api import Any, Array, Bool, Event, HasTraits, Instance, Int, \
+    List, Property, Trait, Tuple, on_trait_change
 from kiva.trait_defs.kiva_font_trait import KivaFont
 
 # Relative imports
@@ -19,15 +19,53 @@ from enable_traits import LineStyle
 from font_metrics_provider import font_metrics_provider
 
 
+# The number of rows read from a data source at a time when measuring the
+# strings of the whole grid.
+MEASURE_BLOCK_ROWS = 1000
+
+# The text measured for the offset of the text in its cell, when the cells
+# have a fixed size.  It reaches below the baseline like most fonts do.
+FONT_SAMPLE = "Mgjpqy|"
+
+
+class TextGridSource(HasTraits):
+    """
+    Supplies the strings of a TextGrid, so that the grid never has to hold
+    all of its strings in a single array.
+
+    Subclasses implement get_shape() and get_strings(), and fire
+    data_changed whenever the strings or the shape change.
+    """
+
+    # Fired when the strings of the grid have changed
+    data_changed = Event
+
+    def get_shape(self):
+        """ Returns the (rows, columns) of the grid.
+        """
+        raise NotImplementedError
+
+    def get_strings(self, rows, columns):
+        """ Returns a 2D array (or a list of lists) of the strings in the
+        *rows* and *columns* slices of the grid.
+        """
+        raise NotImplementedError
+
 
 class TextGrid(Component):
     """
     A 2D grid of string values
+
+    Only the cells which intersect the view bounds are drawn, so that large
+    grids can be scrolled in a Viewport.
     """
 
     # A 2D array of strings
     string_array = Array
 
+    # An object which supplies the strings instead of string_array
+    data_source = Instance(TextGridSource)
+
     # The cell size can be set to a tuple (w,h) or to "auto".
     cell_size = Property
 
@@ -75,9 +113,17 @@ class TextGrid(Component):
     # The maximum (leading, descent) of all the text strings (positive value)
     _text_offset = Array
 
-    # An array NxMx2 of the x,y positions of the lower-left coordinates of
-    # each cell
-    _cached_cell_coords = Array
+    # The x positions of the left edges of the columns, followed by the right
+    # edge of the last one, relative to the x position of the grid
+    _cached_x_coords = Array
+
+    # The y positions of the bottom edges of the rows from the last row to the
+    # first one, followed by the top edge of the first row, relative to the
+    # y position of the grid
+    _cached_y_coords = Array
+
+    # The set of the (i,j) tuples in selected_cells
+    _selection = Instance(set, ())
 
     # "auto" or a tuple
     _cell_size = Trait("auto", Any)
@@ -96,6 +142,11 @@ class TextGrid(Component):
     #------------------------------------------------------------------------
 
     def _draw_mainlayer(self, gc, view_bounds=None, mode="default"):
+        shape = self._get_shape()
+        if shape is None:
+            return
+        numrows, numcols = shape
+
         text_color = self.text_color_
         highlight_color = self.highlight_color_
         highlight_bgcolor = self.highlight_bgcolor_
@@ -107,41 +158,58 @@ class TextGrid(Component):
             gc.set_fill_color(text_color)
             gc.set_font(self.font)
             gc.set_text_position(0,0)
-    
+
             width, height = self._get_actual_cell_size()
-            numrows, numcols = self.string_array.shape
-    
+            cell_width = width + 2*padding + border_width
+            cell_height = height + 2*padding + border_width
+            row_start, row_end, col_start, col_end = \
+                self._get_visible_cells(view_bounds)
+            rows = row_end - row_start
+            cols = col_end - col_start
+            if rows <= 0 or cols <= 0:
+                return
+
+            # The lower-left corners of the visible cells
+            x_coords = self._cached_x_coords[col_start:col_end] + self.x
+            y_coords = self._cached_y_coords[numrows-1 -
+                                    arange(row_start, row_end)] + self.y
+
+            selected = zeros((rows, cols), dtype=bool)
+            for i, j in self._selection:
+                if col_start <= i < col_end and row_start <= j < row_end:
+                    selected[j-row_start, i-col_start] = True
+
             # draw selected backgrounds
             # XXX should this be in the background layer?
-            for j, row in enumerate(self.string_array):
-                for i, text in enumerate(row):
-                    if (i,j) in self.selected_cells:
-                        gc.set_fill_color(highlight_bgcolor)
-                        ll_x, ll_y = self._cached_cell_coords[i,j+1]
-                        # render this a bit big, but covered by border
-                        gc.rect(ll_x, ll_y,
-                            width+2*padding + border_width,
-                            height+2*padding + border_width)
-                        gc.fill_path()
-                        gc.set_fill_color(text_color)
-    
-            self._draw_grid_lines(gc)
-    
-            for j, row in enumerate(self.string_array):
-                for i, text in enumerate(row):
-                    x,y = self._cached_cell_coords[i,j+1] + self._text_offset + \
-                        padding + border_width/2.0
-    
-                    if (i,j) in self.selected_cells:
-                        gc.set_fill_color(highlight_color)
-                        gc.set_stroke_color(highlight_color)
-                        gc.set_text_position(x, y)
-                        gc.show_text(text)
-                        gc.set_stroke_color(text_color)
-                        gc.set_fill_color(text_color)
-                    else:
-                        gc.set_text_position(x, y)
-                        gc.show_text(text)
+            if selected.any():
+                gc.set_fill_color(highlight_bgcolor)
+                for j, i in zip(*selected.nonzero()):
+                    # render this a bit big, but covered by border
+                    gc.rect(x_coords[i], y_coords[j], cell_width, cell_height)
+                gc.fill_path()
+                gc.set_fill_color(text_color)
+
+            self._draw_grid_lines(gc, view_bounds, row_start, row_end,
+                                  col_start, col_end)
+
+            # Lay out the text of the visible cells, then draw the unselected
+            # and the highlighted cells with one call each.
+            offset = self._text_offset + padding + border_width/2.0
+            points = empty((rows, cols, 2))
+            points[:,:,0] = x_coords + offset[0]
+            points[:,:,1] = (y_coords + offset[1])[:,newaxis]
+            points = points.reshape(-1, 2)
+            strings = asarray(self._get_strings(slice(row_start, row_end),
+                                    slice(col_start, col_end))).ravel()
+            selected = selected.ravel()
+
+            self._show_text_at_points(gc, strings[~selected].tolist(),
+                                      points[~selected])
+            if selected.any():
+                gc.set_fill_color(highlight_color)
+                gc.set_stroke_color(highlight_color)
+                self._show_text_at_points(gc, strings[selected].tolist(),
+                                          points[selected])
 
         return
 
@@ -149,37 +217,112 @@ class TextGrid(Component):
     # Private methods
     #------------------------------------------------------------------------
 
+    def _get_shape(self):
+        """ Returns the (rows, columns) of the grid, or None if there is no
+        data.
+        """
+        if self.data_source is not None:
+            return tuple(self.data_source.get_shape())
+        if self.string_array is not None and len(self.string_array.shape) == 2:
+            return self.string_array.shape
+        return None
+
+    def _get_strings(self, rows, columns):
+        """ Returns the strings in the *rows* and *columns* slices.
+        """
+        if self.data_source is not None:
+            return self.data_source.get_strings(rows, columns)
+        return self.string_array[rows, columns]
+
+    def _get_unique_strings(self):
+        """ Returns the set of the distinct strings in the grid.
+        """
+        strings = set()
+        shape = self._get_shape()
+        if shape is None:
+            return strings
+        numrows, numcols = shape
+        if self.data_source is None:
+            strings.update(self.string_array.ravel().tolist())
+            return strings
+        for start in xrange(0, numrows, MEASURE_BLOCK_ROWS):
+            rows = slice(start, min(start + MEASURE_BLOCK_ROWS, numrows))
+            block = self._get_strings(rows, slice(0, numcols))
+            strings.update(asarray(block).ravel().tolist())
+        return strings
+
+    def _get_visible_cells(self, view_bounds):
+        """ Returns the (row_start, row_end, col_start, col_end) of the cells
+        which intersect view_bounds.
+        """
+        numrows, numcols = self._get_shape()
+        if view_bounds is None or len(self._cached_x_coords) != numcols+1 \
+                or len(self._cached_y_coords) != numrows+1:
+            return 0, numrows, 0, numcols
+
+        x, y, width, height = view_bounds
+        x_coords = self._cached_x_coords + self.x
+        y_coords = self._cached_y_coords + self.y
+        col_start = max(searchsorted(x_coords, x, "right") - 1, 0)
+        col_end = min(searchsorted(x_coords, x + width), numcols)
+        # The rows are numbered from the top
+        bottom = max(searchsorted(y_coords, y, "right") - 1, 0)
+        top = min(searchsorted(y_coords, y + height), numrows)
+        return numrows - top, numrows - bottom, col_start, col_end
+
+    def _show_text_at_points(self, gc, strings, points):
+        if hasattr(gc, "show_text_at_points"):
+            gc.show_text_at_points(strings, points)
+        else:
+            for text, (x, y) in zip(strings, points):
+                gc.set_text_position(x, y)
+                gc.show_text(text)
+        return
 
-    def _draw_grid_lines(self, gc):
+    def _draw_grid_lines(self, gc, view_bounds, row_start, row_end,
+                         col_start, col_end):
         gc.set_stroke_color(self.cell_border_color_)
         gc.set_line_dash(self.cell_border_style_)
         gc.set_line_width(self.cell_border_width)
 
-        # Skip the leftmost and bottommost cell coords (since Y axis is reversed,
-        # the bottommost coord is the last one)
-        x_points = self._cached_cell_coords[:,0,0]
-        y_points = self._cached_cell_coords[0,:,1]
+        numrows = len(self._cached_y_coords) - 1
+        x_points = self._cached_x_coords[col_start:col_end+1] + self.x
+        y_points = self._cached_y_coords[numrows-row_end:
+                                         numrows-row_start+1] + self.y
+
+        x_min, y_min = self.position
+        x_max = x_min + self.width
+        y_max = y_min + self.height
+        if view_bounds is not None:
+            x, y, width, height = view_bounds
+            x_min, x_max = max(x_min, x), min(x_max, x + width)
+            y_min, y_max = max(y_min, y), min(y_max, y + height)
 
         for x in x_points:
-            gc.move_to(x, self.y)
-            gc.line_to(x, self.y+self.height)
-            gc.stroke_path()
+            gc.move_to(x, y_min)
+            gc.line_to(x, y_max)
 
         for y in y_points:
-            gc.move_to(self.x, y)
-            gc.line_to(self.x+self.width, y)
-            gc.stroke_path()
+            gc.move_to(x_min, y)
+            gc.line_to(x_max, y)
+        gc.stroke_path()
         return
 
     def _compute_cell_sizes(self):
         if not self._cache_valid:
             gc = font_metrics_provider()
+            gc.set_font(self.font)
+            if self._cell_size == "auto":
+                texts = self._get_unique_strings()
+            else:
+                # Only the text offset is needed, so measure the font rather
+                # than every string of the grid
+                texts = [FONT_SAMPLE]
             max_w = 0
             max_h = 0
             min_l = 0
             min_d = 0
-            for text in self.string_array.ravel():
-                gc.set_font(self.font)
+            for text in texts:
                 l, d, w, h = gc.get_text_extent(text)
                 if -l+w > max_w:
                     max_w = -l+w
@@ -196,30 +339,26 @@ class TextGrid(Component):
         return
 
     def _compute_positions(self):
-
-        if self.string_array is None or len(self.string_array.shape) != 2:
+        shape = self._get_shape()
+        if shape is None:
             return
 
         width, height = self._get_actual_cell_size()
-        numrows, numcols = self.string_array.shape
+        numrows, numcols = shape
 
         cell_width = width + 2*self.cell_padding + self.cell_border_width
         cell_height = height + 2*self.cell_padding + self.cell_border_width
 
-        x_points = arange(numcols+1) * cell_width + self.cell_border_width/2.0 + self.x
-        y_points = arange(numrows+1) * cell_height + self.cell_border_width/2.0 + self.y
-
-        tmp = dstack((repeat(x_points[:,newaxis], numrows+1, axis=1),
-                      repeat(y_points[:,newaxis].T, numcols+1, axis=0)))
-
-        # We have to reverse the y-axis (e.g. the 0th row needs to be at the
-        # highest y-position).
-        self._cached_cell_coords = tmp[:,::-1]
+        self._cached_x_coords = arange(numcols+1) * cell_width + \
+                                    self.cell_border_width/2.0
+        self._cached_y_coords = arange(numrows+1) * cell_height + \
+                                    self.cell_border_width/2.0
         return
 
     def _update_bounds(self):
-        if self.string_array is not None and len(self.string_array.shape) == 2:
-            rows, cols = self.string_array.shape
+        shape = self._get_shape()
+        if shape is not None:
+            rows, cols = shape
             margin = 2*self.cell_padding + self.cell_border_width
             width, height = self._get_actual_cell_size()
             self.bounds = [ cols * (width + margin) + self.cell_border_width,
@@ -252,11 +391,10 @@ class TextGrid(Component):
         width, height = array(self._get_actual_cell_size()) + 2*self.cell_padding \
                             + self.cell_border_width
 
-        numrows, numcols = self.string_array.shape
+        numrows, numcols = self._get_shape()
         i = int((x - self.padding_left) / width)
         j = numrows - (int((y - self.padding_bottom)/ height) + 1)
-        shape = self.string_array.shape
-        if 0 <= i < shape[1] and 0 <= j < shape[0]:
+        if 0 <= i < numcols and 0 <= j < numrows:
             return i,j
         else:
             return None
@@ -272,6 +410,19 @@ class TextGrid(Component):
         self._compute_positions()
         self._update_bounds()
 
+    @on_trait_change('data_source, data_source:data_changed')
+    def _data_source_updated(self):
+        self._cache_valid = False
+        self._compute_cell_sizes()
+        self._compute_positions()
+        self._update_bounds()
+        self.request_redraw()
+
+    @on_trait_change('selected_cells, selected_cells_items')
+    def _update_selection(self):
+        self._selection = set(tuple(cell) for cell in self.selected_cells
+                              if cell is not None)
+
     @on_trait_change('cell_border_width,cell_padding')
     def cell_properties_changed(self):
         self._compute_positions()
@@ -279,6 +430,7 @@ class TextGrid(Component):
 
     def _set_cell_size(self, newsize):
         self._cell_size = newsize
+        self._cache_valid = False
         if newsize == "auto":
             self._compute_cell_sizes()
         self._compute_positions()
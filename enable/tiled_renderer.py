@@ -0,0 +1,113 @@
+""" Defines the TiledRenderer class, which draws a component into a large
+kiva.agg GraphicsContextArray using several threads.
+"""
+
+from __future__ import with_statement
+
+# Major library imports
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+# Enthought library imports
+from kiva.agg import GraphicsContextArray
+from traits.api import HasTraits, Instance, Int
+
+# Local, relative imports
+from component import Component
+
+
+class TiledRenderer(HasTraits):
+    """ Renders a component into a GraphicsContextArray as a stack of
+    horizontal strips that are drawn in parallel.
+
+    Each strip is a GraphicsContextArray wrapping a view of the target's
+    **bmp_array**, so no pixels are copied.  The component is drawn into each
+    strip with **view_bounds** set to the strip, so containers only draw the
+    children that overlap it.  The Agg rasterizer releases the GIL while it
+    fills and strokes, so the strips render concurrently.
+
+    Every strip walks the component tree, so large containers should set
+    **use_spatial_index**.  Because Agg clips paths to each strip, antialiased
+    pixels along strip edges may differ by one level from a single-pass
+    render.
+
+    The strips start out with an identity transform; any transform or clip
+    set on the target context is ignored.  Components are drawn from several
+    threads at once, so the tree must not be modified while rendering, and
+    components that keep backbuffers may build them more than once.
+    """
+
+    # The component to render
+    component = Instance(Component)
+
+    # The height of each strip, in pixels
+    tile_height = Int(256)
+
+    # The number of worker threads.  If 0, one thread is used per CPU.
+    num_threads = Int(0)
+
+    def render(self, gc, mode="default"):
+        """ Draws the component into *gc*, which must be a
+        kiva.agg.GraphicsContextArray.
+        """
+        component = self.component
+        if component is None:
+            return
+
+        # Layout is not thread safe, so make sure it is done up front
+        if component.layout_needed:
+            component.do_layout()
+
+        tiles = self._create_tiles(gc)
+        num_threads = self.num_threads or cpu_count()
+        if num_threads <= 1 or len(tiles) <= 1:
+            for tile in tiles:
+                self._render_tile(tile, mode)
+            return
+
+        pool = ThreadPool(min(num_threads, len(tiles)))
+        try:
+            pool.map(lambda tile: self._render_tile(tile, mode), tiles)
+        finally:
+            pool.close()
+            pool.join()
+        return
+
+    #------------------------------------------------------------------------
+    # Private methods
+    #------------------------------------------------------------------------
+
+    def _create_tiles(self, gc):
+        """ Returns a list of (tile_gc, y, height) tuples covering *gc*, where
+        y and height give the strip's extent in *gc*'s coordinates.
+        """
+        ary = gc.bmp_array
+        width = gc.width()
+        height = gc.height()
+        pix_format = gc.format()
+        interpolation = gc.get_image_interpolation()
+        bottom_up = gc.bottom_up()
+        tile_height = max(self.tile_height, 1)
+
+        tiles = []
+        for y in range(0, height, tile_height):
+            h = min(tile_height, height - y)
+            if bottom_up:
+                # Row 0 of the array is the top of the image
+                view = ary[height - y - h:height - y]
+            else:
+                view = ary[y:y + h]
+            tile_gc = GraphicsContextArray(view, pix_format=pix_format,
+                                           interpolation=interpolation,
+                                           bottom_up=bottom_up)
+            tiles.append((tile_gc, y, h))
+        return tiles
+
+    def _render_tile(self, tile, mode):
+        tile_gc, y, h = tile
+        component = self.component
+        with tile_gc:
+            tile_gc.translate_ctm(0, -y)
+            component.draw(tile_gc, view_bounds=(0, y, tile_gc.width(), h),
+                           mode=mode)
+        return
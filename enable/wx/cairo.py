@@ -32,13 +32,9 @@ class Window(BaseWindow):
         control = self.control
         pixel_map = self._gc.pixel_map
         wdc = control._dc = wx.PaintDC(control)
-        self._update_region = None
-        if self._update_region is not None:
-            update_bounds = reduce(union_bounds, self._update_region)
-            pixel_map.draw_to_wxwindow(control, int(update_bounds[0]), int(update_bounds[1]),
-                                       width=int(update_bounds[2]), height=int(update_bounds[3]))
-        else:
-            pixel_map.draw_to_wxwindow(control, 0, 0)
+        # The paint DC is already clipped to the area passed to Refresh() by
+        # _redraw(), so only the damaged regions reach the screen.
+        pixel_map.draw_to_wxwindow(control, 0, 0)
 
         control._dc = None
         return
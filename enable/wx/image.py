@@ -59,11 +59,33 @@ class Window(BaseWindow):
             # This should just be the Mac OS X code path
             bmp = _wx_bitmap_from_buffer(pixel_map.convert_to_argb32string(),
                                          self._gc.width(), self._gc.height())
-            wdc.DrawBitmap(bmp, 0, 0)
+            if self._update_region is None:
+                wdc.DrawBitmap(bmp, 0, 0)
+            else:
+                # Only blit the damaged regions; the rest of the window
+                # contents are still valid.
+                for x, y, dx, dy in self._update_region:
+                    rect = self._damaged_wx_rect(x, y, dx, dy)
+                    if rect is not None:
+                        wdc.DrawBitmap(bmp.GetSubBitmap(rect),
+                                       rect.GetX(), rect.GetY())
 
         control._dc = None
         return
 
+    def _damaged_wx_rect(self, x, y, dx, dy):
+        """ Converts a damaged region in Kiva coordinates into a wx.Rect
+        clipped to the GC, or None if the two do not overlap.
+        """
+        width, height = self._gc.width(), self._gc.height()
+        xl = max(int(x), 0)
+        xr = min(int(x + dx) + 1, width)
+        top = max(self._flip_y(y + dy), 0)
+        bottom = min(self._flip_y(y) + 2, height)
+        if xr <= xl or bottom <= top:
+            return None
+        return wx.Rect(xl, top, xr - xl, bottom - top)
+
 
 def font_metrics_provider():
     from kiva.fonttools import Font
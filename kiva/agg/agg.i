@@ -2,6 +2,11 @@
 /* File : example.i */
 %module agg
 
+// setup.py builds this module with -threads.  Hold the GIL by default; the
+// rasterizing methods of GraphicsContextArray release it so that separate
+// contexts can render from several threads.
+%nothread;
+
 #if (SWIG_VERSION > 0x010322)
 %feature("compactdefaultargs");
 #endif // (SWIG_VERSION > 0x010322)
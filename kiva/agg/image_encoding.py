@@ -0,0 +1,250 @@
+""" Encodes the pixels of a GraphicsContextArray into image files without
+copying them more than once.
+
+PIL reads the pixels straight out of **bmp_array** through the buffer
+protocol, and reorders their channels while it unpacks them into its own
+image, so no converted copy of the context is made first.  When PIL is not
+installed, PNG files are written by a built-in encoder, which converts the
+channels a block of rows at a time.
+
+Encoding can also run on a pool of threads, so that a batch exporter can
+draw one frame while the previous one is being encoded::
+
+    encoder = ImageEncoder()
+    results = []
+    for frame in frames:
+        gc = GraphicsContextArray(size)
+        draw(frame, gc)
+        results.append(encoder.save(gc, "frame%04d.png" % frame))
+    for result in results:
+        result.get()
+    encoder.close()
+"""
+
+from __future__ import with_statement
+
+import struct
+import zlib
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+from numpy import ascontiguousarray, empty, uint8
+
+try:
+    from PIL import Image as PilImage
+except ImportError:
+    try:
+        import Image as PilImage
+    except ImportError:
+        PilImage = None
+
+# The formats which can't store an alpha channel, by file extension
+FORMATS_WITHOUT_ALPHA = ("jpg", "jpeg", "bmp", "eps")
+
+# For each pixel format: the PIL image mode with and without alpha, the
+# PIL raw modes which unpack the pixels into those modes, and the indices
+# of the red, green, blue and alpha channels in a pixel.
+_pixel_formats = {
+    "rgba32": ("RGBA", "RGB", "RGBA", "RGBX", (0, 1, 2, 3)),
+    "bgra32": ("RGBA", "RGB", "BGRA", "BGRX", (2, 1, 0, 3)),
+    "argb32": ("RGBA", "RGB", "ARGB", "XRGB", (1, 2, 3, 0)),
+    "abgr32": ("RGBA", "RGB", "ABGR", "XBGR", (3, 2, 1, 0)),
+    "rgb24": ("RGB", "RGB", "RGB", "RGB", (0, 1, 2)),
+    "bgr24": ("RGB", "RGB", "BGR", "BGR", (2, 1, 0)),
+    "gray8": ("L", "L", "L", "L", (0,)),
+}
+
+# The number of rows the built-in PNG encoder converts at a time
+PNG_CHUNK_ROWS = 64
+
+
+def has_alpha(file_format):
+    """ Returns whether images saved in *file_format* (a file extension,
+    without the dot) keep their alpha channel.
+    """
+    return file_format.lower() not in FORMATS_WITHOUT_ALPHA
+
+
+def pil_image(gc, alpha=True):
+    """ Returns a PIL image of the pixels of *gc*.
+
+    The pixels are read from the **bmp_array** of *gc* without an
+    intermediate copy.  If *alpha* is False, or *gc* has no alpha channel,
+    the image is RGB; otherwise it is RGBA.
+    """
+    if PilImage is None:
+        raise ImportError("PIL is required to convert a GraphicsContext "
+                          "into an image")
+    mode, rgb_mode, raw_mode, rgb_raw_mode, channels = _pixel_format(gc)
+    if not alpha:
+        mode, raw_mode = rgb_mode, rgb_raw_mode
+    size = (gc.width(), gc.height())
+    pixels = ascontiguousarray(gc.bmp_array)
+    return PilImage.frombuffer(mode, size, pixels, "raw", raw_mode, 0, 1)
+
+
+def encode(gc, file_format="png", pil_options=None):
+    """ Returns the pixels of *gc* encoded as an image file, as a string.
+
+    *pil_options* is a dict of format-specific options that are passed down
+    to the PIL image file writer.  If the format can't store an alpha
+    channel, the image is encoded in RGB.  Without PIL, only PNG files can
+    be encoded.
+    """
+    file_format = file_format.lower()
+    if PilImage is None and file_format == "png":
+        return encode_png(gc)
+    from cStringIO import StringIO
+    buffer = StringIO()
+    save(gc, buffer, file_format, pil_options)
+    return buffer.getvalue()
+
+
+def save(gc, filename, file_format=None, pil_options=None):
+    """ Saves the pixels of *gc* to an image file.
+
+    *filename* may also be a file-like object, in which case *file_format*
+    must be given.  Otherwise PIL infers the format from the extension of
+    *filename* if it is not given.  See GraphicsContextArray.save().
+    """
+    pil_format = None
+    if file_format is None:
+        if not isinstance(filename, basestring):
+            raise ValueError("A file_format is required to save to a "
+                             "file-like object")
+        file_format = filename.rsplit(".", 1)[-1]
+    elif PilImage is not None:
+        pil_format = _pil_format(file_format)
+    if PilImage is None and file_format.lower() == "png":
+        data = encode_png(gc)
+        if isinstance(filename, basestring):
+            with open(filename, "wb") as fp:
+                fp.write(data)
+        else:
+            filename.write(data)
+        return
+
+    img = pil_image(gc, alpha=has_alpha(file_format))
+    img.save(filename, format=pil_format, **(pil_options or {}))
+
+
+def encode_png(gc, alpha=True, level=6, chunk_rows=PNG_CHUNK_ROWS):
+    """ Returns the pixels of *gc* encoded as a PNG file, as a string,
+    without using PIL.
+
+    The rows are converted to RGB(A) and compressed *chunk_rows* at a time,
+    so at most one chunk of converted pixels is held in memory.  zlib
+    releases the GIL while it compresses, so this encoder runs in parallel
+    with drawing on other threads.
+    """
+    mode, rgb_mode, raw_mode, rgb_raw_mode, channels = _pixel_format(gc)
+    if not alpha:
+        channels = channels[:3]
+    color_type = {1: 0, 3: 2, 4: 6}[len(channels)]
+    width, height = gc.width(), gc.height()
+
+    pixels = gc.bmp_array
+    if pixels.ndim == 2:
+        pixels = pixels.reshape(pixels.shape + (1,))
+    compressor = zlib.compressobj(level)
+    compressed = []
+    for top in xrange(0, height, chunk_rows):
+        rows = pixels[top:top + chunk_rows]
+        # Each row starts with its filter type, which is 0 (none)
+        chunk = empty((len(rows), 1 + width * len(channels)), uint8)
+        chunk[:, 0] = 0
+        chunk[:, 1:] = rows[:, :, channels].reshape(len(rows), -1)
+        compressed.append(compressor.compress(chunk.tostring()))
+    compressed.append(compressor.flush())
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return "".join(["\x89PNG\r\n\x1a\n",
+                    _png_chunk("IHDR", header),
+                    _png_chunk("IDAT", "".join(compressed)),
+                    _png_chunk("IEND", "")])
+
+
+class ImageEncoder(object):
+    """ Encodes and saves images on a pool of threads.
+
+    encode() and save() return a multiprocessing AsyncResult at once; its
+    get() method returns the encoded image, or raises the exception that
+    encoding failed with.
+
+    By default the pixels are not copied, so the context must not be drawn
+    into until its result is ready.  Pass copy=True to take a snapshot of
+    the pixels first, and reuse the context at once.
+    """
+
+    def __init__(self, threads=None):
+        # The number of encoding threads
+        self.threads = threads or cpu_count()
+
+        self._pool = ThreadPool(self.threads)
+
+    def encode(self, gc, file_format="png", pil_options=None, copy=False,
+               callback=None):
+        """ Encodes *gc* in the background, see encode().  *callback* is
+        called with the encoded image when it is ready.
+        """
+        if copy:
+            gc = _snapshot(gc)
+        return self._pool.apply_async(encode, (gc, file_format, pil_options),
+                                      callback=callback)
+
+    def save(self, gc, filename, file_format=None, pil_options=None,
+             copy=False, callback=None):
+        """ Saves *gc* to an image file in the background, see save().
+        *callback* is called with None when the file has been written.
+        """
+        if copy:
+            gc = _snapshot(gc)
+        return self._pool.apply_async(save,
+            (gc, filename, file_format, pil_options), callback=callback)
+
+    def close(self):
+        """ Waits for the pending images to be encoded, and stops the
+        threads.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _pil_format(file_format):
+    """ Returns the name PIL gives a format, which may be given by one of
+    its file extensions, such as "jpg" or "tif".
+    """
+    PilImage.init()
+    return PilImage.EXTENSION.get("." + file_format.lower(), file_format)
+
+
+def _pixel_format(gc):
+    """ Returns the entry of _pixel_formats for the pixel format of *gc*.
+    """
+    fmt = gc.format()
+    if fmt not in _pixel_formats:
+        raise ValueError("Can't save a GraphicsContext in the %s pixel "
+                         "format" % fmt)
+    return _pixel_formats[fmt]
+
+
+def _snapshot(gc):
+    """ Returns a GraphicsContextArray holding a copy of the pixels of *gc*.
+    """
+    from kiva.agg import GraphicsContextArray
+    return GraphicsContextArray(gc.bmp_array.copy(), gc.format(),
+                                bottom_up=gc.bottom_up())
+
+
+def _png_chunk(chunk_type, data):
+    """ Returns a PNG chunk: its length, type, data and CRC.
+    """
+    crc = zlib.crc32(chunk_type + data) & 0xffffffff
+    return "".join([struct.pack(">I", len(data)), chunk_type, data,
+                    struct.pack(">I", crc)])
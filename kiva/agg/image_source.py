@@ -0,0 +1,367 @@
+""" Loads the pixels of images for kiva.agg without holding more than one
+copy of them in memory.
+
+Raw pixel files, NumPy .npy files and uncompressed TIFF files are memory
+mapped, and the mapping is used as the **bmp_array** of the
+GraphicsContextArray, so pages are only read from disk when they are drawn.
+Other formats are decoded with PIL, and copied into a preallocated array a
+band of rows at a time.
+
+Images too large to draw as a whole are wrapped in a TiledImage, which
+GraphicsContextArray.draw_image() draws by loading only the tiles that fall
+in the clipped region of the context::
+
+    image = TiledImage(open_image("survey.tif"))
+    gc.draw_image(image, (0, 0, 2000, 2000))
+"""
+
+from __future__ import with_statement
+
+import struct
+from collections import OrderedDict
+
+import numpy
+from numpy import ascontiguousarray, empty, uint8
+
+try:
+    from PIL import Image as PilImage
+except ImportError:
+    try:
+        import Image as PilImage
+    except ImportError:
+        PilImage = None
+
+# The number of bytes per pixel of the formats an image can be loaded in
+PIX_FORMAT_DEPTHS = {"gray8": 1, "rgb24": 3, "bgr24": 3, "rgba32": 4,
+                     "bgra32": 4, "argb32": 4, "abgr32": 4}
+
+# The pixel format an image is loaded in, by its number of bytes per pixel
+_default_pix_formats = {1: "gray8", 3: "rgb24", 4: "rgba32"}
+
+# The number of rows PILSource copies at a time
+BAND_ROWS = 256
+
+
+class ImageSource(object):
+    """ The pixels of an image, which can be read a region at a time.
+
+    Rows are stored top down, as in the **bmp_array** of a
+    GraphicsContextArray.
+    """
+
+    # The (width, height) of the image, in pixels
+    size = (0, 0)
+
+    # The kiva.agg pixel format of the arrays returned by read()
+    pix_format = "rgba32"
+
+    def read(self, x, y, width, height):
+        """ Returns the pixels of the region of the image whose top left
+        corner is at column *x* and row *y*, as a (height, width, depth)
+        array.  The array may be a view of the pixels of the source.
+        """
+        raise NotImplementedError
+
+    def as_array(self, out=None):
+        """ Returns the pixels of the whole image as an array.  If *out* is
+        given, the pixels are copied into it and it is returned.
+        """
+        width, height = self.size
+        if out is None:
+            out = empty((height, width, PIX_FORMAT_DEPTHS[self.pix_format]),
+                        uint8)
+        for top in xrange(0, height, BAND_ROWS):
+            rows = min(BAND_ROWS, height - top)
+            out[top:top + rows] = self.read(0, top, width, rows)
+        return out
+
+
+class ArraySource(ImageSource):
+    """ An image whose pixels are held in an array, which may be a memory
+    map.
+    """
+
+    def __init__(self, array, pix_format=None):
+        if array.ndim == 2:
+            array = array.reshape(array.shape + (1,))
+        if array.ndim != 3 or array.dtype != uint8:
+            raise ValueError("Images must be (height, width, depth) arrays "
+                             "of uint8")
+        if pix_format is None:
+            pix_format = _default_pix_formats.get(array.shape[2])
+        if PIX_FORMAT_DEPTHS.get(pix_format) != array.shape[2]:
+            raise ValueError("Pixel format %r does not match an image depth "
+                             "of %d" % (pix_format, array.shape[2]))
+        self.array = array
+        self.pix_format = pix_format
+        self.size = (array.shape[1], array.shape[0])
+
+    def read(self, x, y, width, height):
+        return self.array[y:y + height, x:x + width]
+
+    def as_array(self, out=None):
+        """ Returns the array itself, without copying it, unless *out* is
+        given.
+        """
+        if out is None:
+            return self.array
+        out[...] = self.array
+        return out
+
+
+class PILSource(ImageSource):
+    """ An image in a format which is decoded by PIL.
+
+    Images in modes other than RGB and RGBA are converted to RGBA.
+    """
+
+    def __init__(self, file):
+        if PilImage is None:
+            raise ImportError("PIL is required to load %r" % (file,))
+        image = PilImage.open(file)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        self.image = image
+        self.size = image.size
+        self.pix_format = {"RGB": "rgb24", "RGBA": "rgba32"}[image.mode]
+
+    def read(self, x, y, width, height):
+        depth = PIX_FORMAT_DEPTHS[self.pix_format]
+        region = self.image.crop((x, y, x + width, y + height))
+        data = getattr(region, "tobytes", None) or region.tostring
+        return numpy.frombuffer(data(), uint8).reshape(height, width, depth)
+
+
+def open_raw(filename, size, pix_format, offset=0):
+    """ Returns an ArraySource which memory maps a file of raw pixels.
+
+    *size* is the (width, height) of the image, and *offset* is the number
+    of bytes before the first pixel.  The mapping is copy-on-write: drawing
+    into the image does not change the file.
+    """
+    width, height = size
+    array = numpy.memmap(filename, uint8, "c", offset,
+                         (height, width, PIX_FORMAT_DEPTHS[pix_format]))
+    return ArraySource(array, pix_format)
+
+
+def open_npy(filename, pix_format=None):
+    """ Returns an ArraySource which memory maps a .npy file of uint8
+    pixels.  The mapping is copy-on-write.
+    """
+    return ArraySource(numpy.load(filename, mmap_mode="c"), pix_format)
+
+
+def open_tiff(filename):
+    """ Returns an ArraySource which memory maps an uncompressed TIFF file,
+    or None if the pixels of the file can't be mapped: if they are
+    compressed, tiled, not 8 bit RGB or unassociated RGBA, or not stored in
+    one contiguous block.
+    """
+    with open(filename, "rb") as fp:
+        tags = _read_tiff_tags(fp)
+    if tags is None:
+        return None
+
+    width, height = tags.get(256, (0,))[0], tags.get(257, (0,))[0]
+    samples = tags.get(277, (1,))[0]
+    pix_format = {3: "rgb24", 4: "rgba32"}.get(samples)
+    if (pix_format is None or tags.get(259, (1,))[0] != 1 or
+            tags.get(284, (1,))[0] != 1 or 322 in tags or
+            set(tags.get(258, (8,))) != set([8]) or
+            tags.get(262, (None,))[0] != 2):
+        return None
+    if samples == 4 and tags.get(338, (None,))[0] != 2:
+        # Only unassociated (not premultiplied) alpha can be mapped
+        return None
+
+    # The strips must follow each other, so that they form one array
+    offsets = tags.get(273, ())
+    rows_per_strip = tags.get(278, (height,))[0]
+    strip_bytes = min(rows_per_strip, height) * width * samples
+    if not offsets or any(offset != offsets[0] + i * strip_bytes
+                          for i, offset in enumerate(offsets)):
+        return None
+    return open_raw(filename, (width, height), pix_format, offsets[0])
+
+
+def open_image(file, mmap=True):
+    """ Returns an ImageSource for an image file.
+
+    *file* is a file name or an open file object.  If *mmap* is True,
+    .npy files and uncompressed TIFF files named by *file* are memory
+    mapped; other images are decoded with PIL.
+    """
+    if mmap and isinstance(file, basestring):
+        extension = file.rsplit(".", 1)[-1].lower()
+        if extension == "npy":
+            return open_npy(file)
+        if extension in ("tif", "tiff"):
+            source = open_tiff(file)
+            if source is not None:
+                return source
+    return PILSource(file)
+
+
+class TiledImage(object):
+    """ A large image which is drawn a tile at a time, loading only the
+    tiles which fall in the clipped region of the context it is drawn into.
+
+    The most recently drawn **max_tiles** tiles are kept in memory.  Tiles
+    are drawn separately, so with an interpolating filter the pixels along
+    their edges may differ slightly from those of the image drawn as a
+    whole.  When the context is rotated, every tile is drawn.
+    """
+
+    def __init__(self, source, tile_size=512, max_tiles=64,
+                 interpolation="nearest"):
+        # The ImageSource of the pixels
+        self.source = source
+
+        # The width and height of the tiles, in pixels of the image
+        self.tile_size = tile_size
+
+        # The number of tiles kept in memory
+        self.max_tiles = max_tiles
+
+        # The filter used when the tiles are drawn into a context
+        self.interpolation = interpolation
+
+        self._tiles = OrderedDict()
+
+    def width(self):
+        return self.source.size[0]
+
+    def height(self):
+        return self.source.size[1]
+
+    def draw_tiles(self, gc, rect=None):
+        """ Draws the visible tiles of the image into *gc*, stretched over
+        *rect* (x, y, width, height), which defaults to the size of the
+        image.  Returns the number of tiles drawn.
+        """
+        width, height = self.source.size
+        if rect is None:
+            rect = (0, 0, width, height)
+        x, y, rect_width, rect_height = rect
+        if width == 0 or height == 0 or rect_width == 0 or rect_height == 0:
+            return 0
+        scale_x = float(rect_width) / width
+        scale_y = float(rect_height) / height
+
+        # The visible region in pixels of the image: columns left to right,
+        # and rows top to bottom
+        visible = self._visible_rect(gc)
+        if visible is None:
+            columns = (0, width)
+            rows = (0, height)
+        else:
+            vx1, vy1, vx2, vy2 = visible
+            columns = ((vx1 - x) / scale_x, (vx2 - x) / scale_x)
+            rows = ((y + rect_height - vy2) / scale_y,
+                    (y + rect_height - vy1) / scale_y)
+            columns = (max(0, int(min(columns))),
+                       min(width, int(numpy.ceil(max(columns)))))
+            rows = (max(0, int(min(rows))),
+                    min(height, int(numpy.ceil(max(rows)))))
+            if columns[0] >= columns[1] or rows[0] >= rows[1]:
+                return 0
+
+        tile_size = self.tile_size
+        count = 0
+        for row in xrange(rows[0] // tile_size,
+                          (rows[1] - 1) // tile_size + 1):
+            for column in xrange(columns[0] // tile_size,
+                                 (columns[1] - 1) // tile_size + 1):
+                tile = self._tile(column, row)
+                tile_x = column * tile_size
+                tile_y = row * tile_size
+                tile_height = tile.height()
+                gc.draw_image(tile, (x + tile_x * scale_x,
+                    y + rect_height - (tile_y + tile_height) * scale_y,
+                    tile.width() * scale_x, tile_height * scale_y))
+                count += 1
+        return count
+
+    def clear_cache(self):
+        """ Discards the tiles kept in memory.
+        """
+        self._tiles.clear()
+
+    def _tile(self, column, row):
+        """ Returns a GraphicsContextArray of the pixels of a tile, loading
+        it if it is not in the cache.
+        """
+        from kiva.agg import GraphicsContextArray
+
+        key = (column, row)
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            width, height = self.source.size
+            tile_size = self.tile_size
+            x, y = column * tile_size, row * tile_size
+            pixels = self.source.read(x, y, min(tile_size, width - x),
+                                      min(tile_size, height - y))
+            tile = GraphicsContextArray(ascontiguousarray(pixels),
+                                        self.source.pix_format,
+                                        self.interpolation)
+            while len(self._tiles) >= self.max_tiles:
+                self._tiles.popitem(last=False)
+        self._tiles[key] = tile
+        return tile
+
+    def _visible_rect(self, gc):
+        """ Returns the (x1, y1, x2, y2) bounds of the clip regions of *gc*
+        in its user space, or None if they can't be found.
+        """
+        if not hasattr(gc, "get_num_clip_regions"):
+            return None
+        a, b, c, d, tx, ty = gc.get_ctm()
+        if b != 0 or c != 0 or a == 0 or d == 0:
+            return None
+        regions = [gc.get_clip_region(i)
+                   for i in range(gc.get_num_clip_regions())]
+        if not regions:
+            return None
+        # The regions are in device pixels, and their width and height are
+        # one pixel short
+        x1 = min(r[0] for r in regions)
+        y1 = min(r[1] for r in regions)
+        x2 = max(r[0] + r[2] + 1 for r in regions)
+        y2 = max(r[1] + r[3] + 1 for r in regions)
+        ux = sorted([(x1 - tx) / a, (x2 - tx) / a])
+        uy = sorted([(y1 - ty) / d, (y2 - ty) / d])
+        return ux[0], uy[0], ux[1], uy[1]
+
+
+def _read_tiff_tags(fp):
+    """ Returns the tags of the first image of a TIFF file as a dict of
+    tuples of integers, or None if the file is not a TIFF file.
+    """
+    header = fp.read(8)
+    if header[:4] == "II*\x00":
+        order = "<"
+    elif header[:4] == "MM\x00*":
+        order = ">"
+    else:
+        return None
+    fp.seek(struct.unpack(order + "I", header[4:])[0])
+    count = struct.unpack(order + "H", fp.read(2))[0]
+    entries = fp.read(12 * count)
+
+    # The struct code and size of the SHORT and LONG field types
+    types = {3: ("H", 2), 4: ("I", 4)}
+    tags = {}
+    for i in range(count):
+        tag, field_type, values, data = struct.unpack(order + "HHI4s",
+            entries[12 * i:12 * i + 12])
+        if field_type not in types:
+            continue
+        code, size = types[field_type]
+        if values * size > 4:
+            position = fp.tell()
+            fp.seek(struct.unpack(order + "I", data)[0])
+            data = fp.read(values * size)
+            fp.seek(position)
+        tags[tag] = struct.unpack(order + code * values, data[:values * size])
+    return tags
@@ -203,6 +203,7 @@ def configuration(parent_package='', top_path=None):
         build_libraries += ["GL", "GLU"]
     dict_append(build_info,
                 sources = ['agg.i'],
+                swig_opts = ['-threads'],
                 include_dirs = kiva_include_dirs,
                 libraries = build_libraries,
                 depends = ['src/*.[ih]'],
@@ -337,3 +337,34 @@
     
     $1 = stops;
 }
+
+//---------------------------------------------------------------------
+// Typemap for std::vector<std::string>& used in show_text_at_points()
+//
+//    This typemap takes any sequence of strings.
+//---------------------------------------------------------------------
+%typemap(in) std::vector<std::string>& (std::vector<std::string> temp)
+{
+    PyObject* seq = PySequence_Fast($input, "Expected a sequence of strings");
+    if (seq == NULL)
+    {
+        goto fail;
+    }
+
+    int n = PySequence_Fast_GET_SIZE(seq);
+    temp.reserve(n);
+    for (int i = 0; i < n; i++)
+    {
+        PyObject* item = PySequence_Fast_GET_ITEM(seq, i);
+        if (!PyString_Check(item))
+        {
+            Py_DECREF(seq);
+            PyErr_SetString(PyExc_TypeError, "Expected a sequence of strings");
+            goto fail;
+        }
+        temp.push_back(std::string(PyString_AS_STRING(item),
+                                   PyString_GET_SIZE(item)));
+    }
+    Py_DECREF(seq);
+    $1 = &temp;
+}
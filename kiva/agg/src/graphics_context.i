@@ -257,6 +257,7 @@ namespace kiva {
         #ft_engine = freetype.FreeType(dpi=120.0)
 
         from kiva import fonttools
+        from kiva.text_extent_cache import text_extent_cache
 
         def handle_unicode(text):
             "Returns a utf8 encoded 8-bit string from 'text'"
@@ -446,6 +447,23 @@ namespace kiva {
             %}
             bool show_text_at_point(char *text, double dx, double dy);
 
+            %feature("shadow") show_text_at_points(std::vector<std::string>& strings,
+                                                   double* pts, int Npts)
+            %{
+            def show_text_at_points(self, strings, points):
+                """ Draws each string in *strings* with its text position at
+                the corresponding point in *points*.  The text matrix is left
+                unchanged.  This is much faster than calling
+                show_text_at_point() in a loop.  The strings must not contain
+                newlines.
+                """
+                strings = [handle_unicode(text) for text in strings]
+                return _agg.GraphicsContextArray_show_text_at_points(self,
+                                                            strings, points)
+            %}
+            bool show_text_at_points(std::vector<std::string>& strings,
+                                     double* pts, int Npts);
+
             %pythoncode
             %{
             def show_text(self, text, point = None):
@@ -522,7 +540,7 @@ namespace kiva {
                         and (font.encoding == cur_font.encoding):
                         return
                     else:
-                        newfilename = font.findfont()
+                        newfilename = text_extent_cache.font_file(font)
                         agg_font = AggFontType(font.face_name, font.size, font.family, font.style,
                                                font.encoding, False)
                         agg_font.filename = newfilename
@@ -681,6 +699,10 @@ namespace kiva {
             %exception;  // clear exception handlers
 
             void clear_clip_path();
+
+            // These only touch this context's own buffer, so they release
+            // the GIL while they rasterize.
+            %thread;
             void clear(agg24::rgba& value=_clear_color);
             void stroke_path();
             void fill_path();
@@ -695,6 +717,9 @@ namespace kiva {
                                            double rect[4], bool force_copy=false)
             %{
             def draw_image(self, img, rect=None, force_copy=False):
+                if hasattr(img, "draw_tiles"):
+                    # A TiledImage draws the tiles in the clipped region
+                    return img.draw_tiles(self, rect)
                 if isinstance(img, ndarray):
                     # The C++ implementation only handles other
                     # GraphicsContexts, so create one.
@@ -740,6 +765,7 @@ namespace kiva {
             void draw_path_at_points(double* pts,int Npts,
                                   kiva::compiled_path& marker,
                                   kiva::draw_mode_e mode);
+            %nothread;
 
             // additional methods added as pure python
             %pythoncode
@@ -798,35 +824,21 @@ namespace kiva {
                     If the image has an alpha channel and the specified output
                     file format does not support alpha, the image is saved in
                     rgb24 format.
+
+                    The pixels are handed to PIL without converting them into
+                    a copy of the GraphicsContext first.  See
+                    kiva.agg.image_encoding.ImageEncoder to save images in the
+                    background.
                 """
-                FmtsWithoutAlpha = ('jpg', 'bmp', 'eps', "jpeg")
-                import Image as PilImage
-                size = (self.width(), self.height())
-                fmt = self.format()
-
-                # determine the output pixel format and PIL format
-                if fmt.endswith("32"):
-                    pilformat = "RGBA"
-                    pixelformat = "rgba32"
-                    if (isinstance(filename, basestring) and filename[-3:].lower() in FmtsWithoutAlpha) or \
-                       (file_format is not None and file_format.lower() in FmtsWithoutAlpha):
-                        pilformat = "RGB"
-                        pixelformat = "rgb24"
-                elif fmt.endswith("24"):
-                    pilformat = "RGB"
-                    pixelformat = "rgb24"
-
-                # perform a conversion if necessary
-                if fmt != pixelformat:
-                    newimg = GraphicsContextArray(size, fmt)
-                    newimg.draw_image(self)
-                    newimg.convert_pixel_format(pixelformat, 1)
-                    bmp = newimg.bmp_array
-                else:
-                    bmp = self.bmp_array
+                from kiva.agg import image_encoding
+                image_encoding.save(self, filename, file_format, pil_options)
 
-                img = PilImage.fromstring(pilformat, size, bmp.tostring())
-                img.save(filename, format=file_format, options=pil_options)
+            def encode(self, file_format="png", pil_options=None):
+                """ Returns the GraphicsContext encoded as an image file in
+                    file_format, as a string.  pil_options are as for save().
+                """
+                from kiva.agg import image_encoding
+                return image_encoding.encode(self, file_format, pil_options)
 
 
             #----------------------------------------------------------------
@@ -942,19 +954,15 @@ class Image(GraphicsContextArray):
         interpolation
             specifies the type of filter used when putting the image into
             another GraphicsContextArray
+
+        .npy files and uncompressed TIFF files are memory mapped, and
+        other formats are decoded with PIL straight into the array of the
+        image.  See kiva.agg.image_source.
         """
-        # read the file using PIL
-        import Image as PilImage
-        pil_img = PilImage.open(file)
-
-        # Convert image to a numeric array
-        if (pil_img.mode not in ["RGB","RGBA"] or
-            (cvar.ALWAYS_32BIT_WORKAROUND_FLAG and pil_img.mode != "RGBA")):
-            pil_img = pil_img.convert(mode="RGBA")
-        depth = pil_depth_map[pil_img.mode]
-        img = fromstring(pil_img.tostring(),uint8)
-        img = resize(img, (pil_img.size[1],pil_img.size[0],depth))
-        format = pil_format_map[pil_img.mode]
+        from kiva.agg.image_source import open_image
+        source = open_image(file)
+        img = source.as_array()
+        format = source.pix_format
 
         GraphicsContextArray.__init__(self, img, pix_format=format,
                                       interpolation=interpolation,
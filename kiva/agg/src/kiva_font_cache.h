@@ -0,0 +1,270 @@
+#ifndef KIVA_FONT_CACHE_H
+#define KIVA_FONT_CACHE_H
+
+#include <list>
+#include <map>
+#include <string>
+#include <utility>
+
+#include "agg_font_cache_manager.h"
+
+namespace kiva
+{
+    //------------------------------------------------------------------------
+    // A drop-in replacement for agg24::font_cache_manager that keeps the
+    // rasterized glyphs of many fonts at once.
+    //
+    // Each distinct font engine signature (face, size, hinting and the
+    // scale/rotation part of the text transform) gets its own glyph cache.
+    // Caches are looked up by signature and the least recently used one is
+    // discarded once more than max_fonts are held.  agg's own pool scans
+    // its fonts linearly and always discards the oldest one, so switching
+    // between a handful of fonts and zoom levels kept throwing away
+    // glyphs that were still in use.
+    //------------------------------------------------------------------------
+    template<class FontEngine> class font_cache_manager
+    {
+    public:
+        typedef FontEngine font_engine_type;
+        typedef font_cache_manager<FontEngine> self_type;
+        typedef typename font_engine_type::path_adaptor_type   path_adaptor_type;
+        typedef typename font_engine_type::gray8_adaptor_type  gray8_adaptor_type;
+        typedef typename gray8_adaptor_type::embedded_scanline gray8_scanline_type;
+        typedef typename font_engine_type::mono_adaptor_type   mono_adaptor_type;
+        typedef typename mono_adaptor_type::embedded_scanline  mono_scanline_type;
+
+        font_cache_manager(font_engine_type& engine, unsigned max_fonts=64) :
+            m_engine(engine),
+            m_max_fonts(max_fonts),
+            m_change_stamp(-1),
+            m_cur_font(0),
+            m_prev_glyph(0),
+            m_last_glyph(0)
+        {}
+
+        ~font_cache_manager()
+        {
+            this->clear();
+        }
+
+        //--------------------------------------------------------------------
+        const agg24::glyph_cache* glyph(unsigned glyph_code)
+        {
+            this->synchronize();
+            if (m_cur_font == 0)
+            {
+                return 0;
+            }
+
+            const agg24::glyph_cache* gl = m_cur_font->find_glyph(glyph_code);
+            if (gl == 0)
+            {
+                if (!m_engine.prepare_glyph(glyph_code))
+                {
+                    return 0;
+                }
+                agg24::glyph_cache* new_gl =
+                    m_cur_font->cache_glyph(glyph_code,
+                                            m_engine.glyph_index(),
+                                            m_engine.data_size(),
+                                            m_engine.data_type(),
+                                            m_engine.bounds(),
+                                            m_engine.advance_x(),
+                                            m_engine.advance_y());
+                m_engine.write_glyph_to(new_gl->data);
+                gl = new_gl;
+            }
+            m_prev_glyph = m_last_glyph;
+            return m_last_glyph = gl;
+        }
+
+        //--------------------------------------------------------------------
+        void init_embedded_adaptors(const agg24::glyph_cache* gl,
+                                    double x, double y,
+                                    double scale=1.0)
+        {
+            if (gl)
+            {
+                switch (gl->data_type)
+                {
+                default: return;
+                case agg24::glyph_data_mono:
+                    m_mono_adaptor.init(gl->data, gl->data_size, x, y);
+                    break;
+
+                case agg24::glyph_data_gray8:
+                    m_gray8_adaptor.init(gl->data, gl->data_size, x, y);
+                    break;
+
+                case agg24::glyph_data_outline:
+                    m_path_adaptor.init(gl->data, gl->data_size, x, y, scale);
+                    break;
+                }
+            }
+        }
+
+        //--------------------------------------------------------------------
+        path_adaptor_type&   path_adaptor()   { return m_path_adaptor;   }
+        gray8_adaptor_type&  gray8_adaptor()  { return m_gray8_adaptor;  }
+        gray8_scanline_type& gray8_scanline() { return m_gray8_scanline; }
+        mono_adaptor_type&   mono_adaptor()   { return m_mono_adaptor;   }
+        mono_scanline_type&  mono_scanline()  { return m_mono_scanline;  }
+
+        //--------------------------------------------------------------------
+        bool add_kerning(double* x, double* y)
+        {
+            if (m_prev_glyph && m_last_glyph)
+            {
+                return m_engine.add_kerning(m_prev_glyph->glyph_index,
+                                            m_last_glyph->glyph_index,
+                                            x, y);
+            }
+            return false;
+        }
+
+        // Forgets the previous glyph, so that no kerning is applied before
+        // the next one.  Call this at the start of each separate string.
+        void reset_kerning()
+        {
+            m_prev_glyph = m_last_glyph = 0;
+        }
+
+        //--------------------------------------------------------------------
+        // Discards the glyphs cached for the engine's current font.
+        void reset_cache()
+        {
+            this->synchronize();
+            if (m_cur_font != 0)
+            {
+                std::string signature(m_engine.font_signature());
+                this->remove(signature);
+                m_change_stamp = -1;
+                this->synchronize();
+            }
+        }
+
+        // Discards all cached glyphs.
+        void clear()
+        {
+            typename lru_list::iterator it;
+            for (it = m_lru.begin(); it != m_lru.end(); ++it)
+            {
+                agg24::obj_allocator<agg24::font_cache>::deallocate(it->second);
+            }
+            m_lru.clear();
+            m_index.clear();
+            m_cur_font = 0;
+            m_change_stamp = -1;
+            m_prev_glyph = m_last_glyph = 0;
+        }
+
+        unsigned num_fonts() const { return m_index.size(); }
+        unsigned max_fonts() const { return m_max_fonts; }
+
+        void set_max_fonts(unsigned max_fonts)
+        {
+            m_max_fonts = max_fonts > 0 ? max_fonts : 1;
+            while (m_lru.size() > m_max_fonts)
+            {
+                this->evict();
+            }
+        }
+
+    private:
+        // Most recently used fonts are at the front of the list.
+        typedef std::pair<std::string, agg24::font_cache*> lru_entry;
+        typedef std::list<lru_entry> lru_list;
+        typedef std::map<std::string, typename lru_list::iterator> lru_index;
+
+        font_cache_manager(const self_type&);
+        const self_type& operator = (const self_type&);
+
+        //--------------------------------------------------------------------
+        void synchronize()
+        {
+            if (m_change_stamp == m_engine.change_stamp())
+            {
+                return;
+            }
+            m_change_stamp = m_engine.change_stamp();
+            m_prev_glyph = m_last_glyph = 0;
+
+            const char* sig = m_engine.font_signature();
+            if (sig == 0 || *sig == 0)
+            {
+                m_cur_font = 0;
+                return;
+            }
+
+            std::string signature(sig);
+            typename lru_index::iterator found = m_index.find(signature);
+            if (found != m_index.end())
+            {
+                m_lru.splice(m_lru.begin(), m_lru, found->second);
+                m_cur_font = found->second->second;
+                return;
+            }
+
+            m_cur_font = 0;
+            while (m_lru.size() >= m_max_fonts)
+            {
+                this->evict();
+            }
+            agg24::font_cache* font =
+                agg24::obj_allocator<agg24::font_cache>::allocate();
+            font->signature(sig);
+            m_lru.push_front(lru_entry(signature, font));
+            m_index[signature] = m_lru.begin();
+            m_cur_font = font;
+        }
+
+        void evict()
+        {
+            if (m_lru.empty())
+            {
+                return;
+            }
+            lru_entry& oldest = m_lru.back();
+            if (oldest.second == m_cur_font)
+            {
+                m_cur_font = 0;
+                m_change_stamp = -1;
+            }
+            agg24::obj_allocator<agg24::font_cache>::deallocate(oldest.second);
+            m_index.erase(oldest.first);
+            m_lru.pop_back();
+        }
+
+        void remove(const std::string& signature)
+        {
+            typename lru_index::iterator found = m_index.find(signature);
+            if (found == m_index.end())
+            {
+                return;
+            }
+            if (found->second->second == m_cur_font)
+            {
+                m_cur_font = 0;
+            }
+            agg24::obj_allocator<agg24::font_cache>::deallocate(found->second->second);
+            m_lru.erase(found->second);
+            m_index.erase(found);
+        }
+
+        font_engine_type&   m_engine;
+        unsigned            m_max_fonts;
+        int                 m_change_stamp;
+        lru_list            m_lru;
+        lru_index           m_index;
+        agg24::font_cache*  m_cur_font;
+        const agg24::glyph_cache* m_prev_glyph;
+        const agg24::glyph_cache* m_last_glyph;
+        path_adaptor_type   m_path_adaptor;
+        gray8_adaptor_type  m_gray8_adaptor;
+        gray8_scanline_type m_gray8_scanline;
+        mono_adaptor_type   m_mono_adaptor;
+        mono_scanline_type  m_mono_scanline;
+    };
+}
+
+#endif
@@ -8,6 +8,7 @@
 
 #include <assert.h>
 #include <string.h>
+#include <string>
 #include <stack>
 
 #if defined(_WIN32) || defined(__WIN32__) || defined(__CYGWIN__)
@@ -147,6 +148,9 @@ namespace kiva
 
         bool show_text(char *text);
 
+        bool show_text_at_points(std::vector<std::string>& strings,
+                                 double* pts, int Npts);
+
 
         //---------------------------------------------------------------
         // Image handling
@@ -158,6 +162,11 @@ namespace kiva
         int draw_image(kiva::graphics_context_base* img, double rect[4], bool force_copy=false);
 
         private:
+        // Rasterizes one line of text.  The font manager must be grabbed.
+        bool _draw_text_line(const wchar_t* p,
+                             const agg24::trans_affine& text_xform,
+                             double* advance_x, double* advance_y);
+
         int blend_image(kiva::graphics_context_base* img, int tx, int ty);
         int copy_image(kiva::graphics_context_base* img, int tx, int ty);
         int transform_image(kiva::graphics_context_base* img,
@@ -1285,43 +1294,85 @@ namespace kiva
     template <class agg_pixfmt>
     bool graphics_context<agg_pixfmt>::show_text(char*text)
     {
-        typedef agg24::glyph_raster_bin<agg24::rgba8>                   GlyphGeneratorType;
-        typedef agg24::renderer_scanline_aa_solid<renderer_base_type> ScanlineRendererType;
+        std::vector<wchar_t> p_;
+        _decode_text(text, p_);
 
-        //GlyphGeneratorType glyphGen(0);
-        ScanlineRendererType scanlineRenderer(this->renderer);
+        // Check to make sure the font's loaded.
+        if (!this->is_font_initialized())
+        {
+            return false;
+        }
 
-        const agg24::glyph_cache *glyph = NULL;
-#if defined(_WIN32) || defined(__WIN32__) || defined(__CYGWIN__)
-        int required = MultiByteToWideChar(CP_UTF8, 0, text, -1, 0, 0);
-        std::vector<wchar_t> p_(required + 1);
-        MultiByteToWideChar(CP_UTF8, 0, text, -1, &p_[0], required);
-        wchar_t *p = &p_[0];
-#else
-        std::vector <wchar_t> p_(1024);
-        size_t length = mbstowcs(&p_[0], text, 1024);
-        if (length > 1024)
-          {
-            p_.resize (length + 1);
-            mbstowcs(&p_[0], text, length);
-          }
-        wchar_t *p = &p_[0];
-#endif
-        bool retval = true;
+        this->_grab_font_manager();
 
-        // Check to make sure the font's loaded.
+        double advance_x = 0.0;
+        double advance_y = 0.0;
+        bool retval = this->_draw_text_line(&p_[0], this->text_matrix,
+                                            &advance_x, &advance_y);
+
+        this->_release_font_manager();
+
+        agg24::trans_affine trans = agg24::trans_affine_translation(advance_x,
+    	                                                        advance_y);
+        this->text_matrix.multiply(trans);
+        return retval;
+    }
+
+    template <class agg_pixfmt>
+    bool graphics_context<agg_pixfmt>::show_text_at_points(
+            std::vector<std::string>& strings, double* pts, int Npts)
+    {
         if (!this->is_font_initialized())
         {
             return false;
         }
 
+        // Grab the font manager once for the whole batch.  All of the
+        // strings share the text matrix's scale and rotation, so the font
+        // engine's transform (and with it the glyph cache) stays the same.
         this->_grab_font_manager();
-        font_engine_type *font_engine = kiva::GlobalFontEngine();
+
+        bool retval = true;
+        std::vector<wchar_t> p_;
+        agg24::trans_affine text_xform;
+        double text_xform_array[6];
+        this->text_matrix.store_to(text_xform_array);
+        int count = kiva::min(Npts, int(strings.size()));
+        for (int i = 0; i < count; i++)
+        {
+            _decode_text(const_cast<char*>(strings[i].c_str()), p_);
+            text_xform_array[4] = pts[2*i];
+            text_xform_array[5] = pts[2*i+1];
+            text_xform.load_from(text_xform_array);
+
+            double advance_x = 0.0;
+            double advance_y = 0.0;
+            if (!this->_draw_text_line(&p_[0], text_xform,
+                                       &advance_x, &advance_y))
+            {
+                retval = false;
+            }
+        }
+
+        this->_release_font_manager();
+        return retval;
+    }
+
+    template <class agg_pixfmt>
+    bool graphics_context<agg_pixfmt>::_draw_text_line(const wchar_t* p,
+                                        const agg24::trans_affine& text_xform,
+                                        double* advance_x, double* advance_y)
+    {
+        typedef agg24::renderer_scanline_aa_solid<renderer_base_type> ScanlineRendererType;
+
+        ScanlineRendererType scanlineRenderer(this->renderer);
         font_manager_type *font_manager = kiva::GlobalFontManager();
+        const agg24::glyph_cache *glyph = NULL;
 
         // Concatenate the CTM with the text matrix to get the full transform for the
         // font engine.
-    	agg24::trans_affine full_text_xform(this->text_matrix * this->path.get_ctm());
+        agg24::trans_affine full_text_xform(text_xform);
+        full_text_xform *= this->path.get_ctm();
 
        // the AGG freetype transform is a per character transform.  We need to remove the
        // offset part of the transform to prevent that offset from occuring between each
@@ -1338,7 +1389,7 @@ namespace kiva
        text_xform_array[5] = 0.0;
 
        full_text_xform.load_from(text_xform_array);
-       font_engine->transform(full_text_xform);
+       this->_set_font_transform(full_text_xform);
 
         if (this->state.text_drawing_mode == kiva::TEXT_FILL)
         {
@@ -1350,13 +1401,14 @@ namespace kiva
             scanlineRenderer.color(this->state.line_color);
         }
 
-        double advance_x = 0.0;
-        double advance_y = 0.0;
+        // Don't kern the first glyph against the end of the previous string.
+        font_manager->reset_kerning();
 
+        bool retval = true;
         while (*p)
         {
-            double x = start_x + advance_x;
-            double y = start_y + advance_y;
+            double x = start_x + *advance_x;
+            double y = start_y + *advance_y;
             glyph = font_manager->glyph(*p);
 
             if (glyph == NULL)
@@ -1373,18 +1425,10 @@ namespace kiva
                                       scanlineRenderer);
             }
 
-            advance_x += glyph->advance_x;
-            advance_y += glyph->advance_y;
+            *advance_x += glyph->advance_x;
+            *advance_y += glyph->advance_y;
             p++;
         }
-
-        agg24::trans_affine null_xform = agg24::trans_affine_translation(0., 0.);
-        font_engine->transform(null_xform);
-        this->_release_font_manager();
-
-        agg24::trans_affine trans = agg24::trans_affine_translation(advance_x,
-    	                                                        advance_y);
-        this->text_matrix.multiply(trans);
         return retval;
     }
 
@@ -576,25 +576,29 @@ bool graphics_context_base::show_text_at_point(char *text,
     return retval;
 }
 
+bool graphics_context_base::show_text_at_points(
+        std::vector<std::string>& strings, double* pts, int Npts)
+{
+    bool retval = true;
+    int count = kiva::min(Npts, int(strings.size()));
+    for (int i = 0; i < count; i++)
+    {
+        char *text = const_cast<char*>(strings[i].c_str());
+        if (!this->show_text_at_point(text, pts[2*i], pts[2*i+1]))
+        {
+            retval = false;
+        }
+    }
+    return retval;
+}
+
 kiva::rect_type graphics_context_base::get_text_extent(char *text)
 {
     const agg24::glyph_cache *glyph = NULL;
 
-#if defined(_WIN32) || defined(__WIN32__) || defined(__CYGWIN__)
-        int required = MultiByteToWideChar(CP_UTF8, 0, text, -1, 0, 0);
-        std::vector<wchar_t> p_(required + 1);
-        MultiByteToWideChar(CP_UTF8, 0, text, -1, &p_[0], required);
-        wchar_t *p = &p_[0];
-#else
-        std::vector <wchar_t> p_(1024);
-        size_t length = mbstowcs(&p_[0], text, 1024);
-        if (length > 1024)
-          {
-            p_.resize (length + 1);
-            mbstowcs(&p_[0], text, length);
-          }
-        wchar_t *p = &p_[0];
-#endif
+    std::vector<wchar_t> p_;
+    _decode_text(text, p_);
+    wchar_t *p = &p_[0];
 
     double x1 = 0.0, x2 = 0.0, y1 = 0.0, y2= 0.0;
 
@@ -604,6 +608,8 @@ kiva::rect_type graphics_context_base::get_text_extent(char *text)
         return kiva::rect_type(0, 0, 0, 0);
 
     this->_grab_font_manager();
+    this->_set_font_transform(agg24::trans_affine());
+    font_manager->reset_kerning();
 
     //typedef agg24::glyph_raster_bin<agg24::rgba8> GlyphGeneratorType;
     //GlyphGeneratorType glyphGen(this->font_manager.glyph(*p)->data);
@@ -668,24 +674,41 @@ void graphics_context_base::_grab_font_manager()
 
     font_type *font = &this->state.font;
 
+    // Every change to the font engine recomputes its signature, so skip the
+    // reload entirely if the engine already has this font at this size.
+    // The glyphs themselves are cached per signature by the font manager.
+    static std::string loaded_font;
+    static int loaded_size = -1;
+
 #ifdef KIVA_USE_FREETYPE
-    if (font->filename != "")
-    {
-        font_engine->load_font(font->filename.c_str(), 0,
-                               agg24::glyph_ren_agg_gray8);
-    }
-    else
+    const std::string& font_name = (font->filename != "") ? font->filename
+                                                          : font->name;
+    if (font_name == loaded_font && font->size == loaded_size)
+        return;
+
+    if (!font_engine->load_font(font_name.c_str(), 0,
+                                agg24::glyph_ren_agg_gray8))
     {
-        font_engine->load_font(font->name.c_str(), 0,
-                               agg24::glyph_ren_agg_gray8);
+        loaded_font = "";
+        return;
     }
 #endif
 
 #ifdef KIVA_USE_WIN32
-    font_engine->create_font(font->name,
-                             agg24::glyph_ren_native_gray8,
-                             font->size);
+    const std::string& font_name = font->name;
+    if (font_name == loaded_font && font->size == loaded_size)
+        return;
+
+    if (!font_engine->create_font(font->name,
+                                  agg24::glyph_ren_native_gray8,
+                                  font->size))
+    {
+        loaded_font = "";
+        return;
+    }
 #endif
+    loaded_font = font_name;
+    loaded_size = font->size;
 
     font_engine->hinting(1);
     font_engine->resolution(72);
@@ -719,6 +742,37 @@ void graphics_context_base::_release_font_manager()
 #endif  // _WIN32
 }
 
+void graphics_context_base::_set_font_transform(const agg24::trans_affine& affine)
+{
+    static agg24::trans_affine current_transform;
+
+    // Setting the transform changes the engine's signature, which makes
+    // the font manager look up its glyph cache again.
+    if (!affine.is_equal(current_transform))
+    {
+        GlobalFontEngine()->transform(affine);
+        current_transform = affine;
+    }
+}
+
+void graphics_context_base::_decode_text(char *text,
+                                         std::vector<wchar_t>& result)
+{
+#if defined(_WIN32) || defined(__WIN32__) || defined(__CYGWIN__)
+    int required = MultiByteToWideChar(CP_UTF8, 0, text, -1, 0, 0);
+    result.assign(required + 1, 0);
+    MultiByteToWideChar(CP_UTF8, 0, text, -1, &result[0], required);
+#else
+    result.assign(1024, 0);
+    size_t length = mbstowcs(&result[0], text, 1024);
+    if (length > 1024)
+    {
+        result.resize(length + 1);
+        mbstowcs(&result[0], text, length);
+    }
+#endif
+}
+
 //---------------------------------------------------------------------
 // Gradient support
 //---------------------------------------------------------------------
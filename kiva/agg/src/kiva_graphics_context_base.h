@@ -11,6 +11,7 @@
 
 
 #include <stack>
+#include <string>
 #include <vector>
 
 #include "agg_basics.h"
@@ -31,6 +32,7 @@
 #include "agg_embedded_raster_fonts.h"
 
 #include "agg_font_cache_manager.h"
+#include "kiva_font_cache.h"
 
 
 
@@ -43,7 +45,7 @@ namespace kiva
 #ifdef KIVA_USE_WIN32
     typedef agg24::font_engine_win32_tt_int32 font_engine_type;
 #endif
-    typedef agg24::font_cache_manager<font_engine_type> font_manager_type;
+    typedef kiva::font_cache_manager<font_engine_type> font_manager_type;
 
     font_engine_type* GlobalFontEngine();
     font_manager_type* GlobalFontManager();
@@ -152,6 +154,11 @@ namespace kiva
 
         bool show_text_at_point(char *text, double tx, double ty);
 
+        // Draws each of the strings with its text position at the
+        // corresponding point.  The text matrix is not changed.
+        virtual bool show_text_at_points(std::vector<std::string>& strings,
+                                         double* pts, int Npts);
+
         // This will always return a font_type object.  The font's
         // is_loaded() method should be checked to see if the font is valid.
         kiva::font_type& get_font();
@@ -351,6 +358,15 @@ namespace kiva
         void _grab_font_manager();
         void _release_font_manager();
 
+        // Sets the font engine's glyph transform.  The font engine is
+        // shared, so this must be called between _grab_font_manager() and
+        // _release_font_manager().
+        void _set_font_transform(const agg24::trans_affine& affine);
+
+        // Converts UTF-8 text to the wide characters used by the font
+        // engine.  The result is null-terminated.
+        static void _decode_text(char *text, std::vector<wchar_t>& result);
+
         bool _is_font_initialized;
 
     };
@@ -345,6 +345,35 @@ class GraphicsContextArrayTestCase(unittest.TestCase):
         self.assertEqual(font1.style, font3.style)
         self.assertEqual(font1.encoding, font3.encoding)
 
+    def test_show_text_at_points(self):
+        strings = ["abc", "xyz", u"\xe9t\xe9"]
+        points = array([(2.0, 3.0), (20.0, 10.5), (5.0, 30.0)])
+        expected = agg.GraphicsContextArray((50,50))
+        expected.set_font(Font('modern'))
+        expected.rotate_ctm(0.1)
+        for text, (x, y) in zip(strings, points):
+            expected.show_text_at_point(text, x, y)
+
+        gc = agg.GraphicsContextArray((50,50))
+        gc.set_font(Font('modern'))
+        gc.rotate_ctm(0.1)
+        gc.set_text_position(7, 8)
+        self.assertTrue(gc.show_text_at_points(strings, points))
+        self.assertTrue(all(gc.bmp_array == expected.bmp_array))
+        self.assertTrue(allclose(gc.get_text_position(), (7, 8)))
+
+    def test_text_extent_ignores_ctm(self):
+        gc = agg.GraphicsContextArray((50,50))
+        gc.set_font(Font('modern'))
+        extent = gc.get_text_extent("Hello")
+        with gc:
+            gc.scale_ctm(3.0, 2.0)
+            gc.show_text_at_point("Hello", 0, 0)
+        gc.set_font(Font('modern', 20))
+        gc.get_text_extent("Hello")
+        gc.set_font(Font('modern'))
+        self.assertEqual(gc.get_text_extent("Hello"), extent)
+
     def test_set_line_dash_none(self):
         gc = agg.GraphicsContextArray((5,5))
         gc.set_line_dash(None)
@@ -0,0 +1,179 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from cStringIO import StringIO
+from Queue import Queue
+
+from numpy import array, uint8
+
+from kiva import agg
+from kiva.agg import image_encoding
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# The RGBA pixels of a 3x2 image whose top left pixel is red, and whose
+# bottom right pixel is half transparent blue.
+RGBA = array([[[255, 0, 0, 255], [255, 255, 255, 255], [255, 255, 255, 255]],
+              [[255, 255, 255, 255], [255, 255, 255, 255], [0, 0, 255, 127]]],
+             uint8)
+
+
+def make_gc(pix_format):
+    """ Returns a context holding the RGBA image in *pix_format*.
+    """
+    channels = image_encoding._pixel_formats[pix_format][-1]
+    pixels = RGBA.copy()
+    pixels[..., channels] = RGBA
+    return agg.GraphicsContextArray(pixels, pix_format)
+
+
+class RGB565Context(object):
+    """ Stands in for a context in a pixel format that can't be saved. """
+
+    def format(self):
+        return "rgb565"
+
+
+def decode_png(data):
+    """ Returns the (width, height, color type, pixels) of a PNG file
+    written by encode_png().
+    """
+    assert data[:8] == "\x89PNG\r\n\x1a\n"
+    chunks = {}
+    position = 8
+    while position < len(data):
+        length = int(data[position:position + 4].encode("hex"), 16)
+        chunk_type = data[position + 4:position + 8]
+        chunks[chunk_type] = data[position + 8:position + 8 + length]
+        position += 12 + length
+    header = chunks["IHDR"]
+    width = int(header[0:4].encode("hex"), 16)
+    height = int(header[4:8].encode("hex"), 16)
+    color_type = ord(header[9])
+    raw = array(bytearray(zlib.decompress(chunks["IDAT"])), uint8)
+    rows = raw.reshape(height, -1)
+    assert (rows[:, 0] == 0).all()
+    return width, height, color_type, rows[:, 1:].reshape(height, width, -1)
+
+
+class EncodePNGTestCase(unittest.TestCase):
+
+    def test_channel_order(self):
+        expected = RGBA
+        for pix_format in ("bgra32", "argb32", "abgr32"):
+            width, height, color_type, pixels = decode_png(
+                image_encoding.encode_png(make_gc(pix_format)))
+            self.assertEqual((width, height, color_type), (3, 2, 6))
+            self.assertEqual(pixels.tolist(), expected.tolist())
+
+    def test_without_alpha(self):
+        gc = make_gc("bgra32")
+        width, height, color_type, pixels = decode_png(
+            image_encoding.encode_png(gc, alpha=False))
+        self.assertEqual(color_type, 2)
+        self.assertEqual(pixels[0, 0].tolist(), [255, 0, 0])
+
+    def test_chunks(self):
+        gc = agg.GraphicsContextArray((5, 7), "rgb24")
+        gc.bmp_array.flat = range(7 * 5 * 3)
+        width, height, color_type, pixels = decode_png(
+            image_encoding.encode_png(gc, chunk_rows=2))
+        self.assertEqual(pixels.tolist(), gc.bmp_array.tolist())
+
+    def test_unsupported_format(self):
+        gc = RGB565Context()
+        self.assertRaises(ValueError, image_encoding.encode_png, gc)
+
+
+class PILEncodingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if Image is None:
+            raise unittest.SkipTest("PIL is not available")
+
+    def test_pil_image(self):
+        expected = RGBA
+        for pix_format in ("rgba32", "bgra32", "argb32", "abgr32"):
+            img = image_encoding.pil_image(make_gc(pix_format))
+            self.assertEqual(img.mode, "RGBA")
+            self.assertEqual(img.size, (3, 2))
+            self.assertEqual(list(img.getdata()),
+                             [tuple(p) for p in expected.reshape(-1, 4)])
+
+    def test_encode(self):
+        gc = make_gc("bgra32")
+        data = gc.encode("png")
+        img = Image.open(StringIO(data))
+        self.assertEqual(img.mode, "RGBA")
+        self.assertEqual(img.getpixel((0, 0)), (255, 0, 0, 255))
+        self.assertEqual(img.getpixel((2, 1))[3], 127)
+
+    def test_save_without_alpha(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "image.bmp")
+            make_gc("bgra32").save(filename)
+            img = Image.open(filename)
+            self.assertEqual(img.mode, "RGB")
+            self.assertEqual(img.getpixel((0, 0)), (255, 0, 0))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_save_tiff(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "image.tif")
+            make_gc("bgra32").save(filename)
+            img = Image.open(filename)
+            self.assertEqual(img.format, "TIFF")
+            self.assertEqual(img.getpixel((0, 0)), (255, 0, 0, 255))
+
+            buffer = StringIO()
+            make_gc("bgra32").save(buffer, "tif")
+            self.assertEqual(Image.open(StringIO(buffer.getvalue())).format,
+                             "TIFF")
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_save_needs_format_for_file_objects(self):
+        self.assertRaises(ValueError, make_gc("bgra32").save, StringIO())
+
+
+class ImageEncoderTestCase(unittest.TestCase):
+
+    def test_encode(self):
+        gc = make_gc("bgra32")
+        with image_encoding.ImageEncoder(threads=2) as encoder:
+            results = [encoder.encode(gc, "png") for i in range(4)]
+            data = [result.get() for result in results]
+        self.assertEqual(len(set(data)), 1)
+
+    def test_copy(self):
+        gc = make_gc("bgra32")
+        encoder = image_encoding.ImageEncoder(threads=1)
+        try:
+            # Keep the thread busy until the context has been cleared
+            blocked = Queue()
+            encoder._pool.apply_async(blocked.get)
+            result = encoder.encode(gc, "png", copy=True)
+            gc.clear((0.0, 0.0, 0.0, 1.0))
+            blocked.put(None)
+            self.assertEqual(result.get(), make_gc("bgra32").encode("png"))
+        finally:
+            encoder.close()
+
+    def test_errors(self):
+        gc = RGB565Context()
+        with image_encoding.ImageEncoder(threads=1) as encoder:
+            result = encoder.encode(gc, "png")
+            self.assertRaises(ValueError, result.get)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from numpy import random, uint8
+
+from kiva import agg
+from kiva.agg import image_source
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ImageSourceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        state = random.RandomState(0)
+        self.pixels = state.randint(0, 256, (30, 20, 4)).astype(uint8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def test_raw(self):
+        filename = self.path("image.raw")
+        with open(filename, "wb") as fp:
+            fp.write("header")
+            fp.write(self.pixels.tostring())
+        source = image_source.open_raw(filename, (20, 30), "rgba32", 6)
+        self.assertEqual(source.size, (20, 30))
+        self.assertTrue(isinstance(source.as_array(), numpy.memmap))
+        self.assertTrue((source.as_array() == self.pixels).all())
+
+    def test_npy(self):
+        filename = self.path("image.npy")
+        numpy.save(filename, self.pixels[..., :3])
+        img = agg.Image(filename)
+        self.assertEqual(img.format(), "rgb24")
+        self.assertTrue(isinstance(img.bmp_array, numpy.memmap))
+        self.assertTrue((img.bmp_array == self.pixels[..., :3]).all())
+
+        # Drawing into the image does not change the file
+        img.clear((0.0, 0.0, 0.0))
+        self.assertTrue((numpy.load(filename) == self.pixels[..., :3]).all())
+
+    def test_tiff(self):
+        if Image is None:
+            raise unittest.SkipTest("PIL is not available")
+        filename = self.path("image.tif")
+        Image.fromarray(self.pixels, "RGBA").save(filename)
+        source = image_source.open_image(filename)
+        self.assertTrue(isinstance(source, image_source.ArraySource))
+        self.assertEqual(source.pix_format, "rgba32")
+        self.assertTrue((source.as_array() == self.pixels).all())
+
+    def test_compressed_tiff(self):
+        if Image is None:
+            raise unittest.SkipTest("PIL is not available")
+        filename = self.path("image.tif")
+        Image.fromarray(self.pixels, "RGBA").save(filename,
+                                                  compression="tiff_lzw")
+        self.assertEqual(image_source.open_tiff(filename), None)
+        img = agg.Image(filename)
+        self.assertTrue((img.bmp_array == self.pixels).all())
+
+    def test_pil_bands(self):
+        if Image is None:
+            raise unittest.SkipTest("PIL is not available")
+        filename = self.path("image.png")
+        Image.fromarray(self.pixels, "RGBA").save(filename)
+        source = image_source.open_image(filename)
+        self.assertTrue(isinstance(source, image_source.PILSource))
+        self.assertTrue((source.read(5, 10, 4, 3) ==
+                         self.pixels[10:13, 5:9]).all())
+        out = numpy.zeros((30, 20, 4), uint8)
+        self.assertTrue(source.as_array(out) is out)
+        self.assertTrue((out == self.pixels).all())
+
+
+class TiledImageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        state = random.RandomState(0)
+        self.pixels = state.randint(0, 256, (300, 200, 4)).astype(uint8)
+        self.image = image_source.TiledImage(
+            image_source.ArraySource(self.pixels), tile_size=64)
+
+    def test_draw_matches_image(self):
+        gc = agg.GraphicsContextArray((100, 100), "rgba32")
+        gc.draw_image(self.image, (0, 0, 200, 300))
+        expected = agg.GraphicsContextArray((100, 100), "rgba32")
+        expected.draw_image(agg.GraphicsContextArray(self.pixels, "rgba32"),
+                            (0, 0, 200, 300))
+        self.assertTrue((gc.bmp_array == expected.bmp_array).all())
+
+    def test_visible_tiles(self):
+        gc = agg.GraphicsContextArray((100, 100), "rgba32")
+        # The context shows the bottom left 100x100 pixels of the image
+        self.assertEqual(self.image.draw_tiles(gc, (0, 0, 200, 300)), 4)
+        gc.clip_to_rect(10, 10, 20, 20)
+        self.assertEqual(self.image.draw_tiles(gc, (0, 0, 200, 300)), 1)
+        gc.translate_ctm(-500, 0)
+        self.assertEqual(self.image.draw_tiles(gc, (0, 0, 200, 300)), 0)
+
+    def test_cache(self):
+        self.image.max_tiles = 2
+        gc = agg.GraphicsContextArray((100, 100), "rgba32")
+        self.image.draw_tiles(gc, (0, 0, 200, 300))
+        self.assertEqual(len(self.image._tiles), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,10 +31,11 @@
 import affine
 import copy
 from numpy import alltrue, array, asarray, float64, sometrue, shape,\
-     pi, concatenate
+     pi, concatenate, uint8
 import numpy as np
 
 from constants import *
+from text_extent_cache import text_extent_cache
 
 def exactly_equal(arr1,arr2):
     return shape(arr1)==shape(arr2) and alltrue(arr1==arr2)
@@ -270,6 +271,137 @@ class GraphicsState(LineState):
     def copy(self):
         return copy.deepcopy(self)
 
+def split_subpaths(vertices, codes):
+    """ Splits the (vertices, codes) arrays returned by compile_path() into
+        a list of the vertex arrays of each subpath.  Subpaths with fewer
+        than two vertices are dropped.
+    """
+    starts = np.flatnonzero(codes == PATH_MOVE_TO)
+    ends = np.append(starts[1:], len(codes))
+    return [vertices[start:end] for start, end in zip(starts, ends)
+            if end - start > 1]
+
+class CompiledPath(object):
+    """ A path that can be built once and drawn many times.
+
+        The path records the drawing calls made on it and replays them into
+        a graphics context when passed to add_path() or
+        draw_path_at_points().
+    """
+
+    def __init__(self):
+        # List of (method name, args) tuples
+        self.state = []
+
+    def _record(self, name, *args):
+        self.state.append((name, args))
+
+    def is_empty(self):
+        return len(self.state) == 0
+
+    def begin_path(self):
+        self.state = []
+
+    def move_to(self, x, y):
+        self._record('move_to', x, y)
+
+    def line_to(self, x, y):
+        self._record('line_to', x, y)
+
+    def lines(self, points):
+        self._record('lines', points)
+
+    def line_set(self, starts, ends):
+        self._record('line_set', starts, ends)
+
+    def rect(self, x, y, sx, sy):
+        self._record('rect', x, y, sx, sy)
+
+    def rects(self, rects):
+        self._record('rects', rects)
+
+    def close_path(self, tag=None):
+        self._record('close_path')
+
+    def curve_to(self, x_ctrl1, y_ctrl1, x_ctrl2, y_ctrl2, x_to, y_to):
+        self._record('curve_to', x_ctrl1, y_ctrl1, x_ctrl2, y_ctrl2,
+                     x_to, y_to)
+
+    def quad_curve_to(self, x_ctrl, y_ctrl, x_to, y_to):
+        self._record('quad_curve_to', x_ctrl, y_ctrl, x_to, y_to)
+
+    def arc(self, x, y, radius, start_angle, end_angle, cw=False):
+        self._record('arc', x, y, radius, start_angle, end_angle, cw)
+
+    def arc_to(self, x1, y1, x2, y2, radius):
+        self._record('arc_to', x1, y1, x2, y2, radius)
+
+    def add_path(self, path):
+        self._record('add_path', path)
+
+    def save_ctm(self):
+        self._record('save_state')
+
+    def restore_ctm(self):
+        self._record('restore_state')
+
+    def scale_ctm(self, sx, sy=None):
+        if sy is None:
+            sy = sx
+        self._record('scale_ctm', sx, sy)
+
+    def translate_ctm(self, tx, ty):
+        self._record('translate_ctm', tx, ty)
+
+    def rotate_ctm(self, angle):
+        self._record('rotate_ctm', angle)
+
+    def concat_ctm(self, transform):
+        self._record('concat_ctm', transform)
+
+def marker_path(marker, size):
+    """ Returns a (CompiledPath, draw mode) tuple that draws one of the kiva
+        marker types (see kiva.constants) centered on the origin, or
+        (None, None) if the marker type has no path representation.
+
+        The shapes match the markers in enable.markers.
+    """
+    path = CompiledPath()
+    mode = FILL_STROKE
+    if marker == SQUARE_MARKER:
+        path.rect(-size, -size, size * 2, size * 2)
+    elif marker == DIAMOND_MARKER:
+        path.lines(array(((0, -size), (-size, 0), (0, size), (size, 0))))
+        path.close_path()
+    elif marker in (CIRCLE_MARKER, DOT_MARKER):
+        path.arc(0, 0, size, 0, 2 * pi)
+        path.close_path()
+    elif marker == CROSSED_CIRCLE_MARKER:
+        path.arc(0, 0, size, 0, 2 * pi)
+        path.close_path()
+        path.line_set(array(((-size, 0), (0, -size))),
+                      array(((size, 0), (0, size))))
+    elif marker == TRIANGLE_MARKER:
+        path.lines(array(((-size, -size), (size, -size), (0, 0.732 * size))))
+        path.close_path()
+    elif marker == INVERTED_TRIANGLE_MARKER:
+        path.lines(array(((-size, size), (size, size), (0, -0.732 * size))))
+        path.close_path()
+    elif marker == PLUS_MARKER:
+        path.line_set(array(((0, -size), (-size, 0))),
+                      array(((0, size), (size, 0))))
+        mode = STROKE
+    elif marker == CROSS_MARKER:
+        path.line_set(array(((-size, -size), (size, -size))),
+                      array(((size, size), (-size, size))))
+        mode = STROKE
+    elif marker == PIXEL_MARKER:
+        path.rect(-0.5, -0.5, 1.0, 1.0)
+        mode = FILL
+    else:
+        return None, None
+    return path, mode
+
 class GraphicsContextBase(object):
     """
 
@@ -295,6 +427,10 @@ class GraphicsContextBase(object):
         path and active_subpath will probably need to be optimized somehow.
     """
 
+    # The TextExtentCache that text extents are looked up in, or None to
+    # always measure the text
+    text_extent_cache = text_extent_cache
+
     def __init__(self, *args, **kwargs):
         super(GraphicsContextBase, self).__init__()
         self.state = GraphicsState()
@@ -599,21 +735,13 @@ class GraphicsContextBase(object):
     def begin_path(self):
         """ Clears the current drawing path and begin a new one.
         """
-        # Need to check here if the current subpath contains matrix
-        # transforms.  If  it does, pull these out, and stick them
-        # in the new subpath.
-        if self.path_transform_indices:
-            #print 'begin'
-            #print self.path_transform_indices
-            #print len(self.active_subpath)
-            #tf = take(array(self.active_subpath,object),
-            #          self.path_transform_indices)
-            tf = array(self.active_subpath, object)[self.path_transform_indices, :]
-            self.path_transform_indices = range(len(tf))
-            self.active_subpath = list(tf)
-        else:
-            self.active_subpath = []
+        # The matrix transforms recorded in the old path have already been
+        # applied to state.ctm, so the new path starts from the current ctm
+        # rather than replaying them.
+        self.active_subpath = []
+        self.path_transform_indices = []
         self.path = [self.active_subpath]
+        self.device_ctm = self.state.ctm.copy()
 
     def move_to(self,x,y):
         """ Starts a new drawing subpath and place the current point at (x,y).
@@ -870,10 +998,20 @@ class GraphicsContextBase(object):
                       [aff[2], aff[3], 0],
                       [aff[4], aff[5], 1]], float64)
 
+    def get_empty_path(self):
+        """ Returns a path object that can be built up and then reused.
+        """
+        return CompiledPath()
+
     def add_path(self, path):
         """Draw a compiled path into this gc.  Note: if the CTM is
         changed and not restored to the identity in the compiled path,
         the CTM change will continue in this GC."""
+        if isinstance(path, CompiledPath):
+            for name, args in path.state:
+                getattr(self, name)(*args)
+            return
+
         # Local import to avoid a dependency if we can avoid it.
         from kiva import agg
 
@@ -955,6 +1093,16 @@ class GraphicsContextBase(object):
         """
         pass
 
+    def _transform_rect(self, x, y, width, height):
+        """ Returns the (x, y, width, height) bounding box of a rectangle
+            after it has been transformed by the current ctm.
+        """
+        pts = affine.transform_points(self.state.ctm,
+                                      array(((x, y), (x+width, y+height))))
+        xmin, ymin = pts.min(axis=0)
+        xmax, ymax = pts.max(axis=0)
+        return xmin, ymin, xmax - xmin, ymax - ymin
+
     def clear_clip_path(self):
         self.state.clipping_path=None
         self.device_destroy_clipping_path()
@@ -1285,6 +1433,13 @@ class GraphicsContextBase(object):
         """
         pass
 
+    def show_text_at_points(self, strings, points):
+        """ Draws each string in *strings* with its text position at the
+        corresponding (x, y) in *points*.
+        """
+        for text, (x, y) in zip(strings, points):
+            self.show_text_at_point(text, x, y)
+
     def show_glyphs_at_point(self):
         """
         """
@@ -1346,36 +1501,12 @@ class GraphicsContextBase(object):
         self.device_update_line_state()
         self.device_update_fill_state()
 
-        for subpath in self.path:
-            # reset the current point for drawing.
-            #self.current_point = array((0.,0.))
-            self.clear_subpath_points()
-            for func,args in subpath:
-                if func == POINT:
-                    self.draw_subpath(mode)
-                    self.add_point_to_subpath(args)
-                    self.first_point = args
-                elif func == LINE:
-                    self.add_point_to_subpath(args)
-                elif func == LINES:
-                    self.draw_subpath(mode)
-                    # add all points in list to subpath.
-                    self.add_point_to_subpath(args)
-                    self.first_point = args[0]
-                elif func == CLOSE:
-                    self.add_point_to_subpath(self.first_point)
-                    self.draw_subpath(mode)
-                elif func == RECT:
-                    self.draw_subpath(mode)
-                    self.device_draw_rect(args[0],args[1],args[2],args[3],
-                                          mode)
-                elif func in [SCALE_CTM,ROTATE_CTM,TRANSLATE_CTM,
-                              CONCAT_CTM,LOAD_CTM]:
-                    self.device_transform_device_ctm(func,args)
-                else:
-                    print 'oops:', func
-            # finally, draw any remaining paths.
-            self.draw_subpath(mode)
+        # Flatten the whole path into one vertex array and draw each subpath
+        # as a slice of it.
+        vertices, codes = self.compile_path()
+        for pts in split_subpaths(vertices, codes):
+            self.device_fill_points(pts, mode)
+            self.device_stroke_points(pts, mode)
 
         #---------------------------------------------------------------------
         # reset the alpha values for line and fill values.
@@ -1389,6 +1520,179 @@ class GraphicsContextBase(object):
         #---------------------------------------------------------------------
         self.begin_path()
 
+    def draw_path_at_points(self, points, path, mode=FILL_STROKE):
+        """ Draws a copy of a path translated to each of a set of points.
+
+            Parameters
+            ----------
+            points
+                an Nx2 array of x,y pairs
+            path
+                the path to draw, usually built from get_empty_path()
+            mode
+                the drawing mode, as for draw_path()
+
+            The path is compiled once and handed to
+            device_draw_path_at_points() along with the device positions
+            of all the points, so backends can emit the shape a single
+            time.  The current path is not affected.
+        """
+        points = asarray(points, float64).reshape(-1, 2)
+        scratch = GraphicsContextBase()
+        scratch.add_path(path)
+        vertices, codes = scratch.compile_path()
+        if len(points) == 0 or len(codes) == 0:
+            return
+
+        # The shape only sees the linear part of the ctm; the translation is
+        # carried by the positions.
+        ctm = self.get_ctm()
+        origin = affine.transform_point(ctm, (0.0, 0.0))
+        vertices = affine.transform_points(ctm, vertices) - origin
+        positions = affine.transform_points(ctm, points)
+
+        old_line_alpha = self.state.line_color[3]
+        old_fill_alpha = self.state.fill_color[3]
+        if mode not in [STROKE, FILL_STROKE, EOF_FILL_STROKE]:
+            self.state.line_color[3] = 0.0
+        if mode not in [FILL, EOF_FILL, FILL_STROKE, EOF_FILL_STROKE]:
+            self.state.fill_color[3] = 0.0
+
+        self.device_update_line_state()
+        self.device_update_fill_state()
+        self.device_draw_path_at_points(positions, vertices, codes, mode)
+
+        self.state.line_color[3] = old_line_alpha
+        self.state.fill_color[3] = old_fill_alpha
+
+    def draw_marker_at_points(self, points, size, marker=SQUARE_MARKER):
+        """ Draws one of the kiva marker types (see kiva.constants) centered
+            on each of the given points.
+
+            Returns 1 if the marker was drawn and 0 if the marker type is
+            not supported, mirroring the Agg implementation.
+        """
+        path, mode = marker_path(marker, size)
+        if path is None:
+            return 0
+        self.draw_path_at_points(points, path, mode)
+        return 1
+
+    def device_draw_path_at_points(self, positions, vertices, codes, mode):
+        """ Draws the compiled path (vertices, codes) at each of the device
+            positions.
+
+            vertices are relative to each position and already transformed
+            by the ctm.  This default implementation draws every copy with
+            device_fill_points(); backends that can define a shape once and
+            reference it should override it.
+        """
+        subpaths = split_subpaths(vertices, codes)
+        for position in positions:
+            for subpath in subpaths:
+                pts = subpath + position
+                self.device_fill_points(pts, mode)
+                self.device_stroke_points(pts, mode)
+
+    def compile_path(self):
+        """ Flattens the current path into device coordinates.
+
+            Returns a tuple (vertices, codes), where vertices is an Nx2 array
+            of points with the device ctm applied and codes is a length N
+            uint8 array of PATH_MOVE_TO, PATH_LINE_TO and PATH_CLOSE values.
+            Every subpath starts with a PATH_MOVE_TO vertex; the vertex of a
+            PATH_CLOSE is a copy of the first vertex of its subpath.
+
+            Consecutive points drawn under the same ctm are transformed with
+            a single call to affine.transform_points().  The ctm changes
+            recorded in the path are applied to device_ctm as a side effect.
+        """
+        vertex_chunks = []
+        code_chunks = []
+        # Individual (untransformed) points waiting to be transformed in bulk
+        pending_points = []
+        pending_codes = []
+        # Index of the first vertex of each closed subpath, and of its close
+        close_indices = []
+        start_indices = []
+
+        count = 0
+        subpath_start = None
+        ctm = self.device_ctm
+
+        for subpath in self.path:
+            # Every element of self.path starts a new subpath
+            subpath_start = None
+            for func, args in subpath:
+                if func == POINT or func == LINE:
+                    index = count + len(pending_points)
+                    if func == POINT or subpath_start is None:
+                        subpath_start = index
+                        pending_codes.append(PATH_MOVE_TO)
+                    else:
+                        pending_codes.append(PATH_LINE_TO)
+                    pending_points.append(args)
+                elif func == LINES or func == RECT:
+                    if pending_points:
+                        vertex_chunks.append(affine.transform_points(ctm,
+                                             asarray(pending_points, float64)))
+                        code_chunks.append(array(pending_codes, uint8))
+                        count += len(pending_points)
+                        pending_points = []
+                        pending_codes = []
+                    if func == RECT:
+                        x, y, sx, sy = args
+                        args = ((x, y), (x, y+sy), (x+sx, y+sy), (x+sx, y),
+                                (x, y))
+                    pts = asarray(args, float64)
+                    if len(pts) == 0:
+                        continue
+                    codes = np.empty(len(pts), uint8)
+                    codes.fill(PATH_LINE_TO)
+                    codes[0] = PATH_MOVE_TO
+                    vertex_chunks.append(affine.transform_points(ctm, pts))
+                    code_chunks.append(codes)
+                    subpath_start = count
+                    count += len(pts)
+                    if func == RECT:
+                        subpath_start = None
+                elif func == CLOSE:
+                    if subpath_start is not None:
+                        index = count + len(pending_points)
+                        close_indices.append(index)
+                        start_indices.append(subpath_start)
+                        pending_points.append((0.0, 0.0))
+                        pending_codes.append(PATH_CLOSE)
+                        subpath_start = None
+                elif func in (SCALE_CTM, ROTATE_CTM, TRANSLATE_CTM,
+                              CONCAT_CTM, LOAD_CTM):
+                    # Points added so far use the old ctm
+                    if pending_points:
+                        vertex_chunks.append(affine.transform_points(ctm,
+                                             asarray(pending_points, float64)))
+                        code_chunks.append(array(pending_codes, uint8))
+                        count += len(pending_points)
+                        pending_points = []
+                        pending_codes = []
+                    self.device_transform_device_ctm(func, args)
+                    ctm = self.device_ctm
+                else:
+                    print 'oops:', func
+
+        if pending_points:
+            vertex_chunks.append(affine.transform_points(ctm,
+                                 asarray(pending_points, float64)))
+            code_chunks.append(array(pending_codes, uint8))
+
+        if not vertex_chunks:
+            return np.zeros((0, 2), float64), np.zeros((0,), uint8)
+
+        vertices = concatenate(vertex_chunks)
+        codes = concatenate(code_chunks)
+        if close_indices:
+            vertices[close_indices] = vertices[start_indices]
+        return vertices, codes
+
     def device_prepare_device_ctm(self):
         self.device_ctm = affine.affine_identity()
 
@@ -15,7 +15,7 @@ import numpy
 import warnings
 
 from .arc_conversion import arc_to_tangent_points
-from . import basecore2d, constants
+from . import affine, basecore2d, constants
 
 
 line_join = {constants.JOIN_BEVEL: cairo.LINE_JOIN_BEVEL,
@@ -744,14 +744,13 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
 
 
     def add_path(self, path):
-        """Draw a compiled path into this gc.
-        In this case, a compiled path is a Cairo.Path"""
-        if isinstance(path, CompiledPath):
-            self.begin_path()
-            for op_name, op_args in path.state:
-                op = getattr(self, op_name)
-                op(*op_args)
-            self.close_path()
+        """ Adds a compiled path to the current path.
+
+            The cairo.Path of a CompiledPath is built once and appended in a
+            single call; other paths (e.g. a kiva.basecore2d.CompiledPath)
+            are built each time.
+        """
+        self._ctx.append_path(_cairo_path(path))
 
 
 
@@ -1166,6 +1165,78 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
 
         ctx.set_fill_rule(fr)
 
+    def get_empty_path(self):
+        """ Return a path object that can be built up and then reused.
+        """
+        return CompiledPath()
+
+    def draw_path_at_points(self, points, path, mode=constants.FILL_STROKE):
+        """ Draws a copy of *path* translated to each of *points*.
+
+            The cairo.Path of the path is built once, and each point only
+            translates the ctm and appends it.  When the copies are only
+            filled (with the nonzero winding rule) or only stroked, with an
+            opaque color, they are all added to one path and painted at
+            once, which looks the same as painting them one at a time.
+            The current path is not affected.
+        """
+        points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+        if len(points) == 0:
+            return
+        fill = mode in (constants.FILL, constants.EOF_FILL,
+                        constants.FILL_STROKE, constants.EOF_FILL_STROKE)
+        stroke = mode in (constants.STROKE, constants.FILL_STROKE,
+                          constants.EOF_FILL_STROKE)
+        if not (fill or stroke):
+            return
+
+        ctx = self._ctx
+        marker = _cairo_path(path)
+        current_path = ctx.copy_path()
+
+        ctx.save()
+        ctx.new_path()
+        if mode in (constants.EOF_FILL, constants.EOF_FILL_STROKE):
+            ctx.set_fill_rule(cairo.FILL_RULE_EVEN_ODD)
+        else:
+            ctx.set_fill_rule(cairo.FILL_RULE_WINDING)
+
+        color = self.state.fill_color if fill else self.state.stroke_color
+        if not self.state.has_gradient and not (fill and stroke):
+            self._set_source_color(color)
+        batch = not self.state.has_gradient and not (fill and stroke) and \
+            mode != constants.EOF_FILL and \
+            (len(color) == 3 or color[3] >= 1.0)
+
+        x0 = y0 = 0.0
+        for x, y in points:
+            ctx.translate(x - x0, y - y0)
+            x0, y0 = x, y
+            ctx.append_path(marker)
+            if batch:
+                continue
+            if fill and stroke:
+                if not self.state.has_gradient:
+                    self._set_source_color(self.state.fill_color)
+                ctx.fill_preserve()
+                if not self.state.has_gradient:
+                    self._set_source_color(self.state.stroke_color)
+                ctx.stroke()
+            elif fill:
+                ctx.fill()
+            else:
+                ctx.stroke()
+
+        if batch:
+            if fill:
+                ctx.fill()
+            else:
+                ctx.stroke()
+
+        ctx.restore()
+        ctx.new_path()
+        ctx.append_path(current_path)
+
     def stroke_rect(self):
         """
         How does this affect the current path?
@@ -1246,34 +1317,39 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         self.surface.write_to_png(filename)
 
 
-class CompiledPath(object):
-
-    def __init__(self):
-        self.state = []
-
-    def add_path(self, *args):
-        self.state.append(('begin_path', args))
-
-    def rect(self, *args):
-        self.state.append(('rect', args))
+class CompiledPath(basecore2d.CompiledPath):
+    """ A path that can be built once and drawn many times.
 
-    def move_to(self, *args):
-        self.state.append(('move_to', args))
+        The path records the drawing calls made on it.  The first time it is
+        drawn, the calls are replayed into a scratch cairo context and the
+        resulting cairo.Path is kept, so add_path() and draw_path_at_points()
+        append the finished geometry instead of replaying the calls.
+    """
 
-    def line_to(self, *args):
-        self.state.append(('line_to', args))
+    def __init__(self):
+        super(CompiledPath, self).__init__()
+        self._cairo_path = None
 
-    def close_path(self, *args):
-        self.state.append(('close_path', args))
+    def _record(self, name, *args):
+        super(CompiledPath, self)._record(name, *args)
+        self._cairo_path = None
 
-    def quad_curve_to(self, *args):
-        self.state.append(('quad_curve_to', args))
+    def begin_path(self):
+        super(CompiledPath, self).begin_path()
+        self._cairo_path = None
 
-    def curve_to(self, *args):
-        self.state.append(('curve_to', args))
+    def add_path(self, path):
+        # Build the added path now, so that changes made to it later do not
+        # change this one
+        self._record('add_path', _cairo_path(path))
 
-    def arc(self, *args):
-        self.state.append(('arc', args))
+    def cairo_path(self):
+        """ Returns the path as a cairo.Path, in the coordinates it was
+            built in.
+        """
+        if self._cairo_path is None:
+            self._cairo_path = _build_cairo_path(self.state)
+        return self._cairo_path
 
     def total_vertices(self):
         return len(self.state) + 1
@@ -1282,6 +1358,110 @@ class CompiledPath(object):
         return (self.state[index-1][1][0:2],)
 
 
+def _cairo_path(path):
+    """ Returns *path*, a CompiledPath, a kiva.basecore2d.CompiledPath or a
+        cairo.Path, as a cairo.Path.
+    """
+    if isinstance(path, CompiledPath):
+        return path.cairo_path()
+    elif isinstance(path, basecore2d.CompiledPath):
+        return _build_cairo_path(path.state)
+    return path
+
+
+def _as_cairo_matrix(transform):
+    """ Converts a cairo.Matrix, a kiva affine matrix or a sequence of six
+        matrix elements to a cairo.Matrix.
+    """
+    if isinstance(transform, cairo.Matrix):
+        return transform
+    if numpy.shape(transform) == (3, 3):
+        return cairo.Matrix(*affine.affine_params(transform))
+    return cairo.Matrix(*transform)
+
+
+def _quad_curve_to(ctx, x_ctrl, y_ctrl, x_to, y_to):
+    x0, y0 = ctx.get_current_point()
+    ctx.curve_to((x0 + 2 * x_ctrl) / 3.0, (y0 + 2 * y_ctrl) / 3.0,
+                 (x_to + 2 * x_ctrl) / 3.0, (y_to + 2 * y_ctrl) / 3.0,
+                 x_to, y_to)
+
+
+def _arc(ctx, x, y, radius, start_angle, end_angle, cw=False):
+    if cw:
+        ctx.arc_negative(x, y, radius, start_angle, end_angle)
+    else:
+        ctx.arc(x, y, radius, start_angle, end_angle)
+
+
+def _arc_to(ctx, x1, y1, x2, y2, radius):
+    t1, t2 = arc_to_tangent_points(ctx.get_current_point(), (x1, y1),
+                                   (x2, y2), radius)
+    ctx.line_to(*t1)
+    ctx.curve_to(x1, y1, x1, y1, *t2)
+    ctx.line_to(x2, y2)
+
+
+def _lines(ctx, points):
+    ctx.new_sub_path()
+    for x, y in points:
+        ctx.line_to(x, y)
+
+
+def _line_set(ctx, starts, ends):
+    for start, end in izip(starts, ends):
+        ctx.move_to(*start)
+        ctx.line_to(*end)
+
+
+def _rects(ctx, rects):
+    for x, y, sx, sy in rects:
+        ctx.rectangle(x, y, sx, sy)
+
+
+# Replays each of the calls recorded by a CompiledPath on a cairo.Context.
+# The calls that save and restore the ctm are handled by _build_cairo_path().
+_path_ops = {
+    'begin_path': lambda ctx: ctx.new_path(),
+    'move_to': lambda ctx, x, y: ctx.move_to(x, y),
+    'line_to': lambda ctx, x, y: ctx.line_to(x, y),
+    'lines': _lines,
+    'line_set': _line_set,
+    'rect': lambda ctx, x, y, sx, sy: ctx.rectangle(x, y, sx, sy),
+    'rects': _rects,
+    'close_path': lambda ctx, tag=None: ctx.close_path(),
+    'curve_to': lambda ctx, *args: ctx.curve_to(*args),
+    'quad_curve_to': _quad_curve_to,
+    'arc': _arc,
+    'arc_to': _arc_to,
+    'add_path': lambda ctx, path: ctx.append_path(_cairo_path(path)),
+    'scale_ctm': lambda ctx, sx, sy: ctx.scale(sx, sy),
+    'translate_ctm': lambda ctx, tx, ty: ctx.translate(tx, ty),
+    'rotate_ctm': lambda ctx, angle: ctx.rotate(angle),
+    'concat_ctm': lambda ctx, transform: ctx.transform(
+        _as_cairo_matrix(transform)),
+}
+
+
+def _build_cairo_path(state):
+    """ Replays the (method name, args) calls recorded by a CompiledPath into
+        a scratch context, and returns the resulting cairo.Path.
+    """
+    ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
+    matrices = []
+    for name, args in state:
+        if name in ('save_state', 'save_ctm'):
+            matrices.append(ctx.get_matrix())
+        elif name in ('restore_state', 'restore_ctm'):
+            ctx.set_matrix(matrices.pop())
+        else:
+            _path_ops[name](ctx, *args)
+    # copy_path() reports the path in user space, so go back to the space
+    # the path was started in.
+    ctx.identity_matrix()
+    return ctx.copy_path()
+
+
 def font_metrics_provider():
     return GraphicsContext((1,1))
 
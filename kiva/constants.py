@@ -112,6 +112,18 @@ CONCAT_CTM     = 8
 LOAD_CTM       = 9
 
 
+#-----------------------------------------------------------------------------
+# Compiled Path Vertex Codes
+#
+# Used by the flattened (vertex array, code array) path representation that
+# the pure-Python backends build when drawing a path.
+#-----------------------------------------------------------------------------
+
+PATH_MOVE_TO   = 0
+PATH_LINE_TO   = 1
+PATH_CLOSE     = 2
+
+
 #-----------------------------------------------------------------------------
 # Marker Types
 #
@@ -0,0 +1,131 @@
+#------------------------------------------------------------------------------
+# Copyright (c) 2005, Enthought, Inc.
+# All rights reserved.
+#
+# This software is provided without warranty under the terms of the BSD
+# license included in enthought/LICENSE.txt and may be redistributed only
+# under the conditions described in the aforementioned license.  The license
+# is also available online at http://www.enthought.com/licenses/BSD.txt
+# Thanks for using Enthought open source!
+#------------------------------------------------------------------------------
+""" Output helpers for the backends which write out a text document, such as
+    SVG and PostScript: bulk formatting of coordinates, and buffered writing
+    of the document while it is being drawn.
+"""
+
+import gzip
+import os
+
+from numpy import around, asarray, float64, ones
+
+# The default number of bytes collected before they are written out.
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Extensions which imply gzip compression, and the extension of the
+# uncompressed format.
+compressed_extensions = {'.svgz': '.svg'}
+
+
+def split_format(filename):
+    """ Returns the (format extension, compressed) for a file name, where
+    compressed tells whether the name asks for gzip compression.
+
+    'plot.svg' gives ('.svg', False), while 'plot.svgz' and 'plot.svg.gz'
+    both give ('.svg', True).
+    """
+    root, ext = os.path.splitext(filename)
+    ext = ext.lower()
+    if ext == '.gz':
+        return os.path.splitext(root)[1].lower(), True
+    if ext in compressed_extensions:
+        return compressed_extensions[ext], True
+    return ext, False
+
+
+def as_points(points):
+    """ Returns a sequence of (x, y) points as an Nx2 array of floats.
+    """
+    return asarray(points, dtype=float64).reshape(-1, 2)
+
+
+def drop_duplicate_points(points, precision):
+    """ Removes the points which are written out the same as the point before
+    them when rounded to *precision* decimal places.
+    """
+    points = as_points(points)
+    if len(points) < 2:
+        return points
+    rounded = around(points, precision)
+    keep = ones(len(points), dtype=bool)
+    keep[1:] = (rounded[1:] != rounded[:-1]).any(axis=1)
+    return points[keep]
+
+
+def format_points(points, template):
+    """ Formats every point with *template*, which takes the x and y
+    coordinates, e.g. '%.2f,%.2f '.  Returns the concatenated text.
+
+    All the points are formatted by a single % operation, which is several
+    times faster than formatting them one by one.
+    """
+    points = as_points(points)
+    return (template * len(points)) % tuple(points.ravel().tolist())
+
+
+class FileSink(object):
+    """ A write-only file which collects small writes and passes them on to
+    the underlying file in blocks of about buffer_size bytes.
+
+    *file* is either a file name or a file-like object with a write() method.
+    If *compress* is true, the data is gzip compressed.  A file opened by
+    the sink is closed by close(); a file-like object that was passed in is
+    only flushed.
+    """
+
+    def __init__(self, file, buffer_size=DEFAULT_BUFFER_SIZE, compress=False):
+        self.buffer_size = buffer_size
+        self._owns_file = isinstance(file, basestring)
+        if self._owns_file:
+            if compress:
+                file = gzip.GzipFile(file, 'wb')
+            else:
+                file = open(file, 'wb')
+        elif compress:
+            # Closing the GzipFile writes the gzip trailer without closing
+            # the file object it wraps.
+            file = gzip.GzipFile(fileobj=file, mode='wb')
+            self._owns_file = True
+        self.file = file
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """ Write the buffered data to the underlying file.
+        """
+        if self._chunks:
+            self.file.write(''.join(self._chunks))
+            self._chunks = []
+            self._size = 0
+
+    def close(self):
+        """ Write the buffered data and close the underlying file if the sink
+        opened it.
+        """
+        if self.file is None:
+            return
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+        elif hasattr(self.file, 'flush'):
+            self.file.flush()
+        self.file = None
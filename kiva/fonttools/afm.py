@@ -367,6 +367,13 @@ class AFM:
         try: return self._kern[ (name1, name2) ]
         except: return 0
 
+    def get_kern_pairs(self):
+        """
+        Return the kern pairs dictionary, keyed on (name1, name2)
+        tuples of glyph names
+        """
+        return self._kern
+
     def get_fontname(self):
         "Return the font name, eg, Times-Roman"
         return self._header['FontName']
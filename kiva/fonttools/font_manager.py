@@ -647,6 +647,47 @@ def afmFontProperty(fontpath, font):
 
     return FontEntry(fontpath, name, style, variant, weight, stretch, size)
 
+def createFontEntry(fpath, fontext='ttf'):
+    """
+    Returns a :class:`FontEntry` describing the font file *fpath*, or
+    None if the file can not be parsed.
+    """
+    if fontext == 'afm':
+        try:
+            fh = open(fpath, 'r')
+        except:
+            verbose.report("Could not open font file %s" % fpath)
+            return None
+        try:
+            try:
+                font = afm.AFM(fh)
+            finally:
+                fh.close()
+        except RuntimeError:
+            verbose.report("Could not parse font file %s"%fpath)
+            return None
+        try:
+            return afmFontProperty(fpath, font)
+        except:
+            return None
+    else:
+        try:
+            font = TTFont(str(fpath))
+        except RuntimeError:
+            verbose.report("Could not open font file %s"%fpath)
+            return None
+        except UnicodeError:
+            verbose.report("Cannot handle unicode filenames")
+            #print >> sys.stderr, 'Bad file is', fpath
+            return None
+        try:
+            # TTFont only reads the tables that are asked for, so this just
+            # parses the 'name' table.
+            try: return ttfFontProperty(fpath, font)
+            except: return None
+        finally:
+            font.close()
+
 def createFontList(fontfiles, fontext='ttf'):
     """
     A function to create a font lookup list.  The default is to create
@@ -662,38 +703,9 @@ def createFontList(fontfiles, fontext='ttf'):
         fname = os.path.split(fpath)[1]
         if fname in seen:  continue
         else: seen[fname] = 1
-        if fontext == 'afm':
-            try:
-                fh = open(fpath, 'r')
-            except:
-                verbose.report("Could not open font file %s" % fpath)
-                continue
-            try:
-                try:
-                    font = afm.AFM(fh)
-                finally:
-                    fh.close()
-            except RuntimeError:
-                verbose.report("Could not parse font file %s"%fpath)
-                continue
-            try:
-                prop = afmFontProperty(fpath, font)
-            except:
-                continue
-        else:
-            try:
-                font = TTFont(str(fpath))
-            except RuntimeError:
-                verbose.report("Could not open font file %s"%fpath)
-                continue
-            except UnicodeError:
-                verbose.report("Cannot handle unicode filenames")
-                #print >> sys.stderr, 'Bad file is', fpath
-                continue
-            try: prop = ttfFontProperty(fpath, font)
-            except: continue
-
-        fontlist.append(prop)
+        prop = createFontEntry(fpath, fontext)
+        if prop is not None:
+            fontlist.append(prop)
     return fontlist
 
 class FontProperties(object):
@@ -1006,6 +1018,101 @@ def pickle_load(filename):
         fh.close()
     return data
 
+class FontIndex(object):
+    """
+    A persistent index of the properties of font files, keyed on each
+    file's path.  An entry is reused for as long as the file's
+    modification time and size are unchanged, so only new or modified
+    fonts have to be opened and parsed.
+    """
+    def __init__(self, filename=None):
+        self.filename = filename
+        # Maps a font extension ('ttf' or 'afm') to a dict mapping each font
+        # path to a (mtime, size, FontEntry or None) tuple.
+        self._entries = {}
+        # Whether the index differs from the file it was loaded from.
+        self._modified = False
+        if filename is not None:
+            self.load()
+
+    def load(self):
+        """
+        Read the index from :attr:`filename`.  A missing, unreadable or
+        outdated index file leaves the index empty.
+        """
+        try:
+            data = pickle_load(self.filename)
+        except Exception:
+            data = None
+        if (isinstance(data, dict) and
+                data.get('version') == FontManager.__version__):
+            self._entries = data['entries']
+            self._modified = False
+        else:
+            self._entries = {}
+            self._modified = True
+
+    def save(self):
+        """
+        Write the index to :attr:`filename` if it has changed.  The file is
+        replaced atomically, so concurrent readers never see a partial
+        index.
+        """
+        if self.filename is None or not self._modified:
+            return
+        data = {'version': FontManager.__version__, 'entries': self._entries}
+        try:
+            fd, tmpname = tempfile.mkstemp(
+                dir=os.path.dirname(self.filename), suffix='.tmp')
+            fh = os.fdopen(fd, 'wb')
+            try:
+                pickle.dump(data, fh, pickle.HIGHEST_PROTOCOL)
+            finally:
+                fh.close()
+            if sys.platform == 'win32' and os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(tmpname, self.filename)
+        except (IOError, OSError):
+            verbose.report('Could not write font index %s' % self.filename)
+            return
+        self._modified = False
+
+    def create_font_list(self, fontfiles, fontext='ttf'):
+        """
+        Equivalent to :func:`createFontList`, but only parses the files
+        that are not in the index or that have changed since they were
+        indexed.  Entries for files that are not in *fontfiles* are
+        dropped.
+        """
+        old_entries = self._entries.get(fontext, {})
+        entries = {}
+        fontlist = []
+        seen = {}
+        for fpath in fontfiles:
+            fname = os.path.split(fpath)[1]
+            if fname in seen:  continue
+            else: seen[fname] = 1
+            try:
+                st = os.stat(fpath)
+            except OSError:
+                continue
+            entry = old_entries.get(fpath)
+            if (entry is not None and entry[0] == st.st_mtime and
+                    entry[1] == st.st_size):
+                prop = entry[2]
+            else:
+                verbose.report('FontIndex: parsing %s' % fpath, 'debug')
+                prop = createFontEntry(fpath, fontext)
+                self._modified = True
+            entries[fpath] = (st.st_mtime, st.st_size, prop)
+            if prop is not None:
+                fontlist.append(prop)
+
+        if len(entries) != len(old_entries):
+            self._modified = True
+        self._entries[fontext] = entries
+        return fontlist
+
 class FontManager:
     """
     On import, the :class:`FontManager` singleton instance creates a
@@ -1018,9 +1125,9 @@ class FontManager:
     # Increment this version number whenever the font cache data
     # format or behavior has changed and requires a existing font
     # cache files to be rebuilt.
-    __version__ = 7
+    __version__ = 8
 
-    def __init__(self, size=None, weight='normal'):
+    def __init__(self, size=None, weight='normal', index=None):
         self._version = self.__version__
 
         self.__default_weight = weight
@@ -1062,16 +1169,22 @@ class FontManager:
             # use anything
             self.defaultFont['ttf'] = self.ttffiles[0]
 
-        self.ttflist = createFontList(self.ttffiles)
+        if index is None:
+            index = FontIndex()
+        self.ttflist = index.create_font_list(self.ttffiles)
 
         self.afmfiles = findSystemFonts(paths, fontext='afm') + \
             findSystemFonts(fontext='afm')
-        self.afmlist = createFontList(self.afmfiles, fontext='afm')
+        self.afmlist = index.create_font_list(self.afmfiles, fontext='afm')
         self.defaultFont['afm'] = None
 
         self.ttf_lookup_cache = {}
         self.afm_lookup_cache = {}
 
+        # Maps a font extension to a dict mapping lower-case family names to
+        # the indices of the fonts in that family.  Built on first use.
+        self._family_buckets = {}
+
     def get_default_weight(self):
         """
         Return the default font weight.
@@ -1216,6 +1329,38 @@ class FontManager:
             return 1.0
         return abs(sizeval1 - sizeval2) / 72.0
 
+    def candidate_fonts(self, families, fontext='ttf'):
+        """
+        Returns the fonts whose family matches one of *families*, either
+        by name or through a generic family such as 'sans-serif', in font
+        list order.  Every other font scores 1.0 in :meth:`score_family`,
+        so only these can be chosen by :meth:`findfont`.
+        """
+        if fontext == 'afm':
+            fontlist = self.afmlist
+        else:
+            fontlist = self.ttflist
+
+        buckets = self._family_buckets.get(fontext)
+        if buckets is None:
+            buckets = {}
+            for i, font in enumerate(fontlist):
+                buckets.setdefault(font.name.lower(), []).append(i)
+            self._family_buckets[fontext] = buckets
+
+        indices = set()
+        for family in families:
+            family = family.lower()
+            if family in font_family_aliases:
+                if family in ('sans', 'sans serif'):
+                    family = 'sans-serif'
+                names = [x.lower() for x in preferred_fonts[family]]
+            else:
+                names = [family]
+            for name in names:
+                indices.update(buckets.get(name, ()))
+        return [fontlist[i] for i in sorted(indices)]
+
     def findfont(self, prop, fontext='ttf', directory=None,
                  fallback_to_default=True, rebuild_if_missing=True):
         """
@@ -1223,9 +1368,9 @@ class FontManager:
         the :class:`FontProperties` *prop*.
 
         :meth:`findfont` performs a nearest neighbor search.  Each
-        font is given a similarity score to the target font
-        properties.  The first font with the highest score is
-        returned.  If no matches below a certain threshold are found,
+        font in the requested families is given a similarity score to
+        the target font properties.  The first font with the highest
+        score is returned.  If no matches below a certain threshold are found,
         the default font (usually Vera Sans) is returned.
 
         `directory`, is specified, will only return fonts from the
@@ -1251,10 +1396,8 @@ class FontManager:
 
         if fontext == 'afm':
             font_cache = self.afm_lookup_cache
-            fontlist = self.afmlist
         else:
             font_cache = self.ttf_lookup_cache
-            fontlist = self.ttflist
 
         if directory is None:
             cached = font_cache.get(hash(prop))
@@ -1264,7 +1407,7 @@ class FontManager:
         best_score = 1e64
         best_font = None
 
-        for font in fontlist:
+        for font in self.candidate_fonts(prop.get_family(), fontext):
             if (directory is not None and
                 os.path.commonprefix([font.fname, directory]) != directory):
                 continue
@@ -1340,12 +1483,13 @@ def is_opentype_cff_font(filename):
 
 fontManager = None
 
-_fmcache = os.path.join(get_configdir(), 'fontList.cache')
+_fmcache = os.path.join(get_configdir(), 'fontIndex.cache')
 
 def _rebuild():
     global fontManager
-    fontManager = FontManager()
-    pickle_dump(fontManager, _fmcache)
+    index = FontIndex(_fmcache)
+    fontManager = FontManager(index=index)
+    index.save()
     verbose.report("generated new fontManager")
 
 # The experimental fontconfig-based backend.
@@ -1385,16 +1529,9 @@ if USE_FONTCONFIG and sys.platform != 'win32':
         return result
 
 else:
-    try:
-        fontManager = pickle_load(_fmcache)
-        if (not hasattr(fontManager, '_version') or
-            fontManager._version != FontManager.__version__):
-            _rebuild()
-        else:
-            fontManager.default_size = None
-            verbose.report("Using fontManager instance from %s" % _fmcache)
-    except:
-        _rebuild()
+    # Only the fonts that were added or changed since the index was last
+    # saved are parsed here.
+    _rebuild()
 
     def findfont(prop, **kw):
         global fontManager
@@ -0,0 +1,286 @@
+#------------------------------------------------------------------------------
+# Copyright (c) 2005, Enthought, Inc.
+# All rights reserved.
+#
+# This software is provided without warranty under the terms of the BSD
+# license included in enthought/LICENSE.txt and may be redistributed only
+# under the conditions described in the aforementioned license.  The license
+# is also available online at http://www.enthought.com/licenses/BSD.txt
+# Thanks for using Enthought open source!
+#------------------------------------------------------------------------------
+""" Batched hit testing of many points against paths and polygons.
+
+    A PathHitTester flattens a path into polygons once, and then answers
+    which of an array of points fall inside the path, or on its stroke, with
+    a single call to kiva.agg.points_in_polygon (or a few array operations)
+    instead of a Python loop over the points.
+"""
+
+from math import ceil, sqrt
+
+from numpy import arange, argsort, asarray, concatenate, empty, float64, \
+     hypot, searchsorted, vstack, zeros
+
+from agg import CompiledPath as AggCompiledPath, points_in_polygon, \
+     path_cmd_move_to, path_cmd_line_to, path_cmd_curve3, path_cmd_curve4, \
+     path_cmd_end_poly, path_flags_close
+
+# The default maximum distance between a curve and the line segments it is
+# flattened into.
+DEFAULT_TOLERANCE = 0.1
+
+# The maximum number of (point, segment) distances computed at once when
+# hit testing strokes.
+_STROKE_CHUNK_SIZE = 1000000
+
+
+def _as_agg_path(path):
+    """ Returns an agg CompiledPath with the same vertices as *path*, which is
+    either an agg CompiledPath or a kiva.basecore2d.CompiledPath.
+    """
+    if isinstance(path, AggCompiledPath):
+        return path
+    agg_path = AggCompiledPath()
+    for name, args in path.state:
+        if name == 'save_state':
+            name = 'save_ctm'
+        elif name == 'restore_state':
+            name = 'restore_ctm'
+        elif name == 'add_path':
+            args = (_as_agg_path(args[0]),)
+        getattr(agg_path, name)(*args)
+    return agg_path
+
+
+def _curve_steps(points, factor, tolerance):
+    """ Returns the number of line segments a Bezier curve with the control
+    *points* must be divided into to stay within *tolerance* of the curve.
+    The second derivative of the curve is at most *factor* times the largest
+    second difference of the control points.
+    """
+    second_diff = points[:-2] - 2 * points[1:-1] + points[2:]
+    curvature = factor * hypot(second_diff[:,0], second_diff[:,1]).max()
+    return max(1, int(ceil(sqrt(curvature / (8.0 * tolerance)))))
+
+
+def _flatten_curve(points, tolerance):
+    """ Returns the vertices after the first one of the quadratic (3 points)
+    or cubic (4 points) Bezier curve with the given control points.
+    """
+    points = asarray(points, float64)
+    if len(points) == 3:
+        steps = _curve_steps(points, 2, tolerance)
+        t = (arange(1, steps + 1) / float(steps))[:, None]
+        s = 1 - t
+        return s*s*points[0] + 2*s*t*points[1] + t*t*points[2]
+    else:
+        steps = _curve_steps(points, 6, tolerance)
+        t = (arange(1, steps + 1) / float(steps))[:, None]
+        s = 1 - t
+        return s*s*s*points[0] + 3*s*s*t*points[1] + 3*s*t*t*points[2] + \
+               t*t*t*points[3]
+
+
+def flatten_path(path, tolerance=DEFAULT_TOLERANCE):
+    """ Flattens a path into a list of (vertices, closed) tuples, one for each
+    subpath, where vertices is an Nx2 array.
+
+    *path* is an agg CompiledPath, a kiva.basecore2d.CompiledPath, or an Nx2
+    sequence of the points of a polygon.  The curves of the path are divided
+    into line segments which stay within *tolerance* of the curve.
+    """
+    if not hasattr(path, 'state') and \
+            not isinstance(path, AggCompiledPath):
+        points = asarray(path, float64).reshape(-1, 2)
+        return [(points, True)] if len(points) else []
+
+    subpaths = []
+    current = []
+    closed = False
+    for x, y, cmd, flag in _as_agg_path(path)._vertices():
+        cmd = int(cmd)
+        if cmd == path_cmd_move_to:
+            if len(current) > 0:
+                subpaths.append((current, closed))
+            current = [(x, y)]
+            closed = False
+        elif cmd == path_cmd_line_to:
+            current.append((x, y))
+        elif cmd == path_cmd_curve3 or cmd == path_cmd_curve4:
+            # Keep the command with the vertex, so the curves can be told
+            # apart and flattened below
+            current.append((x, y, cmd))
+        elif cmd == path_cmd_end_poly:
+            if int(flag) & path_flags_close:
+                closed = True
+    if len(current) > 0:
+        subpaths.append((current, closed))
+
+    result = []
+    for vertices, closed in subpaths:
+        chunks = []
+        run = []
+        i = 0
+        while i < len(vertices):
+            vertex = vertices[i]
+            if len(vertex) == 2:
+                run.append(vertex)
+                i += 1
+                continue
+            # A curve: 2 (curve3) or 3 (curve4) vertices after the start
+            count = 2 if vertex[2] == path_cmd_curve3 else 3
+            controls = [v[:2] for v in vertices[i:i+count]]
+            start = run[-1] if run else chunks[-1][-1]
+            if run:
+                chunks.append(asarray(run, float64))
+                run = []
+            chunks.append(_flatten_curve([start] + controls, tolerance))
+            i += count
+        if run:
+            chunks.append(asarray(run, float64))
+        result.append((concatenate(chunks), closed))
+    return result
+
+
+class PathHitTester(object):
+    """ Tests which of many points fall inside a path or on its stroke.
+
+    The path is flattened into polygons once, when the tester is created.
+    Create a new tester if the path changes.
+    """
+
+    def __init__(self, path, use_winding=True, tolerance=DEFAULT_TOLERANCE):
+        # Use the nonzero winding rule to decide what is inside the path,
+        # rather than the even-odd rule
+        self.use_winding = use_winding
+
+        # A list of (vertices, closed) tuples, one for each subpath
+        self.subpaths = flatten_path(path, tolerance)
+
+        # The (xmin, ymin, xmax, ymax) of the path, or None if it is empty
+        self.bounds = None
+
+        rings = []
+        starts = []
+        ends = []
+        anchor = None
+        for vertices, closed in self.subpaths:
+            if len(vertices) > 2:
+                # Every subpath is closed for filling.  The rings are joined
+                # into one polygon by going from a shared anchor to each
+                # ring, around it, and back to the anchor; every edge which
+                # joins a ring to the anchor is crossed once in each
+                # direction, so they cancel out.
+                if anchor is None:
+                    anchor = vertices[:1]
+                rings.extend([anchor, vertices, vertices[:1]])
+        if rings:
+            rings.append(anchor)
+        for vertices, closed in self.subpaths:
+            starts.append(vertices[:-1])
+            ends.append(vertices[1:])
+            if closed and len(vertices) > 2:
+                starts.append(vertices[-1:])
+                ends.append(vertices[:1])
+
+        if self.subpaths:
+            points = vstack([vertices for vertices, closed in self.subpaths])
+            xmin, ymin = points.min(axis=0)
+            xmax, ymax = points.max(axis=0)
+            self.bounds = (xmin, ymin, xmax, ymax)
+        self._polygon = concatenate(rings) if rings else None
+        if starts:
+            self._segment_starts = concatenate(starts)
+            self._segment_ends = concatenate(ends)
+        else:
+            self._segment_starts = self._segment_ends = empty((0, 2))
+
+    def contains(self, points):
+        """ Returns a boolean array telling which of the Nx2 *points* fall
+        inside the path.
+        """
+        points = asarray(points, float64).reshape(-1, 2)
+        result = zeros(len(points), dtype=bool)
+        if self._polygon is None:
+            return result
+        candidates = self._in_bounds(points, 0.0).nonzero()[0]
+        if len(candidates):
+            inside = points_in_polygon(points[candidates], self._polygon,
+                                       self.use_winding)
+            result[candidates] = inside.astype(bool)
+        return result
+
+    def stroke_contains(self, points, line_width):
+        """ Returns a boolean array telling which of the Nx2 *points* fall on
+        the stroke of the path drawn *line_width* wide.  Joins and caps are
+        treated as round.
+        """
+        points = asarray(points, float64).reshape(-1, 2)
+        result = zeros(len(points), dtype=bool)
+        radius = line_width / 2.0
+        candidates = self._in_bounds(points, radius).nonzero()[0]
+        if len(candidates) == 0 or len(self._segment_starts) == 0:
+            return result
+
+        a = self._segment_starts
+        ab = self._segment_ends - a
+        length2 = (ab ** 2).sum(axis=1)
+        # Zero length segments are tested as points
+        length2[length2 == 0] = 1.0
+        chunk = max(1, _STROKE_CHUNK_SIZE // len(a))
+        for start in xrange(0, len(candidates), chunk):
+            index = candidates[start:start + chunk]
+            ap = points[index][:, None, :] - a
+            t = (ap * ab).sum(axis=2) / length2
+            t = t.clip(0.0, 1.0)
+            d = ap - t[:, :, None] * ab
+            distance2 = (d ** 2).sum(axis=2)
+            result[index] = (distance2 <= radius * radius).any(axis=1)
+        return result
+
+    def _in_bounds(self, points, margin):
+        """ Returns a boolean array telling which points fall within the
+        bounds of the path grown by *margin*.
+        """
+        if self.bounds is None:
+            return zeros(len(points), dtype=bool)
+        xmin, ymin, xmax, ymax = self.bounds
+        x = points[:, 0]
+        y = points[:, 1]
+        return (x >= xmin - margin) & (x <= xmax + margin) & \
+               (y >= ymin - margin) & (y <= ymax + margin)
+
+
+def points_in_shapes(points, shapes):
+    """ Tests many points against many shapes.
+
+    *shapes* is a sequence of PathHitTesters, or other objects with a bounds
+    attribute and a contains() method.  Returns a pair of integer arrays,
+    (shape_indices, point_indices), listing every point that is inside a
+    shape.  Only the points within the bounds of a shape are tested against
+    it, and they are found by a binary search on the points sorted by x.
+    """
+    points = asarray(points, float64).reshape(-1, 2)
+    order = argsort(points[:, 0], kind='mergesort')
+    xs = points[order, 0]
+    shape_indices = []
+    point_indices = []
+    for i, shape in enumerate(shapes):
+        if shape.bounds is None:
+            continue
+        xmin, ymin, xmax, ymax = shape.bounds
+        start = searchsorted(xs, xmin, 'left')
+        end = searchsorted(xs, xmax, 'right')
+        if start == end:
+            continue
+        index = order[start:end]
+        y = points[index, 1]
+        index = index[(y >= ymin) & (y <= ymax)]
+        if len(index) == 0:
+            continue
+        index = index[shape.contains(points[index])]
+        shape_indices.append(zeros(len(index), dtype=int) + i)
+        point_indices.append(index)
+    if not point_indices:
+        return zeros(0, dtype=int), zeros(0, dtype=int)
+    return concatenate(shape_indices), concatenate(point_indices)
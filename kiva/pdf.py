@@ -21,7 +21,8 @@
 from itertools import izip
 import warnings
 import copy
-from numpy import array, pi
+import hashlib
+from numpy import array, ascontiguousarray, pi, uint8
 
 # ReportLab PDF imports
 import reportlab.pdfbase.pdfmetrics
@@ -55,9 +56,19 @@ path_mode[constants.STROKE]          = (1, 0, canvas.FILL_NON_ZERO)
 path_mode[constants.EOF_FILL_STROKE] = (1, 1, canvas.FILL_EVEN_ODD)
 
 
-# fixme: I believe this can be implemented but for now, it is not.
-class CompiledPath(object):
-    pass
+CompiledPath = basecore2d.CompiledPath
+
+_form_counter = 0
+
+# Maps Agg pixel formats to the PIL (mode, raw mode) to read them with
+pil_raw_modes = {
+    'rgba32': ('RGBA', 'RGBA'),
+    'bgra32': ('RGBA', 'BGRA'),
+    'argb32': ('RGBA', 'ARGB'),
+    'abgr32': ('RGBA', 'ABGR'),
+    'rgb24': ('RGB', 'RGB'),
+    'bgr24': ('RGB', 'BGR'),
+}
 
 class GraphicsContext(basecore2d.GraphicsContextBase):
     """
@@ -71,6 +82,9 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         self.text_xy = None, None
         # get an agg backend to assist in measuring text
         self._agg_gc = GraphicsContextImage((1, 1))
+        # Maps the (content hash, mode, width, height) of every image drawn
+        # into the document to the ImageReader it was drawn with.
+        self._image_cache = {}
         super(GraphicsContext, self).__init__(self, *args, **kwargs)
 
     #----------------------------------------------------------------
@@ -586,49 +600,65 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         Agg backend (kiva.agg.GraphicsContextArray).
 
         Requires the Python Imaging Library (PIL).
+
+        Images are cached by content for the lifetime of the document, so
+        drawing the same pixels again reuses the image already embedded in
+        the PDF.
         """
+        reader = self._image_reader(img)
+        if reader is None:
+            return
+
+        if rect == None:
+            width, height = reader.getSize()
+            rect = (0, 0, width, height)
 
+        # Draw the actual image.
+        self.gc.drawImage(reader, rect[0], rect[1], rect[2], rect[3])
 
+    def _image_reader(self, img):
+        """ Returns the ReportLab ImageReader for an image array or Agg
+        GraphicsContextArray, or None if the image can't be drawn.
+        """
         # We turn img into a PIL object, since that is what ReportLab
-        # requires.  To do this, we first determine if the input image
-        # GC needs to be converted to RGBA/RGB.  If so, we see if we can
-        # do it nicely (using convert_pixel_format), and if not, we do
-        # it brute-force using Agg.
+        # requires.  PIL reads the pixels straight from the array, and
+        # reorders the channels itself if they aren't in RGB(A) order.
         from reportlab.lib.utils import ImageReader
         from PIL import Image as PilImage
         from kiva import agg
 
         if type(img) == type(array([])):
             # Numeric array
-            converted_img = agg.GraphicsContextArray(img, pix_format='rgba32')
-            format = 'RGBA'
+            pixels = ascontiguousarray(img, dtype=uint8)
+            if pixels.ndim != 3 or pixels.shape[2] not in (3, 4):
+                warnings.warn("Cannot render image array of shape %r into PDF "
+                              "context." % (img.shape,))
+                return None
+            mode = raw_mode = {3: 'RGB', 4: 'RGBA'}[pixels.shape[2]]
         elif isinstance(img, agg.GraphicsContextArray):
-            if img.format().startswith('RGBA'):
-                format = 'RGBA'
-            elif img.format().startswith('RGB'):
-                format = 'RGB'
-            else:
-                converted_img = img.convert_pixel_format('rgba32', inplace=0)
-                format = 'RGBA'
+            if img.format() not in pil_raw_modes:
+                warnings.warn("Cannot render image with pixel format %r into "
+                              "PDF context." % img.format())
+                return None
+            mode, raw_mode = pil_raw_modes[img.format()]
+            pixels = ascontiguousarray(img.bmp_array)
         else:
             warnings.warn("Cannot render image of type %r into PDF context."
                           % type(img))
-            return
-
-        # converted_img now holds an Agg graphics context with the image
-        pil_img = PilImage.fromstring(format,
-                                      (converted_img.width(),
-                                       converted_img.height()),
-                                      converted_img.bmp_array.tostring())
-
-        if rect == None:
-            rect = (0, 0, img.width(), img.height())
-
-        # Draw the actual image.
-        # Wrap it in an ImageReader object, because that's what reportlab
-        # actually needs.
-        self.gc.drawImage(ImageReader(pil_img),
-                          rect[0], rect[1], rect[2], rect[3])
+            return None
+
+        height, width = pixels.shape[:2]
+        key = (hashlib.md5(pixels).hexdigest(), raw_mode, width, height)
+        reader = self._image_cache.get(key)
+        if reader is None:
+            # When the modes match, frombuffer wraps the pixels without
+            # copying them. ReportLab makes its own copy of the data when the
+            # image is first drawn.
+            pil_img = PilImage.frombuffer(mode, (width, height), pixels,
+                                          'raw', raw_mode, 0, 1)
+            reader = ImageReader(pil_img)
+            self._image_cache[key] = reader
+        return reader
 
     #----------------------------------------------------------------
     # Drawing PDF documents
@@ -725,6 +755,13 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
 
 
     def get_full_text_extent(self, textstring):
+        if self.text_extent_cache is None:
+            return self._measure_text(textstring)
+        return self.text_extent_cache.text_extent(
+            ('pdf', self.gc._fontname, self.gc._fontsize), textstring,
+            self._measure_text)
+
+    def _measure_text(self, textstring):
         fontname=self.gc._fontname
         fontsize=self.gc._fontsize
 
@@ -817,6 +854,42 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
             # erase the current path.
             self.current_pdf_path = None
 
+    def draw_path_at_points(self, points, path, mode=constants.FILL_STROKE):
+        """ Draws a copy of *path* translated to each of *points*.
+
+            The path is written once as a form XObject which is then
+            referenced at each point, so large scatter plots do not repeat
+            the shape in the page stream.
+        """
+        global _form_counter
+        scratch = basecore2d.GraphicsContextBase()
+        scratch.add_path(path)
+        vertices, codes = scratch.compile_path()
+        if len(points) == 0 or len(codes) == 0:
+            return
+
+        # The form is clipped to its bounding box, so leave room for wide
+        # lines and miter joins.
+        pad = 10 * max(getattr(self.gc, '_lineWidth', 1), 1)
+        x0, y0 = vertices.min(axis=0) - pad
+        x1, y1 = vertices.max(axis=0) + pad
+        name = 'kivamarker%d' % _form_counter
+        _form_counter += 1
+
+        current_pdf_path = self.current_pdf_path
+        self.gc.beginForm(name, x0, y0, x1, y1)
+        self.begin_path()
+        self.add_path(path)
+        self.draw_path(mode)
+        self.gc.endForm()
+        self.current_pdf_path = current_pdf_path
+
+        for x, y in points:
+            self.gc.saveState()
+            self.gc.translate(x, y)
+            self.gc.doForm(name)
+            self.gc.restoreState()
+
     def save(self):
         self.gc.save()
 
@@ -38,9 +38,12 @@ trap attempts to access them and do it on first access.
 import string, os
 from types import ListType, TupleType
 
+import numpy
+
 # XXX Kiva specific changes
 defaultEncoding = 'WinAnsiEncoding'       # 'WinAnsi' or 'MacRoman'
 import _fontdata
+from text_extent_cache import TextExtentCache
 
 standardFonts = _fontdata.standardFonts
 standardEncodings = _fontdata.standardEncodings
@@ -54,6 +57,13 @@ _typefaces = {}
 _encodings = {}
 _fonts = {}
 
+# The widths of recently measured strings, in thousandths of an em, keyed on
+# (fontName, kerning, text).  Enable measures the same labels over and over.
+_widthCache = TextExtentCache()
+
+# Strings at least this long are measured with numpy rather than a loop.
+_vectorThreshold = 32
+
 class FontError(Exception):
     pass
 class FontNotFoundError(Exception):
@@ -135,6 +145,8 @@ class TypeFace:
         self.glyphWidths = {}
         self.ascent = 0
         self.descent = 0
+        # maps (glyphName1, glyphName2) to the kerning between them
+        self.kernPairs = {}
         if name == 'ZapfDingbats':
             self.requiredEncoding = 'ZapfDingbatsEncoding'
         elif name == 'Symbol':
@@ -308,6 +320,7 @@ class Font:
         self.face = getTypeFace(faceName)
         self.encoding= getEncoding(encName)
         self._calcWidths()
+        self._calcKerning()
 
         # multi byte fonts do their own stringwidth calculations.
         # signal this here.
@@ -329,17 +342,64 @@ class Font:
                     # XXX Kiva specific change
                     print 'typeface "%s" does not have a glyph "%s", bad font!' % (self.face.name, glyphName)
         self.widths = w
+        self.widthVector = numpy.array(w, float)
 
-    if not _stringWidth:
-        def stringWidth(self, text, size):
-            """This is the "purist" approach to width.  The practical one
-            is to use the stringWidth one which may be optimized
-            in C."""
-            w = 0
+    def _calcKerning(self):
+        """Kerning between pairs of codes, from the kern pairs of the face.
+
+        Sets kerns, a dictionary keyed on (code1, code2), and kernMatrix,
+        the same as a 256x256 array, or None if the face has no kerning."""
+        codes = {}
+        for i, glyphName in enumerate(self.encoding.vector[:256]):
+            if glyphName is not None:
+                codes.setdefault(glyphName, []).append(i)
+        kerns = {}
+        for (left, right), value in self.face.kernPairs.items():
+            for i in codes.get(left, ()):
+                for j in codes.get(right, ()):
+                    kerns[(i, j)] = value
+        self.kerns = kerns
+        if kerns:
+            pairs = numpy.array(kerns.keys())
+            self.kernMatrix = numpy.zeros((256, 256), float)
+            self.kernMatrix[pairs[:,0], pairs[:,1]] = kerns.values()
+        else:
+            self.kernMatrix = None
+
+    def stringWidth(self, text, size, kerning=0):
+        """This is the "purist" approach to width.  The practical one
+        is to use the module's stringWidth, which uses the width
+        vector and remembers the strings it has measured."""
+        w = 0
+        widths = self.widths
+        for ch in text:
+            w = w + widths[ord(ch)]
+        if kerning:
+            kerns = self.kerns
+            for i in range(len(text) - 1):
+                w = w + kerns.get((ord(text[i]), ord(text[i+1])), 0)
+        return w * 0.001 * size
+
+    def _textWidth(self, text, kerning=0):
+        """Width of text in thousandths of an em.  Short strings are
+        summed in a loop, longer ones by indexing the width vector."""
+        text = _byteString(text)
+        if len(text) < _vectorThreshold:
             widths = self.widths
-            for ch in text:
-                w = w + widths[ord(ch)]
-            return w * 0.001 * size
+            codes = map(ord, text)
+            w = 0
+            for code in codes:
+                w = w + widths[code]
+            if kerning and self.kerns:
+                get = self.kerns.get
+                for pair in zip(codes, codes[1:]):
+                    w = w + get(pair, 0)
+            return w
+        codes = numpy.frombuffer(text, numpy.uint8)
+        w = self.widthVector[codes].sum()
+        if kerning and self.kernMatrix is not None:
+            w = w + self.kernMatrix[codes[:-1], codes[1:]].sum()
+        return float(w)
 
     def _formatWidths(self):
         "returns a pretty block in PDF Array format to aid inspection"
@@ -381,7 +441,6 @@ class EmbeddedType1Face(TypeFace):
 
     Its glyph data will be embedded in the PDF file."""
     def __init__(self, afmFileName, pfbFileName):
-        # ignore afm file for now
         self.afmFileName = os.path.abspath(afmFileName)
         self.pfbFileName = os.path.abspath(pfbFileName)
         self.requiredEncoding = None
@@ -425,6 +484,12 @@ class EmbeddedType1Face(TypeFace):
         for tok in tokens:
             self.bbox.append(string.atoi(tok))
 
+        try:
+            self.kernPairs = _loadKernPairs(afmFileName)
+        except (KeyError, ValueError, RuntimeError):
+            warnOnce("Can't read the kern pairs of face '%s'" % self.name)
+            self.kernPairs = {}
+
         glyphWidths = {}
         for (cid, width, name) in glyphData:
             glyphWidths[name] = width
@@ -470,6 +535,9 @@ def registerFont(font):
     "Registers a font, including setting up info for accelerated stringWidth"
     #assert isinstance(font, Font), 'Not a Font: %s' % font
     fontName = font.fontName
+    if _fonts.has_key(fontName):
+        # forget the widths measured in the font it replaces
+        _widthCache.clear()
     _fonts[fontName] = font
     if not font._multiByte:
         if _stringWidth:
@@ -540,20 +608,85 @@ def getFont(fontName):
 
 
 
-def _slowStringWidth(text, fontName, fontSize):
+def registerKernPairs(faceName, afm):
+    """Sets the kern pairs of a typeface from an AFM file, given as a file
+    name, an open file or a kiva.fonttools.afm.AFM, and updates the fonts
+    which use it.  The built in metrics of the standard 14 fonts have no
+    kerning, so this is the way to add it to them."""
+    face = getTypeFace(faceName)
+    face.kernPairs = _loadKernPairs(afm)
+    for font in _fonts.values():
+        if font.face is face:
+            font._calcKerning()
+    _widthCache.clear()
+
+def _loadKernPairs(afm):
+    """Returns the kern pairs of an AFM file name, open file or AFM."""
+    from fonttools.afm import AFM
+    if isinstance(afm, basestring):
+        fh = open(afm, 'r')
+        try:
+            afm = AFM(fh)
+        finally:
+            fh.close()
+    elif not isinstance(afm, AFM):
+        afm = AFM(afm)
+    return afm.get_kern_pairs()
+
+def _byteString(text):
+    """The single byte codes of text; unicode must be Latin-1."""
+    if isinstance(text, unicode):
+        return text.encode('latin-1')
+    return text
+
+def _slowStringWidth(text, fontName, fontSize, kerning=0):
     """Define this anyway so it can be tested, but whether it is used or not depends on _rl_accel"""
     font = getFont(fontName)
-    return font.stringWidth(text, fontSize)
-    #this is faster, but will need more special-casing for multi-byte fonts.
-    #wid = getFont(fontName).widths
-    #w = 0
-    #for ch in text:
-    #    w = w + wid[ord(ch)]
-    #return 0.001 * w * fontSize
+    return font.stringWidth(text, fontSize, kerning)
+
+def _fastStringWidth(text, fontName, fontSize, kerning=0):
+    """Width of text in points, from the font's width vector.
+
+    Widths are remembered in font units, so measuring a string again,
+    at any size, is a dictionary lookup."""
+    key = (fontName, kerning, text)
+    w = _widthCache.get(key)
+    if w is None:
+        font = getFont(fontName)
+        if font._multiByte:
+            return font.stringWidth(text, fontSize)
+        w = font._textWidth(text, kerning)
+        _widthCache.set(key, w)
+    return w * 0.001 * fontSize
+
+def stringWidths(texts, fontName, fontSize, kerning=0):
+    """Widths of a sequence of strings in points, as a numpy array.
+
+    The strings are measured together: their codes index the width vector
+    at once, and each width is a difference of the cumulative sum.  Pairs
+    of characters in different strings are not kerned."""
+    font = getFont(fontName)
+    if font._multiByte:
+        return numpy.array([font.stringWidth(text, fontSize)
+                            for text in texts], float)
+    texts = map(_byteString, texts)
+    lengths = numpy.array(map(len, texts), int)
+    ends = lengths.cumsum()
+    if not len(texts) or ends[-1] == 0:
+        return numpy.zeros(len(texts), float)
+    codes = numpy.frombuffer(''.join(texts), numpy.uint8)
+    w = font.widthVector[codes]
+    if kerning and font.kernMatrix is not None:
+        kern = font.kernMatrix[codes[:-1], codes[1:]]
+        # don't kern the pairs which straddle the end of a string
+        kern[ends[(ends > 0) & (ends < len(codes))] - 1] = 0
+        w[1:] = w[1:] + kern
+    total = numpy.concatenate(([0.0], w.cumsum()))
+    return (total[ends] - total[ends - lengths]) * 0.001 * fontSize
 
 
 # XXX Kiva specific changes
-stringWidth = _slowStringWidth
+stringWidth = _fastStringWidth
 
 def dumpFontData():
     print 'Registered Encodings:'
@@ -26,10 +26,11 @@ from numpy import arange, ravel, pi
 import affine
 import basecore2d
 import constants
+from file_sink import DEFAULT_BUFFER_SIZE, FileSink, drop_duplicate_points, \
+     format_points, split_format
 from constants import FILL, STROKE, FILL_STROKE, EOF_FILL, EOF_FILL_STROKE
 
-# This backend does not have compiled paths, yet.
-CompiledPath = None
+CompiledPath = basecore2d.CompiledPath
 
 try:
     import logging
@@ -56,11 +57,8 @@ except ImportError:
             print >> sys.stderr, "CRITICAL:", message
     log = FakeLogger()
 
-def _strpoints(points):
-    c = cStringIO.StringIO()
-    for x,y in points:
-        c.write('%3.2f,%3.2f ' % (x,y))
-    return c.getvalue()
+def _strpoints(points, precision=2):
+    return format_points(points, '%%.%df,%%.%df ' % (precision, precision))
 
 def _mkstyle(kw):
     return '"' + '; '.join([str(k) + ':' + str(v) for k,v in kw.items()]) +'"'
@@ -107,6 +105,7 @@ except ImportError:
 font_face_map = {'Arial': 'Helvetica'}
 
 _clip_counter = 0
+_marker_counter = 0
 
 fill_stroke_map = {FILL_STROKE: ('fill', 'stroke'),
                     EOF_FILL_STROKE: ('eofill', 'stroke'),
@@ -118,6 +117,13 @@ fill_stroke_map = {FILL_STROKE: ('fill', 'stroke'),
 
 class PSGC(basecore2d.GraphicsContextBase):
 
+    # The number of decimal places coordinates are written with
+    precision = 3
+
+    # Whether to leave out consecutive points of polylines and polygons that
+    # are the same at the output precision
+    drop_duplicates = False
+
     def __init__(self, size, *args, **kwargs):
         super(PSGC, self).__init__(size, *args, **kwargs)
         self.size = size
@@ -125,19 +131,55 @@ class PSGC(basecore2d.GraphicsContextBase):
         self.contents = cStringIO.StringIO()
         self._clipmap = {}
         self.clip_id = None
+        # The FileSink that contents is written to in streaming mode.
+        self._sink = None
+
+    def begin_stream(self, file, format=None, compress=None,
+                     buffer_size=DEFAULT_BUFFER_SIZE):
+        """ Writes the document to *file* while it is being drawn, instead
+        of keeping it in memory until save().
+
+        *file* is a file name or a file-like object.  *format* is one of
+        '.ps', '.eps' or '.epsf'; if None, it is taken from the file name,
+        or is '.ps' for file objects.  If *compress* is None, the document is
+        gzip compressed if the file name ends in '.gz'.  Drawing is written
+        out in blocks of *buffer_size* bytes.  Call end_stream() when done
+        drawing to complete the document.
+        """
+        if self._sink is not None:
+            raise RuntimeError("the graphics context is already streaming")
+        if isinstance(file, basestring):
+            ext, compressed = split_format(file)
+        else:
+            ext, compressed = '.ps', False
+        if format is None:
+            format = ext
+        if compress is None:
+            compress = compressed
+        header = self._header(format)
+        self._sink = FileSink(file, buffer_size, compress)
+        self._sink.write(header)
+        self.contents = self._sink
+
+    def end_stream(self):
+        """ Completes the document started by begin_stream() and closes the
+        file.
+        """
+        if self._sink is None:
+            raise RuntimeError("the graphics context is not streaming")
+        self._sink.close()
+        self._sink = None
+        self.contents = cStringIO.StringIO()
 
     def save(self, filename):
-        f = open(filename, 'w')
+        if self._sink is not None:
+            raise RuntimeError("use end_stream() to complete a streamed "
+                               "document")
         ext = os.path.splitext(filename)[1]
-        if ext in ('.eps', '.epsf'):
-            f.write("%!PS-Adobe-3.0 EPSF-3.0\n")
-            f.write('%%%%BoundingBox: 0 0 %d %d\n' % self.size)
-            f.write(self.contents.getvalue())
-        elif ext == '.ps':
-            f.write("%!PS-Adobe-2.0\n")
-            f.write(self.contents.getvalue())
-        else:
-            raise ValueError, "don't know how to write a %s file" % ext
+        header = self._header(ext)
+        f = open(filename, 'w')
+        f.write(header)
+        f.write(self.contents.getvalue())
 
     # Text handling code
 
@@ -151,6 +193,7 @@ class PSGC(basecore2d.GraphicsContextBase):
         x,y = self.get_text_position()
         ttm = self.get_text_matrix()
         ctm = self.get_ctm()  # not device_ctm!!
+        x,y = affine.transform_point(ctm, (x,y))
         m = affine.concat(ctm,ttm)
         tx,ty,sx,sy,angle = affine.trs_factor(m)
         angle = '"%3.3f"' % (angle / pi * 180.)
@@ -165,6 +208,12 @@ class PSGC(basecore2d.GraphicsContextBase):
         #                                                'font-size': '"'+ str(self.font_size) + '"'})
 
     def get_full_text_extent(self, text):
+        if self.text_extent_cache is None:
+            return self._measure_text(text)
+        return self.text_extent_cache.text_extent(
+            ('afm', self.face_name, self.font_size), text, self._measure_text)
+
+    def _measure_text(self, text):
         ascent,descent=_fontdata.ascent_descent[self.face_name]
         descent = (-descent) * self.font_size / 1000.0
         ascent = ascent * self.font_size / 1000.0
@@ -176,19 +225,15 @@ class PSGC(basecore2d.GraphicsContextBase):
 
     def device_fill_points(self, points, mode):
 
-        linecap = line_cap_map[self.state.line_cap]
-        linejoin = line_join_map[self.state.line_join]
-        dasharray = self._dasharray()
-        if dasharray:
-            self.contents.write('%s 0 setdash\n' % dasharray)
-        self.contents.write('%3.3f setlinewidth\n' % self.state.line_width)
-        self.contents.write('%d setlinecap\n' % linecap)
-        self.contents.write('%d setlinejoin\n' % linejoin)
+        if self.drop_duplicates:
+            points = drop_duplicate_points(points, self.precision)
+        precision = self.precision
+        self._write_line_state()
         self.contents.write('newpath\n')
-        x,y = points[0]
-        self.contents.write('    %3.3f %3.3f moveto\n' % (x,y))
-        for (x,y) in points[1:]:
-            self.contents.write('    %3.3f %3.3f lineto\n' % (x,y))
+        self.contents.write(format_points(points[:1],
+            '    %%.%df %%.%df moveto\n' % (precision, precision)))
+        self.contents.write(format_points(points[1:],
+            '    %%.%df %%.%df lineto\n' % (precision, precision)))
 
 
         first_pass, second_pass = fill_stroke_map[mode]
@@ -215,7 +260,41 @@ class PSGC(basecore2d.GraphicsContextBase):
         # handled by device_fill_points
         pass
 
+    def device_draw_path_at_points(self, positions, vertices, codes, mode):
+        # Define the shape as a procedure once and call it at each point.
+        global _marker_counter
+        name = 'kivamarker%d' % _marker_counter
+        _marker_counter += 1
+        self._write_line_state()
+        self.contents.write('/%s {\n' % name)
+        self.contents.write('gsave translate newpath\n')
+        for (x,y), code in zip(vertices, codes):
+            if code == constants.PATH_MOVE_TO:
+                self.contents.write('    %3.3f %3.3f moveto\n' % (x,y))
+            elif code == constants.PATH_CLOSE:
+                self.contents.write('    closepath\n')
+            else:
+                self.contents.write('    %3.3f %3.3f lineto\n' % (x,y))
+        first_pass, second_pass = fill_stroke_map[mode]
+        if second_pass:
+            passes = [(first_pass, 'gsave %s grestore' % first_pass),
+                      (second_pass, second_pass)]
+        else:
+            passes = [(first_pass, first_pass)]
+        for op, command in passes:
+            if op in ('fill', 'eofill'):
+                r,g,b,a = self.state.fill_color
+            else:
+                r,g,b,a = self.state.line_color
+            self.contents.write('%1.3f %1.3f %1.3f setrgbcolor\n' % (r,g,b))
+            self.contents.write(command + '\n')
+        self.contents.write('grestore } def\n')
+        self.contents.write(format_points(positions, '%%.%df %%.%df %s\n'
+                                          % (self.precision, self.precision,
+                                             name)))
+
     def device_set_clipping_path(self, x, y, width, height):
+        x,y,width,height = self._transform_rect(x,y,width,height)
         self.contents.write('%3.3f %3.3f %3.3f %3.3f rectclip\n' % (x,y,width*2.,height*2.))
 
     def device_destroy_clipping_path(self):
@@ -223,6 +302,27 @@ class PSGC(basecore2d.GraphicsContextBase):
 
     # utility routines
 
+    def _header(self, ext):
+        """ Returns the document header for a file extension.
+        """
+        if ext in ('.eps', '.epsf'):
+            return ("%!PS-Adobe-3.0 EPSF-3.0\n" +
+                    '%%%%BoundingBox: 0 0 %d %d\n' % self.size)
+        elif ext == '.ps':
+            return "%!PS-Adobe-2.0\n"
+        else:
+            raise ValueError, "don't know how to write a %s file" % ext
+
+    def _write_line_state(self):
+        linecap = line_cap_map[self.state.line_cap]
+        linejoin = line_join_map[self.state.line_join]
+        dasharray = self._dasharray()
+        if dasharray:
+            self.contents.write('%s 0 setdash\n' % dasharray)
+        self.contents.write('%3.3f setlinewidth\n' % self.state.line_width)
+        self.contents.write('%d setlinecap\n' % linecap)
+        self.contents.write('%d setlinejoin\n' % linejoin)
+
     def _color(self, color):
         r,g,b,a = color
         return '#%02x%02x%02x' % (r*255,g*255,b*255)
@@ -44,12 +44,22 @@ from numpy import arange, ravel, pi
 import affine
 import basecore2d
 import constants
+from file_sink import DEFAULT_BUFFER_SIZE, FileSink, as_points, \
+     drop_duplicate_points, format_points, split_format
 from constants import FILL, FILL_STROKE, EOF_FILL_STROKE, EOF_FILL, STROKE
 
-def _strpoints(points):
+def _strpoints(points, precision=2):
+    return format_points(points, '%%.%df,%%.%df ' % (precision, precision))
+
+def _pathdata(vertices, codes):
     c = cStringIO.StringIO()
-    for x,y in points:
-        c.write('%3.2f,%3.2f ' % (x,y))
+    for (x,y), code in zip(vertices, codes):
+        if code == constants.PATH_MOVE_TO:
+            c.write('M%3.2f,%3.2f ' % (x,y))
+        elif code == constants.PATH_CLOSE:
+            c.write('Z ')
+        else:
+            c.write('L%3.2f,%3.2f ' % (x,y))
     return c.getvalue()
 
 def _mkstyle(kw):
@@ -86,6 +96,7 @@ xmltemplate = """<?xml version="1.0"?>
 <!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.0//EN"
 "http://www.w3.org/TR/2001/REC-SVG-20010904/DTD/svg10.dtd">
 <svg xmlns="http://www.w3.org/2000/svg"
+        xmlns:xlink="http://www.w3.org/1999/xlink"
         xmlns:text="http://xmlns.graougraou.com/svg/text/"
         xmlns:a3="http://ns.adobe.com/AdobeSVGViewerExtensions/3.0/"
         a3:scriptImplementation="Adobe"
@@ -101,7 +112,11 @@ xmltemplate = """<?xml version="1.0"?>
 </svg>
 """
 
-htmltemplate = """<html xmlns:svg="http://www.w3.org/2000/svg">
+# The parts of xmltemplate before and after the contents, for streaming
+xmlheader, xmlfooter = xmltemplate.split('%(contents)s')
+
+htmltemplate = """<html xmlns:svg="http://www.w3.org/2000/svg"
+      xmlns:xlink="http://www.w3.org/1999/xlink">
 <object id="AdobeSVG" CLASSID="clsid:78156a80-c6a1-4bbf-8e6a-3cd390eeb4e2">
 </object>
 <?import namespace="svg" implementation="#AdobeSVG"?>
@@ -127,13 +142,19 @@ except ImportError:
 
 font_face_map = {'Arial': 'Helvetica'}
 
-# This backend has no compiled path object, yet.
-class CompiledPath(object):
-    pass
+CompiledPath = basecore2d.CompiledPath
 
 _clip_counter = 0
+_marker_counter = 0
 class GraphicsContext(basecore2d.GraphicsContextBase):
 
+    # The number of decimal places coordinates are written with
+    precision = 2
+
+    # Whether to leave out consecutive points of polylines and polygons that
+    # are the same at the output precision
+    drop_duplicates = False
+
     def __init__(self, size, *args, **kwargs):
         super(GraphicsContext, self).__init__(self, size, *args, **kwargs)
         self.size = size
@@ -141,6 +162,44 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         self.contents = cStringIO.StringIO()
         self._clipmap = {}
         self.clip_id = None
+        # Elements are written with an 'svg:' prefix so that the buffered
+        # contents can be embedded in HTML. Streamed SVG doesn't need it.
+        self._prefix = 'svg:'
+        # The FileSink that contents is written to in streaming mode.
+        self._sink = None
+
+    def begin_stream(self, file, compress=None,
+                     buffer_size=DEFAULT_BUFFER_SIZE):
+        """ Writes the SVG document to *file* while it is being drawn,
+        instead of keeping it in memory until save().
+
+        *file* is a file name or a file-like object.  If *compress* is None,
+        the document is gzip compressed if the file name ends in '.svgz' or
+        '.gz'.  Drawing is written out in blocks of *buffer_size* bytes.
+        Call end_stream() when done drawing to complete the document.
+        """
+        if self._sink is not None:
+            raise RuntimeError("the graphics context is already streaming")
+        if compress is None:
+            compress = (isinstance(file, basestring) and
+                        split_format(file)[1])
+        self._sink = FileSink(file, buffer_size, compress)
+        width, height = self.size
+        self._sink.write(xmlheader % locals())
+        self.contents = self._sink
+        self._prefix = ''
+
+    def end_stream(self):
+        """ Completes the SVG document started by begin_stream() and closes
+        the file.
+        """
+        if self._sink is None:
+            raise RuntimeError("the graphics context is not streaming")
+        self._sink.write(xmlfooter)
+        self._sink.close()
+        self._sink = None
+        self.contents = cStringIO.StringIO()
+        self._prefix = 'svg:'
 
     def render(self, format):
         assert format == 'svg'
@@ -159,6 +218,9 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         return self.size[1]
 
     def save(self, filename):
+        if self._sink is not None:
+            raise RuntimeError("use end_stream() to complete a streamed "
+                               "document")
         f = open(filename, 'w')
         ext = os.path.splitext(filename)[1]
         if ext == '.svg':
@@ -185,9 +247,9 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
 
     def device_show_text(self, text):
         x,y = self.get_text_position()
-        x,y = self._fixpoints([[x,y]])[0]
         ttm = self.get_text_matrix()
         ctm = self.get_ctm()  # not device_ctm!!
+        x,y = self._fixpoints([affine.transform_point(ctm, (x,y))])[0]
         m = affine.concat(ctm,ttm)
         tx,ty,sx,sy,angle = affine.trs_factor(m)
         angle = '%3.3f' % (-angle / pi * 180.)
@@ -200,6 +262,14 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         self.contents.write('</g>\n')
 
     def get_full_text_extent(self, text):
+        if self.text_extent_cache is None:
+            return self._measure_text(text)
+        # The extents only depend on the AFM metrics, which the SVG and
+        # PostScript backends share.
+        return self.text_extent_cache.text_extent(
+            ('afm', self.face_name, self.font_size), text, self._measure_text)
+
+    def _measure_text(self, text):
         ascent,descent=_fontdata.ascent_descent[self.face_name]
         descent = (-descent) * self.font_size / 1000.0
         ascent = ascent * self.font_size / 1000.0
@@ -211,52 +281,28 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
 
     def device_fill_points(self, points, mode):
         points = self._fixpoints(points)
-        if mode in (FILL, FILL_STROKE, EOF_FILL_STROKE):
-            fill = self._color(self.state.fill_color)
-        else:
-            fill = 'none'
-        if mode in (STROKE, FILL_STROKE, EOF_FILL_STROKE):
-            stroke = self._color(self.state.line_color)
-        else:
-            stroke = 'none'
-        if mode in (EOF_FILL_STROKE, EOF_FILL):
-            rule = 'evenodd'
-        else:
-            rule = 'nonzero'
-        linecap = line_cap_map[self.state.line_cap]
-        linejoin = line_join_map[self.state.line_join]
-        dasharray = self._dasharray()
-        width = '%3.3f' % self.state.line_width
-        if self.clip_id:
-            clip = '"url(#' + self.clip_id +')"'
-        else:
-            clip = None
+        if self.drop_duplicates:
+            points = drop_duplicate_points(points, self.precision)
+        points = '"' + _strpoints(points, self.precision) + '"'
+        kw, style = self._style(mode)
         if mode == STROKE:
-            opacity = '%1.3f' % self.state.line_color[-1]
-            self._emit('polyline',
-                        points='"'+_strpoints(points)+'"',
-                        kw=default_filter({'clip-path': (clip, None)}),
-                        style=_mkstyle(default_filter({'opacity': (opacity, "1.000"),
-                                        'stroke': stroke,
-                                        'fill': 'none',
-                                        'stroke-width': (width, "1.000"),
-                                        'stroke-linejoin': (linejoin, 'miter'),
-                                        'stroke-linecap': (linecap, 'butt'),
-                                        'stroke-dasharray': (dasharray, 'none')})))
-
+            self._emit('polyline', points=points, kw=kw, style=style)
         else:
-            opacity = '%1.3f' % self.state.fill_color[-1]
-            self._emit('polygon',
-                        points='"'+_strpoints(points)+'"',
-                        kw=default_filter({'clip-path': (clip, None)}),
-                        style=_mkstyle(default_filter({'opacity': (opacity, "1.000"),
-                                        'stroke-width': (width, "1.000"),
-                                        'fill': fill,
-                                        'fill-rule': rule,
-                                        'stroke': stroke,
-                                        'stroke-linejoin': (linejoin, 'miter'),
-                                        'stroke-linecap': (linecap, 'butt'),
-                                        'stroke-dasharray': (dasharray, 'none')})))
+            self._emit('polygon', points=points, kw=kw, style=style)
+
+    def device_draw_path_at_points(self, positions, vertices, codes, mode):
+        # Define the shape once and place a <use> of it at each point.
+        global _marker_counter
+        marker_id = 'marker_%d' % _marker_counter
+        _marker_counter += 1
+        path = self._build('path', id=marker_id,
+                           d=_pathdata(self._fixpoints(vertices), codes))
+        self._emit('defs', contents=path)
+        template = '<%suse xlink:href="#%s" x="%%.%df" y="%%.%df" />\n' % (
+            self._prefix, marker_id, self.precision, self.precision)
+        uses = format_points(self._fixpoints(positions), template)
+        kw, style = self._style(mode)
+        self._emit('g', contents=uses, kw=kw, style=style)
 
     def device_stroke_points(self, points, mode):
         # handled by device_fill_points
@@ -286,7 +332,8 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         global _clip_counter
         self.clip_id = 'clip_%d' % _clip_counter
         _clip_counter += 1
-        x,y = self._fixpoints([[x,y]])[0]
+        x,y,width,height = self._transform_rect(x,y,width,height)
+        x,y = [float(v) for v in self._fixpoints([[x,y]])[0]]
         rect = self._build('rect', x=x, y=y, width=width, height=height)
         self._emit('clipPath', contents=rect, id='"'+self.clip_id + '"')
 
@@ -296,18 +343,15 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
     # utility routines
 
     def _fixpoints(self, points):
-        return points
-        # convert lines from Kiva coordinate space to PIL coordinate space
+        # Returns the points as an Nx2 array. They are not converted from
+        # Kiva's coordinate space: the document template flips the y axis
+        # with a transform instead of flipping every point.
         # XXX I suspect this is the location of the bug w.r.t. compound graphs and
         # "global" sizing.
-        # XXX this should be made more efficient for NumPy arrays
-        np = []
-        for (x,y) in points:
-            np.append((x,self._height-y))
-        return np
+        return as_points(points)
 
     def _emit(self, name, contents=None, kw={}, **otherkw):
-        self.contents.write('<svg:%(name)s ' % locals())
+        self.contents.write('<%s%s ' % (self._prefix, name))
         for k, v in kw.items():
             self.contents.write("%(k)s=%(v)s " % locals())
         for k, v in otherkw.items():
@@ -317,7 +361,53 @@ class GraphicsContext(basecore2d.GraphicsContextBase):
         else:
             self.contents.write('>\n')
             self.contents.write(contents)
-            self.contents.write('</svg:'+name+'>\n')
+            self.contents.write('</'+self._prefix+name+'>\n')
+
+    def _style(self, mode):
+        """ Returns the (attributes, style) used to draw a shape in the given
+        mode with the current graphics state.
+        """
+        if mode in (FILL, FILL_STROKE, EOF_FILL_STROKE):
+            fill = self._color(self.state.fill_color)
+        else:
+            fill = 'none'
+        if mode in (STROKE, FILL_STROKE, EOF_FILL_STROKE):
+            stroke = self._color(self.state.line_color)
+        else:
+            stroke = 'none'
+        if mode in (EOF_FILL_STROKE, EOF_FILL):
+            rule = 'evenodd'
+        else:
+            rule = 'nonzero'
+        linecap = line_cap_map[self.state.line_cap]
+        linejoin = line_join_map[self.state.line_join]
+        dasharray = self._dasharray()
+        width = '%3.3f' % self.state.line_width
+        if self.clip_id:
+            clip = '"url(#' + self.clip_id +')"'
+        else:
+            clip = None
+        kw = default_filter({'clip-path': (clip, None)})
+        if mode == STROKE:
+            opacity = '%1.3f' % self.state.line_color[-1]
+            style = _mkstyle(default_filter({'opacity': (opacity, "1.000"),
+                                        'stroke': stroke,
+                                        'fill': 'none',
+                                        'stroke-width': (width, "1.000"),
+                                        'stroke-linejoin': (linejoin, 'miter'),
+                                        'stroke-linecap': (linecap, 'butt'),
+                                        'stroke-dasharray': (dasharray, 'none')}))
+        else:
+            opacity = '%1.3f' % self.state.fill_color[-1]
+            style = _mkstyle(default_filter({'opacity': (opacity, "1.000"),
+                                        'stroke-width': (width, "1.000"),
+                                        'fill': fill,
+                                        'fill-rule': rule,
+                                        'stroke': stroke,
+                                        'stroke-linejoin': (linejoin, 'miter'),
+                                        'stroke-linecap': (linecap, 'butt'),
+                                        'stroke-dasharray': (dasharray, 'none')}))
+        return kw, style
 
     def _color(self, color):
         r,g,b,a = color
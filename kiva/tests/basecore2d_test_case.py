@@ -90,6 +90,26 @@ class LineStateTestCase(unittest.TestCase):
     #    assert(not basecore2d.line_state_equal(ls1,ls2))
 
 
+class RecordingGraphicsContext(basecore2d.GraphicsContextBase):
+    """ Records the points passed to device_fill_points. """
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingGraphicsContext, self).__init__(*args, **kwargs)
+        self.drawn = []
+
+    def device_update_line_state(self):
+        pass
+
+    def device_update_fill_state(self):
+        pass
+
+    def device_fill_points(self, pts, mode):
+        self.drawn.append(pts.tolist())
+
+    def device_stroke_points(self, pts, mode):
+        pass
+
+
 class GraphicsContextTestCase(unittest.TestCase):
 
     def test_create_gc(self):
@@ -440,6 +460,44 @@ class GraphicsContextTestCase(unittest.TestCase):
         gc = basecore2d.GraphicsContextBase()
         self.assert_(gc.is_path_empty())
 
+    #-------------------------------------------------------------------------
+    # Test drawing a path at many points
+    #-------------------------------------------------------------------------
+
+    def test_draw_path_at_points(self):
+        gc = RecordingGraphicsContext()
+        gc.translate_ctm(10, 0)
+        gc.scale_ctm(2, 2)
+        path = gc.get_empty_path()
+        path.move_to(0, 0)
+        path.line_to(1, 0)
+        gc.draw_path_at_points([(0, 0), (5, 5)], path, constants.STROKE)
+        self.assertEqual(gc.drawn, [[[10, 0], [12, 0]], [[20, 10], [22, 10]]])
+
+    def test_draw_path_at_points_keeps_path(self):
+        gc = RecordingGraphicsContext()
+        gc.move_to(0, 0)
+        gc.line_to(1, 1)
+        path = gc.get_empty_path()
+        path.rect(-1, -1, 2, 2)
+        gc.draw_path_at_points([(0, 0)], path)
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) == [0, 0, 1, 1]))
+
+    def test_draw_marker_at_points(self):
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0), (10, 10)], 2,
+                                          constants.SQUARE_MARKER)
+        self.assertEqual(result, 1)
+        self.assertEqual(gc.drawn,
+                         [[[-2, -2], [-2, 2], [2, 2], [2, -2], [-2, -2]],
+                          [[8, 8], [8, 12], [12, 12], [12, 8], [8, 8]]])
+
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0)], 2, constants.NO_MARKER)
+        self.assertEqual(result, 0)
+        self.assertEqual(gc.drawn, [])
+
     def test_is_path_empty2(self):
         """ A path that has moved to a point, but still hasn't drawn
             anything is empty.
@@ -449,6 +507,44 @@ class GraphicsContextTestCase(unittest.TestCase):
         gc.move_to(x, y)
         self.assert_(gc.is_path_empty())
 
+    #-------------------------------------------------------------------------
+    # Test drawing a path at many points
+    #-------------------------------------------------------------------------
+
+    def test_draw_path_at_points(self):
+        gc = RecordingGraphicsContext()
+        gc.translate_ctm(10, 0)
+        gc.scale_ctm(2, 2)
+        path = gc.get_empty_path()
+        path.move_to(0, 0)
+        path.line_to(1, 0)
+        gc.draw_path_at_points([(0, 0), (5, 5)], path, constants.STROKE)
+        self.assertEqual(gc.drawn, [[[10, 0], [12, 0]], [[20, 10], [22, 10]]])
+
+    def test_draw_path_at_points_keeps_path(self):
+        gc = RecordingGraphicsContext()
+        gc.move_to(0, 0)
+        gc.line_to(1, 1)
+        path = gc.get_empty_path()
+        path.rect(-1, -1, 2, 2)
+        gc.draw_path_at_points([(0, 0)], path)
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) == [0, 0, 1, 1]))
+
+    def test_draw_marker_at_points(self):
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0), (10, 10)], 2,
+                                          constants.SQUARE_MARKER)
+        self.assertEqual(result, 1)
+        self.assertEqual(gc.drawn,
+                         [[[-2, -2], [-2, 2], [2, 2], [2, -2], [-2, -2]],
+                          [[8, 8], [8, 12], [12, 12], [12, 8], [8, 8]]])
+
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0)], 2, constants.NO_MARKER)
+        self.assertEqual(result, 0)
+        self.assertEqual(gc.drawn, [])
+
     def test_is_path_empty3(self):
         """ A path that has moved to a point multiple times, but hasn't drawn
             anything is empty.
@@ -461,6 +557,44 @@ class GraphicsContextTestCase(unittest.TestCase):
         gc.move_to(x, y)
         self.assert_(gc.is_path_empty())
 
+    #-------------------------------------------------------------------------
+    # Test drawing a path at many points
+    #-------------------------------------------------------------------------
+
+    def test_draw_path_at_points(self):
+        gc = RecordingGraphicsContext()
+        gc.translate_ctm(10, 0)
+        gc.scale_ctm(2, 2)
+        path = gc.get_empty_path()
+        path.move_to(0, 0)
+        path.line_to(1, 0)
+        gc.draw_path_at_points([(0, 0), (5, 5)], path, constants.STROKE)
+        self.assertEqual(gc.drawn, [[[10, 0], [12, 0]], [[20, 10], [22, 10]]])
+
+    def test_draw_path_at_points_keeps_path(self):
+        gc = RecordingGraphicsContext()
+        gc.move_to(0, 0)
+        gc.line_to(1, 1)
+        path = gc.get_empty_path()
+        path.rect(-1, -1, 2, 2)
+        gc.draw_path_at_points([(0, 0)], path)
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) == [0, 0, 1, 1]))
+
+    def test_draw_marker_at_points(self):
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0), (10, 10)], 2,
+                                          constants.SQUARE_MARKER)
+        self.assertEqual(result, 1)
+        self.assertEqual(gc.drawn,
+                         [[[-2, -2], [-2, 2], [2, 2], [2, -2], [-2, -2]],
+                          [[8, 8], [8, 12], [12, 12], [12, 8], [8, 8]]])
+
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0)], 2, constants.NO_MARKER)
+        self.assertEqual(result, 0)
+        self.assertEqual(gc.drawn, [])
+
     def test_is_path_empty4(self):
         """ We've added a line, so the path is no longer empty.
         """
@@ -481,6 +615,103 @@ class GraphicsContextTestCase(unittest.TestCase):
         """
         pass
 
+    #-------------------------------------------------------------------------
+    # Test compiling the path into vertex and code arrays
+    #-------------------------------------------------------------------------
+
+    def test_compile_empty_path(self):
+        gc = basecore2d.GraphicsContextBase()
+        vertices, codes = gc.compile_path()
+        self.assertEqual(vertices.shape, (0, 2))
+        self.assertEqual(len(codes), 0)
+
+    def test_compile_lines(self):
+        gc = basecore2d.GraphicsContextBase()
+        gc.move_to(0, 0)
+        gc.line_to(1, 0)
+        gc.line_to(1, 1)
+        gc.lines(array([[5, 5], [6, 5], [6, 6]]))
+        gc.close_path()
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) ==
+                             [0, 0, 1, 0, 1, 1, 5, 5, 6, 5, 6, 6, 5, 5]))
+        self.assertEqual(list(codes),
+                         [constants.PATH_MOVE_TO, constants.PATH_LINE_TO,
+                          constants.PATH_LINE_TO, constants.PATH_MOVE_TO,
+                          constants.PATH_LINE_TO, constants.PATH_LINE_TO,
+                          constants.PATH_CLOSE])
+
+    def test_compile_applies_ctm(self):
+        gc = basecore2d.GraphicsContextBase()
+        gc.translate_ctm(10, 20)
+        gc.move_to(0, 0)
+        gc.line_to(1, 1)
+        gc.scale_ctm(2, 2)
+        gc.lines(array([[1, 1], [2, 2]]))
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) ==
+                             [10, 20, 11, 21, 12, 22, 14, 24]))
+
+    def test_ctm_not_reapplied_after_draw(self):
+        gc = RecordingGraphicsContext()
+        gc.translate_ctm(10, 0)
+        gc.move_to(0, 0)
+        gc.line_to(1, 0)
+        gc.stroke_path()
+        gc.move_to(0, 0)
+        gc.line_to(1, 0)
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) == [10, 0, 11, 0]))
+
+    def test_draw_path_subpaths(self):
+        gc = RecordingGraphicsContext()
+        gc.rect(0, 0, 2, 2)
+        gc.move_to(10, 10)
+        gc.move_to(20, 20)
+        gc.line_to(30, 30)
+        gc.draw_path()
+        self.assertEqual(gc.drawn, [[[0, 0], [0, 2], [2, 2], [2, 0], [0, 0]],
+                                 [[20, 20], [30, 30]]])
+        self.assert_(gc.is_path_empty())
+
+    #-------------------------------------------------------------------------
+    # Test drawing a path at many points
+    #-------------------------------------------------------------------------
+
+    def test_draw_path_at_points(self):
+        gc = RecordingGraphicsContext()
+        gc.translate_ctm(10, 0)
+        gc.scale_ctm(2, 2)
+        path = gc.get_empty_path()
+        path.move_to(0, 0)
+        path.line_to(1, 0)
+        gc.draw_path_at_points([(0, 0), (5, 5)], path, constants.STROKE)
+        self.assertEqual(gc.drawn, [[[10, 0], [12, 0]], [[20, 10], [22, 10]]])
+
+    def test_draw_path_at_points_keeps_path(self):
+        gc = RecordingGraphicsContext()
+        gc.move_to(0, 0)
+        gc.line_to(1, 1)
+        path = gc.get_empty_path()
+        path.rect(-1, -1, 2, 2)
+        gc.draw_path_at_points([(0, 0)], path)
+        vertices, codes = gc.compile_path()
+        self.assert_(alltrue(ravel(vertices) == [0, 0, 1, 1]))
+
+    def test_draw_marker_at_points(self):
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0), (10, 10)], 2,
+                                          constants.SQUARE_MARKER)
+        self.assertEqual(result, 1)
+        self.assertEqual(gc.drawn,
+                         [[[-2, -2], [-2, 2], [2, 2], [2, -2], [-2, -2]],
+                          [[8, 8], [8, 12], [12, 12], [12, 8], [8, 8]]])
+
+        gc = RecordingGraphicsContext()
+        result = gc.draw_marker_at_points([(0, 0)], 2, constants.NO_MARKER)
+        self.assertEqual(result, 0)
+        self.assertEqual(gc.drawn, [])
+
 
 ##################################################
 
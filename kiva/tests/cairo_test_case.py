@@ -0,0 +1,83 @@
+import unittest
+
+from numpy import array, pi
+
+try:
+    import cairo
+except ImportError:
+    cairo = None
+
+from kiva import basecore2d
+from kiva.constants import FILL, FILL_STROKE, STROKE
+
+
+class CompiledPathTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if cairo is None:
+            self.skipTest("pycairo is not installed")
+        from kiva.cairo import CompiledPath, GraphicsContext
+        self.gc = GraphicsContext((100, 100))
+        self.gc.clear((1.0, 1.0, 1.0, 1.0))
+        self.path = CompiledPath()
+
+    def pixel(self, x, y):
+        # The surface is ARGB32 in native byte order, top row first
+        data = self.gc.surface.get_data()
+        stride = self.gc.surface.get_stride()
+        offset = (99 - y) * stride + x * 4
+        return [ord(c) for c in data[offset:offset + 4]]
+
+    def test_built_once(self):
+        self.path.rect(-2, -2, 4, 4)
+        built = self.path.cairo_path()
+        self.assert_(self.path.cairo_path() is built)
+        self.path.move_to(0, 0)
+        self.assert_(self.path.cairo_path() is not built)
+
+    def test_transforms(self):
+        self.path.save_ctm()
+        self.path.translate_ctm(10, 0)
+        self.path.scale_ctm(2, 2)
+        self.path.rect(0, 0, 1, 1)
+        self.path.restore_ctm()
+        self.path.move_to(5, 5)
+        self.path.line_to(6, 6)
+        points = [tuple(point) for kind, point in self.path.cairo_path()
+                  if len(point) == 2]
+        self.assertEqual(points[:3], [(10, 0), (12, 0), (12, 2)])
+        self.assertEqual(points[-2:], [(5, 5), (6, 6)])
+
+    def test_add_path(self):
+        self.gc.begin_path()
+        self.gc.move_to(1, 1)
+        self.gc.line_to(2, 2)
+        self.path.rect(0, 0, 1, 1)
+        self.gc.add_path(self.path)
+        # The path is added to the current path
+        elements = list(self.gc._ctx.copy_path())
+        self.assertEqual(elements[:3], [(cairo.PATH_MOVE_TO, (1, 1)),
+                                        (cairo.PATH_LINE_TO, (2, 2)),
+                                        (cairo.PATH_MOVE_TO, (0, 0))])
+
+    def test_draw_path_at_points(self):
+        self.path.arc(0, 0, 3, 0, 2 * pi)
+        self.path.close_path()
+        points = array([(10, 10), (50, 50), (90, 20)])
+        for mode in (FILL, STROKE, FILL_STROKE):
+            self.gc.set_fill_color((1.0, 0.0, 0.0, 1.0))
+            self.gc.set_stroke_color((0.0, 0.0, 1.0, 1.0))
+            self.gc.draw_path_at_points(points, self.path, mode)
+        self.assertNotEqual(self.pixel(50, 50), [255, 255, 255, 255])
+        self.assertEqual(self.pixel(30, 30), [255, 255, 255, 255])
+
+    def test_basecore2d_path(self):
+        path = basecore2d.CompiledPath()
+        path.rect(-1, -1, 2, 2)
+        self.gc.set_fill_color((0.0, 0.0, 0.0, 1.0))
+        self.gc.draw_path_at_points([(20, 20)], path, FILL)
+        self.assertEqual(self.pixel(20, 20), [0, 0, 0, 255])
+
+
+if __name__ == "__main__":
+    unittest.main()
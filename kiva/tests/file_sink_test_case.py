@@ -0,0 +1,128 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+from kiva import ps, svg
+from kiva.file_sink import FileSink, drop_duplicate_points, format_points, \
+     split_format
+
+
+def draw(gc):
+    gc.set_fill_color((1.0, 0.0, 0.0, 1.0))
+    gc.rect(10, 10, 30, 20)
+    gc.fill_path()
+    gc.set_stroke_color((0.0, 0.0, 1.0, 1.0))
+    gc.move_to(0, 0)
+    gc.line_to(50, 40)
+    gc.stroke_path()
+
+
+class RecordingFile(object):
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+
+class FormatPointsTestCase(unittest.TestCase):
+
+    def test_format_points(self):
+        points = [(1, 2.5), (-0.125, 1e3)]
+        self.assertEqual(format_points(points, '%.2f,%.2f '),
+                         ''.join(['%3.2f,%3.2f ' % p for p in points]))
+        self.assertEqual(format_points([], '%.2f,%.2f '), '')
+
+    def test_drop_duplicate_points(self):
+        points = [(0, 0), (0.001, 0), (1, 1), (1, 1), (0, 0)]
+        self.assertEqual(drop_duplicate_points(points, 2).tolist(),
+                         [[0, 0], [1, 1], [0, 0]])
+        self.assertEqual(drop_duplicate_points(points, 3).tolist(),
+                         [[0, 0], [0.001, 0], [1, 1], [0, 0]])
+
+    def test_svg_drop_duplicates(self):
+        gc = svg.GraphicsContext((50, 40))
+        gc.drop_duplicates = True
+        gc.lines([(0, 0), (0, 0.001), (10, 10)])
+        gc.stroke_path()
+        self.assert_('points="0.00,0.00 10.00,10.00 "' in
+                     gc.contents.getvalue())
+
+
+class FileSinkTestCase(unittest.TestCase):
+
+    def test_split_format(self):
+        self.assertEqual(split_format('plot.svg'), ('.svg', False))
+        self.assertEqual(split_format('plot.svgz'), ('.svg', True))
+        self.assertEqual(split_format('plot.PS.gz'), ('.ps', True))
+
+    def test_buffering(self):
+        f = RecordingFile()
+        sink = FileSink(f, buffer_size=10)
+        sink.write('abcd')
+        sink.write('efgh')
+        self.assertEqual(f.writes, [])
+        sink.write('ijkl')
+        self.assertEqual(f.writes, ['abcdefghijkl'])
+        sink.write('mn')
+        sink.close()
+        self.assertEqual(f.writes, ['abcdefghijkl', 'mn'])
+
+    def test_compress(self):
+        f = StringIO()
+        sink = FileSink(f, compress=True)
+        sink.write('hello world')
+        sink.close()
+        self.assertEqual(gzip.GzipFile(fileobj=StringIO(f.getvalue())).read(),
+                         'hello world')
+
+
+class StreamingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self, filename, opener=open):
+        f = opener(os.path.join(self.tmpdir, filename), 'rb')
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def assertStreamMatchesSave(self, gc_class, ext):
+        gc = gc_class((50, 40))
+        draw(gc)
+        gc.save(os.path.join(self.tmpdir, 'saved' + ext))
+
+        gc = gc_class((50, 40))
+        gc.begin_stream(os.path.join(self.tmpdir, 'streamed' + ext + '.gz'),
+                        buffer_size=16)
+        draw(gc)
+        gc.end_stream()
+        self.assertEqual(self.read('streamed' + ext + '.gz', gzip.open),
+                         self.read('saved' + ext))
+
+    def test_svg(self):
+        self.assertStreamMatchesSave(svg.GraphicsContext, '.svg')
+
+    def test_ps(self):
+        self.assertStreamMatchesSave(ps.PSGC, '.ps')
+
+    def test_eps_to_file_object(self):
+        gc = ps.PSGC((50, 40))
+        f = StringIO()
+        gc.begin_stream(f, format='.eps')
+        draw(gc)
+        gc.end_stream()
+        self.assert_(f.getvalue().startswith('%!PS-Adobe-3.0 EPSF-3.0\n'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from kiva.fonttools import font_manager
+from kiva.fonttools.font_manager import FontIndex, FontProperties
+
+
+class FontIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fonts = font_manager.findSystemFonts()
+        if not fonts:
+            self.skipTest("no TrueType fonts installed")
+        self.tmpdir = tempfile.mkdtemp()
+        self.font_file = os.path.join(self.tmpdir, "font.ttf")
+        shutil.copy(fonts[0], self.font_file)
+        self.index_file = os.path.join(self.tmpdir, "fontIndex.cache")
+
+        # Count how often font files are actually parsed
+        self.parsed = []
+        self._createFontEntry = font_manager.createFontEntry
+        def counting_create(fpath, fontext='ttf'):
+            self.parsed.append(fpath)
+            return self._createFontEntry(fpath, fontext)
+        font_manager.createFontEntry = counting_create
+
+    def tearDown(self):
+        font_manager.createFontEntry = self._createFontEntry
+        shutil.rmtree(self.tmpdir)
+
+    def test_unchanged_files_are_not_parsed(self):
+        index = FontIndex(self.index_file)
+        fontlist = index.create_font_list([self.font_file])
+        self.assertEqual(len(fontlist), 1)
+        self.assertEqual(self.parsed, [self.font_file])
+        index.save()
+        self.assert_(os.path.exists(self.index_file))
+
+        index = FontIndex(self.index_file)
+        reloaded = index.create_font_list([self.font_file])
+        self.assertEqual(self.parsed, [self.font_file])
+        self.assertEqual(reloaded[0].name, fontlist[0].name)
+        self.assertEqual(reloaded[0].fname, self.font_file)
+
+    def test_modified_files_are_parsed(self):
+        index = FontIndex(self.index_file)
+        index.create_font_list([self.font_file])
+        st = os.stat(self.font_file)
+        os.utime(self.font_file, (st.st_atime, st.st_mtime + 10))
+        index.create_font_list([self.font_file])
+        self.assertEqual(self.parsed, [self.font_file, self.font_file])
+
+    def test_removed_files_are_dropped(self):
+        index = FontIndex(self.index_file)
+        index.create_font_list([self.font_file])
+        index.save()
+        self.assertEqual(index.create_font_list([]), [])
+        index.save()
+        self.assertEqual(FontIndex(self.index_file)._entries['ttf'], {})
+
+    def test_outdated_index_is_ignored(self):
+        font_manager.pickle_dump({'version': -1, 'entries': {'ttf': {}}},
+                                 self.index_file)
+        index = FontIndex(self.index_file)
+        self.assertEqual(index._entries, {})
+
+
+class FindFontTestCase(unittest.TestCase):
+
+    def test_matches_exhaustive_search(self):
+        fm = font_manager.fontManager
+        props = [FontProperties(family=family, style=style, weight=weight)
+                 for family in ['sans-serif', 'serif', 'monospace',
+                                'DejaVu Sans', 'no such font']
+                 for style in ['normal', 'italic']
+                 for weight in ['normal', 'bold']]
+        for prop in props:
+            families = prop.get_family()
+            expected = [font for font in fm.ttflist
+                        if min([fm.score_family([f], font.name)
+                                for f in families]) < 1.0]
+            self.assertEqual(fm.candidate_fonts(families), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from numpy import array, pi
+
+from kiva import agg
+from kiva.basecore2d import CompiledPath
+from kiva.hit_test import PathHitTester, flatten_path, points_in_shapes
+
+
+def square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+
+class FlattenPathTestCase(unittest.TestCase):
+
+    def test_curves(self):
+        path = agg.CompiledPath()
+        path.move_to(0, 0)
+        path.curve_to(0, 10, 10, 10, 10, 0)
+        path.quad_curve_to(5, -5, 0, 0)
+        path.close_path()
+        [(vertices, closed)] = flatten_path(path, tolerance=0.01)
+        self.assert_(closed)
+        self.assert_(len(vertices) > 10)
+        # The top of the cubic curve is at 7.5, the bottom of the quadratic
+        # curve at -2.5
+        self.assert_(abs(vertices[:, 1].max() - 7.5) <= 0.01)
+        self.assert_(abs(vertices[:, 1].min() + 2.5) <= 0.01)
+
+    def test_basecore2d_path(self):
+        path = CompiledPath()
+        path.translate_ctm(10, 0)
+        path.rect(0, 0, 5, 5)
+        [(vertices, closed)] = flatten_path(path)
+        self.assertEqual(vertices.tolist(),
+                         [[10, 0], [10, 5], [15, 5], [15, 0]])
+
+
+class PathHitTesterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # A circle with a square hole, the square wound the same way
+        path = agg.CompiledPath()
+        path.arc(0, 0, 10, 0, 2 * pi)
+        path.close_path()
+        path.lines(array(square(-3, -3, 6)))
+        path.close_path()
+        self.path = path
+
+    def test_fill_rules(self):
+        points = [(0, 0), (5, 0), (0, 9.9), (10.5, 0)]
+        tester = PathHitTester(self.path, use_winding=False)
+        self.assertEqual(tester.contains(points).tolist(),
+                         [False, True, True, False])
+        tester = PathHitTester(self.path, use_winding=True)
+        self.assertEqual(tester.contains(points).tolist(),
+                         [True, True, True, False])
+
+    def test_disjoint_subpaths(self):
+        path = agg.CompiledPath()
+        for x, y in [(0, 0), (100, 0), (50, 100)]:
+            path.rect(x, y, 5, 5)
+        points = [(50, 30), (2, 2), (102, 2), (52, 102), (52, 2)]
+        for use_winding in (False, True):
+            tester = PathHitTester(path, use_winding=use_winding)
+            self.assertEqual(tester.contains(points).tolist(),
+                             [False, True, True, True, False])
+
+    def test_stroke(self):
+        tester = PathHitTester(self.path)
+        points = [(10.4, 0), (10.6, 0), (0, 0), (3.2, 0), (-3, -3.4)]
+        self.assertEqual(tester.stroke_contains(points, 1.0).tolist(),
+                         [True, False, False, True, True])
+
+    def test_points_in_shapes(self):
+        shapes = [PathHitTester(square(i, 0, 1)) for i in range(3)]
+        points = [(0.5, 0.5), (2.5, 0.5), (2.5, 2), (-1, 0.5), (1.5, 0.25)]
+        shape_indices, point_indices = points_in_shapes(points, shapes)
+        self.assertEqual(sorted(zip(shape_indices, point_indices)),
+                         [(0, 0), (1, 4), (2, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
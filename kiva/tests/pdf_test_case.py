@@ -0,0 +1,55 @@
+import unittest
+from cStringIO import StringIO
+
+from numpy import uint8, zeros
+
+try:
+    from reportlab.pdfgen.canvas import Canvas
+except ImportError:
+    Canvas = None
+
+from kiva import agg
+
+
+class DrawImageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if Canvas is None:
+            self.skipTest("reportlab is not installed")
+        from kiva.pdf import GraphicsContext
+        self.canvas = Canvas(StringIO())
+        self.gc = GraphicsContext(self.canvas)
+
+    def image_xobjects(self):
+        return [name for name in self.canvas._doc.idToObject
+                if name.startswith('FormXob')]
+
+    def test_repeated_image_is_embedded_once(self):
+        img = agg.GraphicsContextArray((20, 10), pix_format='rgba32')
+        img.bmp_array[:] = 128
+        for i in range(3):
+            self.gc.draw_image(img, (0, 0, 20, 10))
+            self.canvas.showPage()
+        self.assertEqual(len(self.gc._image_cache), 1)
+        self.assertEqual(len(self.image_xobjects()), 1)
+
+        img.bmp_array[0, 0] = 0
+        self.gc.draw_image(img)
+        self.assertEqual(len(self.gc._image_cache), 2)
+        self.assertEqual(len(self.image_xobjects()), 2)
+
+    def test_pixel_formats(self):
+        img = agg.GraphicsContextArray((2, 1), pix_format='bgra32')
+        img.bmp_array[:] = (30, 20, 10, 255)
+        reader = self.gc._image_reader(img)
+        self.assertEqual(reader._image.getpixel((0, 0)), (10, 20, 30, 255))
+
+        pixels = zeros((1, 2, 3), dtype=uint8)
+        pixels[:] = (1, 2, 3)
+        reader = self.gc._image_reader(pixels)
+        self.assertEqual(reader.getSize(), (2, 1))
+        self.assertEqual(reader._image.getpixel((1, 0)), (1, 2, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from cStringIO import StringIO
+
+from kiva import pdfmetrics
+
+# The start of an AFM file which kerns "A" and "V" together
+AFM = """StartFontMetrics 2.0
+FontName Test-Kerned
+StartCharMetrics 2
+C 65 ; WX 667 ; N A ; B 14 0 654 718 ;
+C 86 ; WX 667 ; N V ; B 20 0 647 718 ;
+EndCharMetrics
+StartKernData
+StartKernPairs 2
+KPX A V -70
+KPX V A -80
+EndKernPairs
+EndKernData
+EndFontMetrics
+"""
+
+
+class StringWidthTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pdfmetrics._widthCache.clear()
+
+    def test_matches_slow_width(self):
+        for text in ("", "Hello", u"caf\xe9", "The quick brown fox " * 5):
+            self.assertAlmostEqual(
+                pdfmetrics.stringWidth(text, "Helvetica", 12),
+                pdfmetrics._slowStringWidth(text, "Helvetica", 12))
+
+    def test_memoized(self):
+        first = pdfmetrics.stringWidth("label", "Times-Roman", 10)
+        self.assertEqual(pdfmetrics.stringWidth("label", "Times-Roman", 20),
+                         2 * first)
+        self.assertEqual(pdfmetrics._widthCache.hits, 1)
+
+    def test_string_widths(self):
+        texts = ["", "Hello", "x" * 40, u"caf\xe9", ""]
+        widths = pdfmetrics.stringWidths(texts, "Courier", 10)
+        self.assertEqual(widths.tolist(), [0, 30, 240, 24, 0])
+        self.assertEqual(pdfmetrics.stringWidths([], "Courier", 10).tolist(),
+                         [])
+
+
+class KerningTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pdfmetrics.registerKernPairs("Helvetica-Bold", StringIO(AFM))
+        widths = pdfmetrics.getFont("Helvetica-Bold").widths
+        self.a, self.v = widths[ord("A")], widths[ord("V")]
+
+    def tearDown(self):
+        pdfmetrics.getTypeFace("Helvetica-Bold").kernPairs = {}
+        pdfmetrics.getFont("Helvetica-Bold")._calcKerning()
+        pdfmetrics._widthCache.clear()
+
+    def test_kerning(self):
+        unkerned = 0.001 * (2 * self.a + self.v)
+        self.assertAlmostEqual(
+            pdfmetrics.stringWidth("AVA", "Helvetica-Bold", 1), unkerned)
+        self.assertAlmostEqual(
+            pdfmetrics.stringWidth("AVA", "Helvetica-Bold", 1, kerning=1),
+            unkerned - 0.150)
+        self.assertAlmostEqual(
+            pdfmetrics._slowStringWidth("AVA", "Helvetica-Bold", 1, 1),
+            unkerned - 0.150)
+
+    def test_long_string(self):
+        text = "AV" * 20
+        self.assertAlmostEqual(
+            pdfmetrics.stringWidth(text, "Helvetica-Bold", 1, kerning=1),
+            0.001 * (20 * (self.a + self.v) - 20 * 70 - 19 * 80))
+
+    def test_string_widths(self):
+        widths = pdfmetrics.stringWidths(["AV", "AV", "", "A"],
+                                         "Helvetica-Bold", 1, kerning=1)
+        expected = [0.001 * (self.a + self.v - 70)] * 2 + \
+                   [0, 0.001 * self.a]
+        for width, value in zip(widths, expected):
+            self.assertAlmostEqual(width, value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import warnings
+
+from kiva import ps, svg
+from kiva.fonttools import Font
+from kiva.text_extent_cache import TextExtentCache
+
+
+class TextExtentCacheTestCase(unittest.TestCase):
+
+    def test_counters(self):
+        cache = TextExtentCache()
+        measured = []
+        def measure(text):
+            measured.append(text)
+            return (len(text), 1, 0, 0)
+
+        self.assertEqual(cache.text_extent('font', 'abc', measure),
+                         (3, 1, 0, 0))
+        self.assertEqual(cache.text_extent('font', 'abc', measure),
+                         (3, 1, 0, 0))
+        cache.text_extent('other font', 'abc', measure)
+        self.assertEqual(measured, ['abc', 'abc'])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_bounded(self):
+        cache = TextExtentCache(max_size=6)
+        for i, key in enumerate('abc'):
+            cache.set(key, i + 1)
+        # 'a' is used again, so 'b' and 'c' are the least recently used
+        self.assertEqual(cache.get('a'), 1)
+        for i, key in enumerate('defg'):
+            cache.set(key, i + 4)
+        self.assert_(len(cache) <= 6)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_font_file(self):
+        cache = TextExtentCache()
+        font = Font('Arial', 12)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.assertEqual(cache.font_file(font), font.findfont())
+        self.assertEqual(cache.font_file(Font('Arial', 12)),
+                         cache.font_file(font))
+
+
+class BackendTestCase(unittest.TestCase):
+
+    def assertCachedExtents(self, gc):
+        gc.text_extent_cache = TextExtentCache()
+        gc.set_font(Font('Helvetica', 12))
+        extent = gc.get_full_text_extent('Hello world')
+        self.assertEqual(gc.get_full_text_extent('Hello world'), extent)
+        self.assertEqual(gc.text_extent_cache.hits, 1)
+
+        gc.set_font(Font('Helvetica', 24))
+        self.assert_(gc.get_full_text_extent('Hello world')[0] > extent[0])
+        self.assertEqual(gc.text_extent_cache.misses, 2)
+
+        gc.text_extent_cache = None
+        gc.set_font(Font('Helvetica', 12))
+        self.assertEqual(gc.get_full_text_extent('Hello world'), extent)
+
+    def test_svg(self):
+        self.assertCachedExtents(svg.GraphicsContext((10, 10)))
+
+    def test_ps(self):
+        self.assertCachedExtents(ps.PSGC((10, 10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
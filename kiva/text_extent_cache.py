@@ -0,0 +1,112 @@
+#------------------------------------------------------------------------------
+# Copyright (c) 2005, Enthought, Inc.
+# All rights reserved.
+#
+# This software is provided without warranty under the terms of the BSD
+# license included in enthought/LICENSE.txt and may be redistributed only
+# under the conditions described in the aforementioned license.  The license
+# is also available online at http://www.enthought.com/licenses/BSD.txt
+# Thanks for using Enthought open source!
+#------------------------------------------------------------------------------
+""" A cache of text metrics shared by all of the Kiva backends.
+
+    Enable measures the same strings in the same fonts over and over again
+    while laying out labels, text fields and grids.  The backends look the
+    extents up here first, keyed on the font and the string, and the Agg
+    backend also keeps the font files it resolves its fonts to here.
+"""
+
+# The default number of text extents held by a cache.
+DEFAULT_MAX_SIZE = 4096
+
+
+class TextExtentCache(object):
+    """ A bounded cache of text extents.
+
+    Entries are kept in two generations.  An entry found in the older
+    generation is moved to the newer one, and once the newer generation holds
+    half of max_size entries it replaces the older one, dropping the entries
+    which have not been used since.  So the cache never holds more than
+    max_size extents and it is the least recently used ones that are dropped,
+    while a hit costs no more than a dictionary lookup.
+
+    The hits and misses attributes count the extent lookups.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        # The maximum number of text extents held.
+        self.max_size = max_size
+        # The number of extents found in, and missing from, the cache.
+        self.hits = 0
+        self.misses = 0
+        self._recent = {}
+        self._old = {}
+        # Maps the properties of a kiva.fonttools.Font to its font file.
+        self._font_files = {}
+
+    def __len__(self):
+        return len(self._recent) + len(self._old)
+
+    def get(self, key):
+        """ Returns the extent stored for *key*, or None.
+        """
+        extent = self._recent.get(key)
+        if extent is None:
+            extent = self._old.pop(key, None)
+            if extent is None:
+                self.misses += 1
+                return None
+            self.set(key, extent)
+        self.hits += 1
+        return extent
+
+    def set(self, key, extent):
+        """ Stores the extent of a string.  The key should identify the
+        measuring backend, the resolved font, its size and the string.
+        """
+        recent = self._recent
+        recent[key] = extent
+        if len(recent) >= self.max_size // 2:
+            self._old = recent
+            self._recent = {}
+
+    def text_extent(self, font_key, text, measure):
+        """ Returns the extent of *text* in the font identified by *font_key*,
+        calling measure(text) to compute it if it is not cached.
+        """
+        key = (font_key, text)
+        extent = self.get(key)
+        if extent is None:
+            extent = measure(text)
+            self.set(key, extent)
+        return extent
+
+    def font_file(self, font):
+        """ Returns the file name of the font which most closely matches a
+        kiva.fonttools.Font, like font.findfont(), but only searches for each
+        distinct font once.
+        """
+        key = (font.face_name, font.size, font.family, font.weight,
+               font.style, font.encoding)
+        filename = self._font_files.get(key)
+        if filename is None:
+            filename = self._font_files[key] = font.findfont()
+        return filename
+
+    def clear(self):
+        """ Forgets all the extents and font files, and resets the counters.
+        """
+        self._recent = {}
+        self._old = {}
+        self._font_files.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# The cache shared by all the graphics contexts.
+text_extent_cache = TextExtentCache()
+
+def get_text_extent_cache():
+    """ Returns the process wide TextExtentCache.
+    """
+    return text_extent_cache